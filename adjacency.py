@@ -0,0 +1,46 @@
+# Adjacency of every board shape seen so far
+TABLE = {}
+
+
+'''
+@ class:    neighbor structure of a rows x cols board, cells are flat ids
+            row*cols+col. The neighbors of cell x, ordered up, down, left,
+            right, are kept as ids in near[x] and as [row,col] in pos[x], so
+            Python loops index them without building anything. They are
+            shared, callers must not change them.
+@ param:    rows: number of rows
+            cols: number of columns
+'''
+class Adjacency:
+    def __init__(self,rows,cols):
+        self.shape = (rows,cols)
+        self.rows = rows
+        self.cols = cols
+        self.cell = [[x//cols,x%cols] for x in range(rows*cols)]
+        self.near = []
+        for x in range(rows*cols):
+            row,col = divmod(x,cols)
+            near = []
+            if row > 0:
+                near.append(x-cols)
+            if row < rows-1:
+                near.append(x+cols)
+            if col > 0:
+                near.append(x-1)
+            if col < cols-1:
+                near.append(x+1)
+            self.near.append(near)
+        self.pos = [[self.cell[y] for y in near] for near in self.near]
+
+
+'''
+@ function: Adjacency of a board shape, built on first use
+@ param:    rows: number of rows
+            cols: number of columns
+@ return:   Adjacency
+'''
+def adjacency(rows,cols):
+    shape = (rows,cols)
+    if shape not in TABLE:
+        TABLE[shape] = Adjacency(rows,cols)
+    return TABLE[shape]
@@ -0,0 +1,181 @@
+import argparse
+import glob
+import json
+import os
+import signal
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor,as_completed
+
+import engines
+import ordering
+import smarter
+import tracelog
+from cache import open_cache
+from metrics import Metrics
+
+
+class Timeout(Exception):
+    pass
+
+
+def alarm(signum,frame):
+    raise Timeout()
+
+
+'''
+@ function: expand directories and glob patterns into puzzle files
+@ param:    patterns: Array of directory, file or glob pattern
+@ return:   sorted Array of puzzle file path
+'''
+def find_puzzles(patterns):
+    output = []
+    for pattern in patterns:
+        if os.path.isdir(pattern):
+            output += glob.glob(os.path.join(pattern,'*.txt'))
+        else:
+            output += glob.glob(pattern)
+    return sorted(set(output))
+
+
+'''
+@ function: solve one puzzle file inside a worker process
+@ param:    path: puzzle file path
+            engine: engine name in engines.ENGINE
+            timeout: seconds allowed for this puzzle, None for no limit
+            checkpoint: directory of checkpoint files of the iterative engine,
+                        a paused puzzle resumes from there on the next run
+            metrics: add the engine's call counts and times as 'metrics',
+                     left out for a puzzle found in the cache
+            trace: directory the search of a traceable engine is recorded
+                   in, a session is appended to <puzzle>.trace unless the
+                   puzzle is found in the cache
+            order: value ordering of smarter.py, None to leave it
+            cache: sqlite file of a SolutionCache, a puzzle found there is
+                   not searched and a solved one is added to it
+@ return:   dictionary of puzzle, engine, status, solution, time and nodes,
+            cached is set when the solution came from the cache
+'''
+def solve_file(path,engine,timeout=None,checkpoint=None,metrics=False,trace=None,order=None,cache=None):
+    result = {'puzzle':path,'engine':engine,'status':'unsolved','solution':None,'time':0.0,'nodes':0}
+    # deep boards recurse once per assigned cell
+    sys.setrecursionlimit(max(sys.getrecursionlimit(),100000))
+    if order is not None:
+        smarter.value_order = order
+    start_time = time.time()
+    resumable = (engine == 'iterative') and (checkpoint is not None)
+    # the iterative engine stops on its own budget and keeps its progress
+    use_alarm = (timeout is not None) and hasattr(signal,'setitimer') and not resumable
+    if use_alarm:
+        signal.signal(signal.SIGALRM,alarm)
+        signal.setitimer(signal.ITIMER_REAL,timeout)
+    monitor = None
+    recorder = None
+    try:
+        store = None
+        known = None
+        if cache is not None:
+            store = open_cache(cache)
+            start_state = engines.load_puzzle(path)[0]
+            known = store.get(start_state)
+        # a cached puzzle is not searched, so it has no metrics or trace
+        if known is None:
+            if metrics and (engines.engine_module(engine) is not None):
+                monitor = Metrics(engines.engine_module(engine))
+                monitor.start()
+            if (trace is not None) and (engine in tracelog.TRACEABLE):
+                name = os.path.splitext(os.path.basename(path))[0]+'.trace'
+                recorder = tracelog.Trace(os.path.join(trace,name),engines.load_puzzle(path)[0],engine)
+                smarter.trace = recorder
+        if known is not None:
+            solution,nodes = known,0
+            result['cached'] = True
+        elif resumable:
+            name = os.path.splitext(os.path.basename(path))[0]+'.ckpt'
+            solution,nodes,status = engines.resume_iterative(path,os.path.join(checkpoint,name),timeout)
+            if status == 'paused':
+                result['status'] = 'paused'
+        else:
+            start_state,source,value = engines.load_puzzle(path)
+            solution,nodes = engines.ENGINE[engine](start_state,source,value)
+        result['nodes'] = int(nodes)
+        if solution is not None:
+            result['status'] = 'solved'
+            result['solution'] = engines.solution_rows(solution)
+            if (store is not None) and (known is None):
+                store.put(start_state,solution)
+    except (Timeout,engines.OutOfBudget):
+        result['status'] = 'timeout'
+        result['nodes'] = int(engines.counters(engine)['nodes'])
+    except Exception as error:
+        result['status'] = 'error'
+        result['error'] = repr(error)
+    finally:
+        if use_alarm:
+            signal.setitimer(signal.ITIMER_REAL,0)
+        if monitor is not None:
+            monitor.stop()
+            result['metrics'] = monitor.report()
+        if recorder is not None:
+            smarter.trace = None
+            recorder.close()
+    result['time'] = time.time()-start_time
+    return result
+
+
+'''
+@ function: solve puzzle files over a process pool, yielding results as they finish
+@ param:    paths: Array of puzzle file path
+            engine: engine name in engines.ENGINE
+            jobs: number of worker processes, None for one per core
+            timeout: seconds allowed per puzzle, None for no limit
+            checkpoint: directory of checkpoint files, None to not keep any
+            metrics: add the engine's call counts and times to each result
+            trace: directory of search traces, None to record nothing
+            order: value ordering of smarter.py, None for the default
+            cache: sqlite file of a SolutionCache, None to search every puzzle
+@ return:   generator of result dictionary
+'''
+def solve_batch(paths,engine,jobs=None,timeout=None,checkpoint=None,metrics=False,trace=None,order=None,cache=None):
+    with ProcessPoolExecutor(max_workers=jobs) as pool:
+        futures = [pool.submit(solve_file,path,engine,timeout,checkpoint,metrics,trace,order,cache) for path in paths]
+        for future in as_completed(futures):
+            yield future.result()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Solve a batch of Flow puzzles in parallel.")
+    parser.add_argument('puzzles',nargs='+',help="puzzle files, directories or glob patterns")
+    parser.add_argument('-e','--engine',default='smarter',choices=sorted(engines.ENGINE))
+    parser.add_argument('-j','--jobs',type=int,default=None,help="worker processes (default: all cores)")
+    parser.add_argument('-t','--timeout',type=float,default=None,help="seconds allowed per puzzle")
+    parser.add_argument('-o','--output',default=None,help="write JSON lines here instead of stdout")
+    parser.add_argument('-c','--checkpoint',default=None,
+                        help="with --engine iterative, save puzzles that run out of time here and resume them next run")
+    parser.add_argument('-m','--metrics',action='store_true',
+                        help="add call counts, times, prunes, depth and visited states to every result")
+    parser.add_argument('--trace',default=None,
+                        help="record the search of %s into <puzzle>.trace files here" % ','.join(tracelog.TRACEABLE))
+    parser.add_argument('--order',default=None,choices=sorted(ordering.ORDERING),help="value ordering of smarter.py")
+    parser.add_argument('--cache',default=None,
+                        help="sqlite file of solved puzzles, turned, mirrored or relabeled repeats are not searched again")
+    args = parser.parse_args(argv)
+    for directory in (args.checkpoint,args.trace):
+        if (directory is not None) and not os.path.isdir(directory):
+            os.makedirs(directory)
+
+    paths = find_puzzles(args.puzzles)
+    out = open(args.output,'w') if args.output else sys.stdout
+    count = {}
+    start_time = time.time()
+    for result in solve_batch(paths,args.engine,args.jobs,args.timeout,args.checkpoint,args.metrics,args.trace,args.order,args.cache):
+        out.write(json.dumps(result)+'\n')
+        out.flush()
+        count[result['status']] = count.get(result['status'],0)+1
+    if args.output:
+        out.close()
+    print("Finished %d puzzles in %.2fs: %s" % (len(paths),time.time()-start_time,count),file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,159 @@
+import argparse
+import json
+import os
+import platform
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+import batch
+import engines
+import ordering
+import smarter
+
+try:
+    import resource
+except ImportError:
+    resource = None
+
+
+# metrics compared against a baseline, larger is worse
+METRIC = ['time','nodes','checks','memory']
+
+
+'''
+@ function: run one engine on one puzzle in a fresh worker process
+@ param:    path: puzzle file path
+            engine: engine name
+            timeout: seconds allowed, None for no limit
+            seed: random seed of dumb.py
+            bottleneck: use the bottleneck prune of smarter.py
+            order: value ordering of smarter.py, a name in ordering.ORDERING
+            backjump: use conflict-directed backjumping in smarter.py
+@ return:   dictionary of benchmark record
+'''
+def bench_file(path,engine,timeout,seed,bottleneck=True,order='neighbor',backjump=True):
+    engines.reset(engine,seed)
+    smarter.use_bottleneck = bottleneck
+    smarter.value_order = order
+    smarter.use_backjump = backjump
+    result = batch.solve_file(path,engine,timeout)
+    count = engines.counters(engine)
+    result['checks'] = int(count['checks'])
+    result['prunes'] = count['prunes']
+    result['memory'] = 0
+    if resource is not None:
+        # peak resident size in KB, the worker only ever ran this puzzle
+        result['memory'] = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    result['puzzle'] = os.path.basename(path)
+    del result['solution']
+    return result
+
+
+'''
+@ function: run every engine over the corpus
+@ param:    corpus: Array of puzzle file path
+            engine_list: Array of engine name
+            timeout: seconds allowed per run
+            seed: random seed of dumb.py
+            bottleneck: use the bottleneck prune of smarter.py
+            order: value ordering of smarter.py
+            backjump: use conflict-directed backjumping in smarter.py
+@ return:   Array of benchmark record
+'''
+def run_bench(corpus,engine_list,timeout,seed,bottleneck=True,order='neighbor',backjump=True):
+    output = []
+    # one process per run keeps peak memory and caches independent
+    with ProcessPoolExecutor(max_workers=1,max_tasks_per_child=1) as pool:
+        for engine in engine_list:
+            for path in corpus:
+                result = pool.submit(bench_file,path,engine,timeout,seed,bottleneck,order,backjump).result()
+                print("%-8s %-22s %-8s %8.3fs %8d nodes %8d checks %8d KB" % (engine,result['puzzle'],
+                      result['status'],result['time'],result['nodes'],result['checks'],result['memory']))
+                output.append(result)
+    return output
+
+
+'''
+@ function: compare a benchmark against a baseline
+@ param:    current: Array of benchmark record
+            baseline: Array of benchmark record
+            tolerance: allowed relative increase of each metric
+            min_time: time differences below this many seconds are noise
+@ return:   Array of regression message
+'''
+def compare(current,baseline,tolerance=0.25,min_time=0.1):
+    base = {(x['engine'],x['puzzle']):x for x in baseline}
+    output = []
+    for cur in current:
+        old = base.get((cur['engine'],cur['puzzle']))
+        if old is None:
+            continue
+        name = "%s %s" % (cur['engine'],cur['puzzle'])
+        if (old['status'] == 'solved') and (cur['status'] != 'solved'):
+            output.append("%s: %s, baseline solved it" % (name,cur['status']))
+            continue
+        if cur['status'] != 'solved':
+            continue
+        for metric in METRIC:
+            if (old.get(metric,0) <= 0) or (cur.get(metric,0) <= old[metric]*(1+tolerance)):
+                continue
+            if (metric == 'time') and (cur['time']-old['time'] < min_time):
+                continue
+            output.append("%s: %s %.4g -> %.4g (+%.0f%%)" % (name,metric,old[metric],cur[metric],
+                          100.0*(cur[metric]/old[metric]-1)))
+    return output
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the Flow engines over a fixed corpus.")
+    parser.add_argument('-c','--corpus',default=os.path.join(os.path.dirname(os.path.abspath(__file__)),'puzzles'),
+                        help="puzzle directory or glob pattern (default: puzzles/)")
+    parser.add_argument('-e','--engines',default='dumb,smart,smarter',help="comma separated engine names")
+    parser.add_argument('-t','--timeout',type=float,default=60.0,help="seconds allowed per run")
+    parser.add_argument('-s','--seed',type=int,default=0,help="random seed of dumb.py")
+    parser.add_argument('--no-bottleneck',dest='bottleneck',action='store_false',help="turn off the bottleneck prune")
+    parser.add_argument('--no-backjump',dest='backjump',action='store_false',
+                        help="backtrack one decision at a time in smarter.py")
+    parser.add_argument('--order',default='neighbor',choices=sorted(ordering.ORDERING),help="value ordering of smarter.py")
+    parser.add_argument('-o','--output',default='bench.json',help="result file")
+    parser.add_argument('-b','--baseline',default=None,help="saved result file to compare against")
+    parser.add_argument('--tolerance',type=float,default=0.25,help="allowed relative increase before flagging")
+    args = parser.parse_args(argv)
+
+    engine_list = args.engines.split(',')
+    for engine in engine_list:
+        if engine not in engines.ENGINE:
+            parser.error("unknown engine: %s" % engine)
+    # sort by board size, then by name
+    corpus = batch.find_puzzles([args.corpus])
+    corpus = sorted(corpus,key=lambda path:(os.path.getsize(path),path))
+    # read before the run, the result file may be the baseline itself
+    baseline = None
+    if args.baseline is not None:
+        baseline = json.load(open(args.baseline))['results']
+
+    results = run_bench(corpus,engine_list,args.timeout,args.seed,args.bottleneck,args.order,args.backjump)
+    record = {
+        'meta': {'time':time.strftime('%Y-%m-%dT%H:%M:%S'),'python':platform.python_version(),
+                 'numpy':np.__version__,'seed':args.seed,'timeout':args.timeout,
+                 'bottleneck':args.bottleneck,'order':args.order,'backjump':args.backjump},
+        'results': results,
+    }
+    file = open(args.output,'w')
+    json.dump(record,file,indent=1)
+    file.close()
+
+    if baseline is not None:
+        regression = compare(results,baseline,args.tolerance)
+        for line in regression:
+            print("REGRESSION",line)
+        if len(regression):
+            sys.exit(1)
+        print("No regression against",args.baseline)
+
+
+if __name__ == "__main__":
+    main()
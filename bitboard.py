@@ -0,0 +1,311 @@
+import numpy as np
+
+from adjacency import adjacency
+
+
+'''
+@ class:    state stored as one integer bitmask per color plus an empty mask,
+            bit (row*cols+col) stands for cell [row,col]
+@ param:    rows: number of rows
+            cols: number of columns
+'''
+class BitBoard:
+    def __init__(self,rows,cols):
+        self.rows = rows
+        self.cols = cols
+        self.shape = (rows,cols)
+        self.full = (1 << (rows*cols)) - 1
+        # cells that have a left / right neighbor
+        left = 0
+        right = 0
+        for row in range(rows):
+            for col in range(cols):
+                if col > 0:
+                    left |= 1 << (row*cols+col)
+                if col < cols-1:
+                    right |= 1 << (row*cols+col)
+        self.has_left = left
+        self.has_right = right
+        self.grid = [0]*(rows*cols)
+        self.masks = {}
+        self.empty = self.full
+        self.source_mask = None
+
+    @classmethod
+    def from_array(cls,state):
+        board = cls(state.shape[0],state.shape[1])
+        for row in range(state.shape[0]):
+            for col in range(state.shape[1]):
+                if state[row,col] != 0:
+                    board[row,col] = int(state[row,col])
+        return board
+
+    def to_array(self):
+        return np.asarray(self.grid,dtype=np.uint8).reshape(self.shape)
+
+    def copy(self):
+        board = BitBoard.__new__(BitBoard)
+        board.__dict__.update(self.__dict__)
+        board.grid = list(self.grid)
+        board.masks = dict(self.masks)
+        return board
+
+    def __getitem__(self,key):
+        return self.grid[key[0]*self.cols+key[1]]
+
+    def __setitem__(self,key,val):
+        idx = key[0]*self.cols+key[1]
+        bit = 1 << idx
+        old = self.grid[idx]
+        val = int(val)
+        if old != 0:
+            self.masks[old] &= ~bit
+        else:
+            self.empty &= ~bit
+        if val != 0:
+            self.masks[val] = self.masks.get(val,0) | bit
+        else:
+            self.empty |= bit
+        self.grid[idx] = val
+
+    def __contains__(self,val):
+        if val == 0:
+            return self.empty != 0
+        return self.masks.get(int(val),0) != 0
+
+    def tostring(self):
+        return bytes(self.grid)
+
+    tobytes = tostring
+
+
+'''
+@ function: shift a mask so that every cell sees its neighbor in one direction
+@ param:    board: current state
+            m: bitmask
+@ return:   up,down,left,right: masks of cells whose neighbor in that direction is in m
+'''
+def shifted(board,m):
+    up = (m << board.cols) & board.full
+    down = m >> board.cols
+    left = (m << 1) & board.has_left
+    right = (m >> 1) & board.has_right
+    return up,down,left,right
+
+
+'''
+@ function: grow a mask by one step in all four directions
+@ param:    board: current state
+            m: bitmask
+@ return:   mask of cells adjacent to m
+'''
+def dilate(board,m):
+    up,down,left,right = shifted(board,m)
+    return up | down | left | right
+
+
+'''
+@ function: count for every cell how many of its neighbors are in a mask
+@ param:    board: current state
+            m: bitmask
+@ return:   eq0,eq1,eq2,ge3: masks of cells with 0, 1, 2, 3 or more neighbors in m
+'''
+def count_neighbor(board,m):
+    a,b,c,d = shifted(board,m)
+    # bit-sliced adder of the four direction masks
+    s1 = a ^ b
+    c1 = a & b
+    s2 = c ^ d
+    c2 = c & d
+    low = s1 ^ s2
+    carry = s1 & s2
+    mid = c1 ^ c2 ^ carry
+    high = (c1 & c2) | (carry & (c1 ^ c2))
+    eq0 = board.full & ~(low | mid | high)
+    eq1 = low & ~mid & ~high
+    eq2 = mid & ~low & ~high
+    ge3 = high | (low & mid)
+    return eq0,eq1,eq2,ge3
+
+
+'''
+@ function: flood fill inside an allowed region
+@ param:    board: current state
+            seed: bitmask to start from
+            allowed: bitmask the fill may enter
+            goal: bitmask that stops the fill once reached, 0 to fill completely
+@ return:   filled bitmask
+'''
+def flood(board,seed,allowed,goal=0):
+    reach = seed
+    while True:
+        grow = (reach | dilate(board,reach)) & allowed
+        if grow == reach or (grow & goal):
+            return grow
+        reach = grow
+
+
+'''
+@ function: build the bitmask of color sources
+@ param:    board: current state
+            start_state: initial state
+@ return:   bitmask of source cells
+'''
+def get_source_mask(board,start_state):
+    if board.source_mask is None:
+        mask = 0
+        for idx in np.flatnonzero(start_state):
+            mask |= 1 << int(idx)
+        board.source_mask = mask
+    return board.source_mask
+
+
+'''
+@ function: check state consistency w.r.t constraints
+@ param:    board: current state
+            start_state: initial state
+            source: Array of color source
+            strict: use the rules of smarter.py instead of smart.py
+@ return:   boolean value of current consistency
+'''
+def is_consistent(board,start_state,source,strict=True):
+    src = get_source_mask(board,start_state)
+    e0,e1,e2,e3 = count_neighbor(board,board.empty)
+    has2 = 0
+    has3 = 0
+    for color,m in board.masks.items():
+        if m == 0:
+            continue
+        m0,m1,m2,m3 = count_neighbor(board,m)
+        path = m & ~src
+        head = m & src
+        if strict:
+            # no same color neighbor and at most one empty neighbor on a path
+            if path & m0 & (e0 | e1):
+                return False
+            # isolated source
+            if head & m0 & e0:
+                return False
+            # dead path end
+            if path & m1 & e0:
+                return False
+        else:
+            # no same color neighbor and no empty neighbor
+            if m & m0 & e0:
+                return False
+        # path zig-zag
+        if path & m3:
+            return False
+        # source zig-zag
+        if head & (m2 | m3):
+            return False
+        has2 |= m2
+        has3 |= m3
+    # unassigned variable without empty neighbor needs exactly one pair
+    if board.empty & e0 & (~has2 | has3):
+        return False
+    return checkLink(board,source)
+
+
+'''
+@ function: check state completeness w.r.t constraints
+@ param:    board: current state
+            start_state: initial state
+@ return:   boolean value of current completeness
+'''
+def is_complete(board,start_state):
+    if board.empty:
+        return False
+    src = get_source_mask(board,start_state)
+    for color,m in board.masks.items():
+        m0,m1,m2,m3 = count_neighbor(board,m)
+        if (m & ~src) & ~m2:
+            return False
+        if (m & src) & ~m1:
+            return False
+        # and no loop apart from the path
+        if flood(board,m & -m,m) != m:
+            return False
+    return True
+
+
+'''
+@ function: forward checking helper function
+@ param:    board: current state
+            source: Array of color source
+            colors: Set of color value to check, None for all colors
+@ return:   boolean value of forward checking consistency
+'''
+def checkLink(board,source,colors=None):
+    for i in range(0,len(source),2):
+        color = int(source[i][2])
+        if (colors is not None) and (color not in colors):
+            continue
+        start = 1 << (int(source[i][0])*board.cols+int(source[i][1]))
+        goal = 1 << (int(source[i+1][0])*board.cols+int(source[i+1][1]))
+        allowed = board.empty | board.masks.get(color,0)
+        if not flood(board,start,allowed,goal) & goal:
+            return False
+    return True
+
+
+'''
+@ function: helper function that checks completed color value
+@ param:    board: current state
+            source: Array of color source
+@ return:   Array of color value that is completed hence should not be used anymore
+'''
+def checkColor(board,source):
+    connected = []
+    for i in range(0,len(source),2):
+        color = int(source[i][2])
+        start = 1 << (int(source[i][0])*board.cols+int(source[i][1]))
+        goal = 1 << (int(source[i+1][0])*board.cols+int(source[i+1][1]))
+        if flood(board,start,board.masks.get(color,0),goal) & goal:
+            connected.append(source[i][2])
+    return connected
+
+
+'''
+@ function: select variable for assignment, same ordering as smarter.py
+@ param:    board: current state
+            value: Array of all color value
+            connected: Array of value that should not be used
+@ return:   variable with least assignable value
+'''
+def select_variable(board,value,connected):
+    cols = board.cols
+    grid = board.grid
+    candidate = board.empty & dilate(board,board.full & ~board.empty)
+    best = None
+    while candidate:
+        bit = candidate & -candidate
+        candidate ^= bit
+        idx = bit.bit_length()-1
+        row,col = divmod(idx,cols)
+        count = {}
+        empty = False
+        for j in neighbor_index(board,idx):
+            if grid[j] == 0:
+                empty = True
+            else:
+                count[grid[j]] = count.get(grid[j],0)+1
+        color = [x for _,x in sorted(((n,x) for x,n in count.items()),reverse=True)]
+        if empty:
+            for i in value:
+                if i not in color:
+                    color.append(i)
+        color = [x for x in color if x not in connected]
+        if (best is None) or (len(color) < len(best[2])):
+            best = [row,col,color]
+    return best
+
+
+'''
+@ function: flat index of the neighbors of a cell
+@ param:    board: current state
+            idx: flat cell index
+@ return:   Array of neighbor flat index
+'''
+def neighbor_index(board,idx):
+    return adjacency(board.rows,board.cols).near[idx]
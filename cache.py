@@ -0,0 +1,268 @@
+import argparse
+import hashlib
+import os
+import sqlite3
+import time
+from collections import OrderedDict
+
+import numpy as np
+
+
+# the 8 symmetries of the board as (quarter turns,mirrored)
+SYMMETRY = [(k,flip) for flip in (False,True) for k in range(4)]
+
+# caches opened by open_cache, one per store path
+STORE = {}
+
+
+'''
+@ function: turn and mirror a grid
+@ param:    grid: matrix of state
+            k: number of quarter turns
+            flip: boolean value of mirroring after the turns
+@ return:   matrix of state
+'''
+def transform(grid,k,flip):
+    grid = np.rot90(grid,k)
+    if flip:
+        grid = grid[:,::-1]
+    return grid
+
+
+'''
+@ function: undo transform
+@ param:    grid: matrix of state
+            k: number of quarter turns
+            flip: boolean value of mirroring after the turns
+@ return:   matrix of state
+'''
+def untransform(grid,k,flip):
+    if flip:
+        grid = grid[:,::-1]
+    return np.rot90(grid,-k)
+
+
+'''
+@ function: positions of cells after transform
+@ param:    rows,cols: Array of row and column of the cells
+            shape: shape of the grid before the transform
+            k: number of quarter turns
+            flip: boolean value of mirroring after the turns
+@ return:   rows,cols: Array of row and column after the transform
+            shape: shape of the grid after the transform
+'''
+def move(rows,cols,shape,k,flip):
+    height,width = shape
+    for _ in range(k):
+        # np.rot90 turns counterclockwise
+        rows,cols = width-1-cols,rows
+        height,width = width,height
+    if flip:
+        cols = width-1-cols
+    return rows,cols,(height,width)
+
+
+'''
+@ function: canonical form of a puzzle under the 8 symmetries and color
+            renaming. Only the sources are colored, so every symmetry moves
+            the sources and the one with the smallest sorted positions wins.
+            Colors are named 1,2,3,... in the order they then appear row by
+            row, which settles ties between symmetries of the sources.
+@ param:    start_state: initial state of build_Start_State
+@ return:   key: hex digest of the canonical form
+            k,flip: symmetry that takes the puzzle to the canonical form
+            label: Array of 256 renaming every color value of the puzzle
+'''
+def canonical(start_state):
+    rows,cols = np.nonzero(start_state)
+    value = start_state[rows,cols]
+    form = []
+    for k,flip in SYMMETRY:
+        row,col,shape = move(rows,cols,start_state.shape,k,flip)
+        flat = row*shape[1]+col
+        order = np.argsort(flat)
+        form.append((shape,flat[order].tobytes(),k,flip,order))
+    # the positions decide, the colors only between symmetries of the sources
+    least = min([item[:2] for item in form])
+    best = None
+    for shape,position,k,flip,order in form:
+        if (shape,position) != least:
+            continue
+        name = {}
+        for v in value[order].tolist():
+            if v not in name:
+                name[v] = len(name)+1
+        data = bytes([name[v] for v in value[order].tolist()])
+        if (best is None) or (data < best[0]):
+            best = (data,k,flip,name)
+    data,k,flip,name = best
+    label = np.zeros(256,dtype=np.uint8)
+    for v,n in name.items():
+        label[v] = n
+    key = hashlib.sha1(b'%dx%d:' % least[0]+least[1]+data).hexdigest()
+    return key,k,flip,label
+
+
+'''
+@ class:    solutions of solved puzzles, shared by every puzzle that is the
+            same board turned, mirrored or with other letters. Solutions are
+            stored in canonical form in an sqlite file with the time of
+            their last use, the oldest go when the file holds more than
+            capacity. The most recent ones are also kept in memory, a hit
+            there never reads the file, along with the canonical form of
+            the puzzles last seen, so an exact repeat skips canonical().
+@ param:    path: sqlite file path, None to keep solutions in memory only
+            capacity: number of solutions kept in the file
+            memory: number of solutions kept in memory
+'''
+class SolutionCache:
+    def __init__(self,path=None,capacity=100000,memory=1024):
+        self.path = path
+        self.capacity = capacity
+        self.memory = memory
+        self.table = OrderedDict()
+        # puzzle bytes: canonical() of the puzzle
+        self.forms = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.db = None
+        if path is not None:
+            self.db = sqlite3.connect(path,timeout=30)
+            with self.db:
+                self.db.execute('CREATE TABLE IF NOT EXISTS solution '
+                                '(key TEXT PRIMARY KEY,rows INTEGER,cols INTEGER,grid BLOB,used REAL)')
+                self.db.execute('CREATE INDEX IF NOT EXISTS solution_used ON solution (used)')
+
+    '''
+    @ function: canonical form of a puzzle, remembered by its exact grid
+    @ param:    start_state: initial state of build_Start_State
+    @ return:   key,k,flip,label as canonical() returns them
+    '''
+    def form(self,start_state):
+        raw = b'%dx%d:' % start_state.shape+start_state.tobytes()
+        if raw in self.forms:
+            self.forms.move_to_end(raw)
+            return self.forms[raw]
+        self.forms[raw] = canonical(start_state)
+        if len(self.forms) > self.memory:
+            self.forms.popitem(last=False)
+        return self.forms[raw]
+
+    '''
+    @ function: keep a canonical solution in memory, dropping the least
+                recently used one when memory is full
+    @ param:    key: canonical key
+                grid: canonical solution matrix
+    @ return:   none
+    '''
+    def remember(self,key,grid):
+        self.table[key] = grid
+        self.table.move_to_end(key)
+        if len(self.table) > self.memory:
+            self.table.popitem(last=False)
+
+    '''
+    @ function: solution of a puzzle seen before
+    @ param:    start_state: initial state of build_Start_State
+    @ return:   solution: matrix of solution in the puzzle's orientation and
+                colors, None when the puzzle is not cached
+    '''
+    def get(self,start_state):
+        key,k,flip,label = self.form(start_state)
+        grid = self.table.get(key)
+        if grid is not None:
+            self.table.move_to_end(key)
+        elif self.db is not None:
+            row = self.db.execute('SELECT rows,cols,grid FROM solution WHERE key = ?',(key,)).fetchone()
+            if row is not None:
+                grid = np.frombuffer(row[2],dtype=np.uint8).reshape(row[0],row[1])
+                with self.db:
+                    self.db.execute('UPDATE solution SET used = ? WHERE key = ?',(time.time(),key))
+                self.remember(key,grid)
+        if grid is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        # canonical names back to the puzzle's colors
+        color = np.zeros(256,dtype=np.uint8)
+        color[label] = np.arange(256,dtype=np.uint8)
+        color[0] = 0
+        return np.ascontiguousarray(untransform(color[grid],k,flip))
+
+    '''
+    @ function: store the solution of a puzzle
+    @ param:    start_state: initial state of build_Start_State
+                solution: matrix of solution
+    @ return:   none
+    '''
+    def put(self,start_state,solution):
+        key,k,flip,label = self.form(start_state)
+        grid = np.ascontiguousarray(label[transform(np.asarray(solution,dtype=np.uint8),k,flip)])
+        self.remember(key,grid)
+        if self.db is None:
+            return
+        with self.db:
+            self.db.execute('INSERT OR REPLACE INTO solution VALUES (?,?,?,?,?)',
+                            (key,grid.shape[0],grid.shape[1],grid.tobytes(),time.time()))
+            extra = self.db.execute('SELECT COUNT(*) FROM solution').fetchone()[0]-self.capacity
+            if extra > 0:
+                self.db.execute('DELETE FROM solution WHERE key IN '
+                                '(SELECT key FROM solution ORDER BY used LIMIT ?)',(extra,))
+                self.evictions += extra
+
+    def __len__(self):
+        if self.db is None:
+            return len(self.table)
+        return self.db.execute('SELECT COUNT(*) FROM solution').fetchone()[0]
+
+    def clear(self):
+        self.table.clear()
+        self.forms.clear()
+        if self.db is not None:
+            with self.db:
+                self.db.execute('DELETE FROM solution')
+
+    def close(self):
+        if self.db is not None:
+            self.db.close()
+            self.db = None
+
+    '''
+    @ function: report cache counters
+    @ param:    none
+    @ return:   dictionary of counters
+    '''
+    def stats(self):
+        return {'path':self.path,'capacity':self.capacity,'memory':len(self.table),'size':len(self),
+                'hits':self.hits,'misses':self.misses,'evictions':self.evictions}
+
+
+'''
+@ function: SolutionCache of a store path, opened once per process
+@ param:    path: sqlite file path
+@ return:   SolutionCache
+'''
+def open_cache(path):
+    if path not in STORE:
+        STORE[path] = SolutionCache(path)
+    return STORE[path]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Inspect or clear a solution cache.")
+    parser.add_argument('store',help="sqlite file of the cache")
+    parser.add_argument('--clear',action='store_true',help="remove every solution")
+    args = parser.parse_args(argv)
+
+    if not os.path.exists(args.store):
+        parser.error("no such cache: %s" % args.store)
+    store = SolutionCache(args.store)
+    if args.clear:
+        store.clear()
+    print(store.stats())
+    store.close()
+
+
+if __name__ == "__main__":
+    main()
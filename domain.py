@@ -0,0 +1,440 @@
+from collections import deque
+
+import numpy as np
+
+from adjacency import adjacency
+from heap import IndexedHeap
+
+
+'''
+@ class:    color domains of every cell stored as bitsets, bit k standing
+            for value[k]. Domains follow from the neighbors of a cell and
+            are only recomputed around cells that change. Every domain
+            change, propagated assignment and finished color goes on a
+            trail that backtracking unwinds.
+@ param:    state: current state
+            start_state: initial state
+            source: Array of color source sorted by color
+            value: Array of color value in puzzle
+            table: Adjacency.near of the board, None for the shared one
+'''
+class Domains:
+    def __init__(self,state,start_state,source,value,table=None):
+        self.shape = tuple(state.shape)
+        self.rows,self.cols = self.shape
+        self.table = adjacency(self.rows,self.cols).near if table is None else table
+        self.start_state = start_state
+        self.value = [int(v) for v in value]
+        self.bit = {v:1 << k for k,v in enumerate(self.value)}
+        self.full = (1 << len(self.value))-1
+        # source cell index pair of every color
+        self.pair = {}
+        for i in range(0,len(source),2):
+            self.pair[int(source[i][2])] = (source[i][0]*self.cols+source[i][1],source[i+1][0]*self.cols+source[i+1][1])
+        # bits of colors whose sources are joined
+        self.done = 0
+        self.dom = [0]*(self.rows*self.cols)
+        # each entry is (cell index,old domain,assigned by propagation), cell -1 for done
+        self.trail = []
+        # empty neighbors of every cell
+        self.free = [0]*len(self.dom)
+        for x in range(len(self.dom)):
+            if state[divmod(x,self.cols)] == 0:
+                self.dom[x] = self.domain_of(state,x)
+                for y in self.table[x]:
+                    self.free[y] += 1
+        # cells of every color bit k whose narrow domain holds it, the bits
+        # each cell is filed under, and the cells with a full domain but
+        # fewer than two empty neighbors, so a finished color only rekeys
+        # the cells it can reach
+        self.holds = [set() for _ in self.value]
+        self.filed = [0]*len(self.dom)
+        self.loose = set()
+        for x in range(len(self.dom)):
+            self.file(x)
+        self.order = IndexedHeap(len(self.dom))
+        self.rebuild(state)
+        # decision depths behind every colored cell, None when not tracked
+        self.deps = None
+
+    '''
+    @ function: start keeping the decision depths behind every assignment.
+                Cells colored so far follow from the puzzle alone.
+    @ return:   none
+    '''
+    def track(self):
+        self.deps = [0]*len(self.dom)
+        # decision depths behind every finished color
+        self.done_deps = {}
+        # depth: (cell index,color value) of the decision made there
+        self.decision = {}
+        # decision depths behind the last failed propagate
+        self.conflict = 0
+
+    '''
+    @ function: decision depths behind the colors of some cells, empty
+                cells add nothing
+    @ param:    state: current state
+                cells: cell index to look at
+    @ return:   bitmask of depth
+    '''
+    def explain(self,state,cells):
+        mask = 0
+        for y in cells:
+            if state[divmod(y,self.cols)] != 0:
+                mask |= self.deps[y]
+        return mask
+
+    '''
+    @ function: cells of one color, a BitBoard state does not compare
+                elementwise
+    @ param:    state: current state
+                color: color value
+    @ return:   Array of cell index
+    '''
+    def cells_of(self,state,color):
+        if isinstance(state,np.ndarray):
+            return np.flatnonzero(state == color).tolist()
+        return [x for x in range(len(self.dom)) if state[divmod(x,self.cols)] == color]
+
+    '''
+    @ function: decision depths behind the options of an empty cell, its
+                colored neighbors and the finished colors it lost
+    @ param:    state: current state
+                x: cell index
+    @ return:   bitmask of depth
+    '''
+    def reason(self,state,x):
+        mask = self.explain(state,self.table[x])
+        lost = self.dom[x] & self.done
+        for v in self.value:
+            if lost & self.bit[v]:
+                mask |= self.done_deps[v]
+        return mask
+
+    '''
+    @ function: decisions at some depths
+    @ param:    mask: bitmask of depth
+    @ return:   Array of (cell index,color value)
+    '''
+    def literals(self,mask):
+        return [self.decision[depth] for depth in range(mask.bit_length()) if mask & (1 << depth)]
+
+    def neighbor(self,x):
+        return self.table[x]
+
+    '''
+    @ function: domain of an empty cell from its neighbors. With one empty
+                neighbor at least one same color neighbor must already be
+                there, with none both must be.
+    @ param:    state: current state
+                x: cell index
+    @ return:   bitset of possible color
+    '''
+    def domain_of(self,state,x):
+        empty = 0
+        count = {}
+        for y in self.neighbor(x):
+            color = int(state[divmod(y,self.cols)])
+            if color == 0:
+                empty += 1
+            else:
+                count[color] = count.get(color,0)+1
+        if empty >= 2:
+            return self.full
+        output = 0
+        for color,n in count.items():
+            if (n >= 2-empty) and (color in self.bit):
+                output |= self.bit[color]
+        return output
+
+    '''
+    @ function: colors still allowed in a cell
+    @ param:    x: cell index
+    @ return:   bitset of color
+    '''
+    def options(self,x):
+        return self.dom[x] & ~self.done
+
+    '''
+    @ function: values of a bitset in puzzle order
+    @ param:    bits: bitset of color
+    @ return:   Array of color value
+    '''
+    def colors(self,bits):
+        return [v for v in self.value if bits & self.bit[v]]
+
+    def size(self,x):
+        return bin(self.dom[x] & ~self.done).count('1')
+
+    '''
+    @ function: heap key of a cell, smaller domains first, then fewer empty
+                neighbors, then the lower cell index. A cell with two empty
+                neighbors has the full domain and is keyed with every color:
+                it ranks after any narrower cell of its real size all the
+                same, and a finished color does not have to rekey it.
+    @ param:    state: current state
+                x: cell index
+    @ return:   integer key, None when the cell is colored or has no
+                colored neighbor
+    '''
+    def rank(self,state,x):
+        empty = self.free[x]
+        if (empty == len(self.table[x])) or (state[divmod(x,self.cols)] != 0):
+            return None
+        if empty >= 2:
+            size = len(self.value)
+        else:
+            size = bin(self.dom[x] & ~self.done).count('1')
+        return ((size*5)+empty)*len(self.dom)+x
+
+    '''
+    @ function: rekey a cell and its neighbors after the cell changed color
+    @ param:    state: current state
+                x: cell index
+    @ return:   none
+    '''
+    def touch(self,state,x):
+        self.order.update(x,self.rank(state,x))
+        for y in self.table[x]:
+            self.order.update(y,self.rank(state,y))
+
+    '''
+    @ function: file a cell under the colors of its domain after its domain
+                or its empty neighbors changed
+    @ param:    x: cell index
+    @ return:   none
+    '''
+    def file(self,x):
+        bits = self.dom[x] if self.dom[x] != self.full else 0
+        change = bits ^ self.filed[x]
+        while change:
+            low = change & -change
+            if bits & low:
+                self.holds[low.bit_length()-1].add(x)
+            else:
+                self.holds[low.bit_length()-1].discard(x)
+            change ^= low
+        self.filed[x] = bits
+        if (bits == 0) and (self.dom[x] != 0) and (self.free[x] < 2):
+            self.loose.add(x)
+        else:
+            self.loose.discard(x)
+
+    '''
+    @ function: cells whose domain may hold some colors
+    @ param:    bits: bitset of color
+    @ return:   Set of cell index
+    '''
+    def holding(self,bits):
+        cells = set(self.loose)
+        while bits:
+            low = bits & -bits
+            cells.update(self.holds[low.bit_length()-1])
+            bits ^= low
+        return cells
+
+    '''
+    @ function: rekey the heap cells whose domain holds a color that was
+                just finished or undone
+    @ param:    state: current state
+                bits: bitset of color
+    @ return:   none
+    '''
+    def recount(self,state,bits):
+        for x in self.holding(bits):
+            if (x in self.order) and (self.free[x] < 2) and (self.dom[x] & bits):
+                self.order.update(x,self.rank(state,x))
+
+    '''
+    @ function: key every cell from scratch
+    @ param:    state: current state
+    @ return:   none
+    '''
+    def rebuild(self,state):
+        keys = {}
+        for x in range(len(self.dom)):
+            key = self.rank(state,x)
+            if key is not None:
+                keys[x] = key
+        self.order.build(keys)
+
+    '''
+    @ function: empty cell next to a flow with the smallest domain
+    @ return:   cell index, None when no cell is left
+    '''
+    def select(self):
+        return self.order.top()
+
+    def mark(self):
+        return len(self.trail)
+
+    '''
+    @ function: undo every change made after a mark
+    @ param:    state: current state
+                mark: trail length returned by mark()
+    @ return:   none
+    '''
+    def undo(self,state,mark):
+        if len(self.trail) <= mark:
+            return
+        changed = set()
+        done = self.done
+        while len(self.trail) > mark:
+            x,old,assigned = self.trail.pop()
+            if x < 0:
+                self.done = old
+                continue
+            self.dom[x] = old
+            changed.add(x)
+            if assigned:
+                state[divmod(x,self.cols)] = 0
+                for y in self.table[x]:
+                    self.free[y] += 1
+                changed.update(self.table[x])
+        for x in changed:
+            self.file(x)
+            self.order.update(x,self.rank(state,x))
+        if self.done != done:
+            self.recount(state,self.done ^ done)
+
+    '''
+    @ function: color an empty cell and keep the old domain on the trail
+    @ param:    state: current state
+                x: cell index
+                color: color value
+                deps: decision depths the color follows from
+    @ return:   none
+    '''
+    def assign(self,state,x,color,deps=0):
+        self.trail.append((x,self.dom[x],True))
+        self.dom[x] = 0
+        state[divmod(x,self.cols)] = color
+        self.file(x)
+        for y in self.table[x]:
+            self.free[y] -= 1
+            self.file(y)
+        self.touch(state,x)
+        if self.deps is not None:
+            self.deps[x] = deps
+
+    '''
+    @ function: color a cell as the search decision at a depth
+    @ param:    state: current state
+                x: cell index
+                color: color value
+                depth: search depth
+    @ return:   none
+    '''
+    def decide(self,state,x,color,depth):
+        if self.deps is not None:
+            self.decision[depth] = (x,int(color))
+        self.assign(state,x,color,1 << depth)
+
+    '''
+    @ function: assign cells to a fixpoint after some cells changed: empty
+                cells with a single color left take it, and flow ends with
+                one empty neighbor extend into it as forced_iter does
+    @ param:    state: current state
+                uf: UnionFind of the state, linked along with every assignment
+                changed: Array of cell index that were just colored
+    @ return:   Array of cell index colored here, None when a domain runs empty
+    '''
+    def propagate(self,state,uf,changed):
+        assigned = []
+        queue = deque(changed)
+        while queue:
+            x = queue.popleft()
+            color = int(state[divmod(x,self.cols)])
+            uf.link(state,divmod(x,self.cols))
+            if (color in self.pair) and not (self.done & self.bit[color]):
+                if uf.connected(*self.pair[color]):
+                    self.trail.append((-1,self.done,False))
+                    self.done |= self.bit[color]
+                    self.recount(state,self.bit[color])
+                    if self.deps is not None:
+                        self.done_deps[color] = self.explain(state,self.cells_of(state,color))
+                    # the domains that held the color lost it, a full one
+                    # only matters once a single color is left
+                    if bin(self.full & ~self.done).count('1') <= 1:
+                        cells = range(len(self.dom))
+                    else:
+                        cells = sorted(self.holding(self.bit[color]))
+                    if not self.settle(state,cells,assigned,queue):
+                        return None
+
+            for y in self.neighbor(x):
+                if state[divmod(y,self.cols)] == 0:
+                    old = self.dom[y]
+                    self.dom[y] = self.domain_of(state,y)
+                    if self.dom[y] != old:
+                        self.trail.append((y,old,False))
+                        self.file(y)
+                        self.order.update(y,self.rank(state,y))
+            if not self.settle(state,self.neighbor(x),assigned,queue):
+                return None
+
+            # flow ends next to x may have one way left to go
+            for z in [x]+self.neighbor(x):
+                move = self.forced(state,z)
+                if move is None:
+                    continue
+                deps = 0
+                if self.deps is not None:
+                    deps = self.explain(state,[z]+self.table[z])
+                if not (self.options(move) & self.bit.get(int(state[divmod(z,self.cols)]),0)):
+                    if self.deps is not None:
+                        self.conflict = deps | self.reason(state,move)
+                    return None
+                self.assign(state,move,state[divmod(z,self.cols)],deps)
+                assigned.append(move)
+                queue.append(move)
+        return assigned
+
+    '''
+    @ function: assign empty cells whose domain holds a single color
+    @ param:    state: current state
+                cells: cell index to look at
+                assigned: Array of cell index colored so far
+                queue: cells waiting for propagation
+    @ return:   False when a domain is empty
+    '''
+    def settle(self,state,cells,assigned,queue):
+        for y in cells:
+            if state[divmod(y,self.cols)] != 0:
+                continue
+            bits = self.options(y)
+            if bits == 0:
+                if self.deps is not None:
+                    self.conflict = self.reason(state,y)
+                return False
+            if bits & (bits-1) == 0:
+                self.assign(state,y,self.value[bits.bit_length()-1],0 if self.deps is None else self.reason(state,y))
+                assigned.append(y)
+                queue.append(y)
+        return True
+
+    '''
+    @ function: empty cell a flow end must extend into, it is a source
+                without a same color neighbor or a path cell with one, and
+                has a single empty neighbor
+    @ param:    state: current state
+                z: cell index
+    @ return:   cell index, None when nothing is forced
+    '''
+    def forced(self,state,z):
+        color = state[divmod(z,self.cols)]
+        if color == 0:
+            return None
+        empty = []
+        same = 0
+        for y in self.neighbor(z):
+            if state[divmod(y,self.cols)] == 0:
+                empty.append(y)
+            elif state[divmod(y,self.cols)] == color:
+                same += 1
+        if len(empty) != 1:
+            return None
+        if self.start_state[divmod(z,self.cols)] != 0:
+            return empty[0] if same == 0 else None
+        return empty[0] if same == 1 else None
@@ -1,8 +1,12 @@
 import numpy as np
+import sys
 import time
 import math
 import copy
 import random
+import kernels
+from adjacency import adjacency
+from zobrist import TranspositionTable
 
 
 def read_puzzles(textPuzzles):
@@ -53,85 +57,29 @@ def build_Start_State(rawPuzzle):
 
 #########################################
 def neighbour(location,state):
-    output = []
-    if location[0]>0:
-        output.append(state[location[0]-1,location[1]])
-
-    if location[0]<state.shape[1]-1:
-        output.append(state[location[0]+1,location[1]])
-
-    if location[1]>0:
-        output.append(state[location[0],location[1]-1])
-
-    if location[1]<state.shape[0]-1:
-        output.append(state[location[0],location[1]+1])
-
-    return output
+    adj = adjacency(state.shape[0],state.shape[1])
+    return [state[loc[0],loc[1]] for loc in adj.pos[location[0]*adj.cols+location[1]]]
 
 def find_neighbor(state,cur):
-    row = cur[0]
-    col = cur[1]
     zero = []
     nonzero = []
-    # bottom neighbor
-    if row < state.shape[0]-1:
-        if state[row+1,col] != 0:
+    adj = adjacency(state.shape[0],state.shape[1])
+    for loc in adj.pos[cur[0]*adj.cols+cur[1]]:
+        color = state[loc[0],loc[1]]
+        if color != 0:
             # [color]
-            nonzero.append(state[row+1,col])
+            nonzero.append(color)
         else:
             # [row,col]
-            zero.append([row+1,col])
-    # top neighbor
-    if row > 0:
-        if state[row-1,col] != 0:
-            nonzero.append(state[row-1,col])
-        else:
-            zero.append([row-1,col])
-    # right neighbor
-    if col < state.shape[1]-1:
-        if state[row,col+1] != 0:
-            nonzero.append(state[row,col+1])
-        else:
-            zero.append([row,col+1])
-    # left neighbor
-    if col > 0:
-        if state[row,col-1] != 0:
-            nonzero.append(state[row,col-1])
-        else:
-            zero.append([row,col-1])    
+            zero.append(loc)
     return zero,nonzero
 
 ############################################
 
 def is_consistent_dumb(state,start_state,source):
-    for i in range(state.shape[0]):
-        for j in range(state.shape[1]):
-            cur = state[i,j]
-            zero,nonzero = find_neighbor(state,[i,j])
-            color,count = np.unique(nonzero,return_counts=True)
-            num = len(zero)+len(nonzero)
-
-            # check assigned variable
-            if cur != 0:
-                if(len(zero)==0) and (cur not in color):
-                        return False
-                # check path zig-zag
-                if start_state[i,j] == 0:
-                    if count[color==cur] > 2:
-                        return False
-                # check source zig-zag
-                else:
-                    if count[color==cur] > 1:
-                        return False
-            # check unassigned variable            
-            else:
-                if(len(zero)==0):
-                    if(len(color)==num):
-                        return False
-                    temp = color[count>2]
-                    if len(temp) > 0:
-                        return False
-    return True
+    global check_counter
+    check_counter += 1
+    return kernels.check_grid(state,start_state,strict=False)
 
 
 def is_complete_dumb(state,start_state):
@@ -140,23 +88,7 @@ def is_complete_dumb(state,start_state):
     1: not complete with complete assignment
     2: complete
     '''
-    # check unassigned variable
-    if 0 in state:
-        return 0
-    # check color path
-    for row in range(state.shape[0]):
-        for col in range(state.shape[0]):
-            neighbor = neighbour([row,col],state)
-            color,count = np.unique(neighbor,return_counts=True)
-            # check path
-            if start_state[row,col] == 0:
-                if count[color==state[row,col]] != 2:
-                    return 1
-            # check source
-            else:
-                if count[color==start_state[row,col]] != 1:
-                    return 1
-    return 2
+    return kernels.complete_grid(state,start_state)
 
 
 def select_variable_dumb(state,value):
@@ -173,36 +105,35 @@ def select_variable_dumb(state,value):
             color.remove(0)
             for i in value:
                 if i not in color:
-                    idx = random.randint(0,len(color)-1)
+                    idx = rand.randint(0,len(color)-1)
                     color.insert(idx,i)
         output.append([var[0],var[1],color])
-    idx = random.randint(0,len(output)-1)
+    idx = rand.randint(0,len(output)-1)
     return output[idx]
 
 def select_value_dumb(state,var):
     return var[2]
 
 
-def recursive_backtrack_dumb(state,start_state,source,value,visit):
+def recursive_backtrack_dumb(state,start_state,source,value,visit,key=None,depth=0):
     global bt_counter
     check = is_complete_dumb(state,start_state)
     if check==1 or check==2:
         return state,check
-    # print(state)
+    if key is None:
+        key = visit.hash(state)
     var = select_variable_dumb(state,value)
-    # print(var)
     for val in select_value_dumb(state,var):
-        # print("var",var,"val",val)
-        state[var[0],var[1]] = val
-        record = state.tostring()
-        if record not in visit:
-            visit.add(record)
-        else:
+        # looked up before the cell is written, so a skipped value leaves
+        # the cell empty
+        record = visit.toggle(key,var[0],var[1],val)
+        snapshot = visit.snapshot(state,var[0],var[1],val)
+        if visit.seen(record,snapshot):
             continue
-        # print("in")
-        # print(state)
+        visit.add(record,depth,snapshot)
+        state[var[0],var[1]] = val
         if is_consistent_dumb(state,start_state,source):
-            result,status = recursive_backtrack_dumb(state,start_state,source,value,visit)
+            result,status = recursive_backtrack_dumb(state,start_state,source,value,visit,record,depth+1)
             bt_counter += 1
             if status==2:
                 return result,2
@@ -210,19 +141,26 @@ def recursive_backtrack_dumb(state,start_state,source,value,visit):
     return None,4
 
 ################################
-puzzle = read_puzzles("input77.txt")
-start_state,source,value = build_Start_State(puzzle)
-bt_counter = 0
 
-source = sorted(source,key=lambda list:list[2])
-visit = set()
-state = copy.deepcopy(start_state)
-
-print_puzzles(puzzle)
-print("Start State")
-print(state,'\n')
-start_time = time.time()
-solution,status = recursive_backtrack_dumb(state,start_state,source,value,visit)
-print_solution(solution)
-print("Time used:",time.time()-start_time)
-print("Total iteration:",bt_counter)
\ No newline at end of file
+bt_counter = 0
+check_counter = 0
+# random choices of select_variable_dumb, seed it for reproducible runs
+rand = random.Random()
+
+if __name__ == "__main__":
+    puzzle = read_puzzles(sys.argv[1] if len(sys.argv) > 1 else "input77.txt")
+    start_state,source,value = build_Start_State(puzzle)
+
+    source = sorted(source,key=lambda list:list[2])
+    visit = TranspositionTable()
+    state = copy.deepcopy(start_state)
+
+    print_puzzles(puzzle)
+    print("Start State")
+    print(state,'\n')
+    start_time = time.time()
+    solution,status = recursive_backtrack_dumb(state,start_state,source,value,visit)
+    print_solution(solution)
+    print("Time used:",time.time()-start_time)
+    print("Total iteration:",bt_counter)
+    print("Visited states:",visit.stats())
@@ -0,0 +1,241 @@
+import os
+import numpy as np
+from copy import deepcopy
+
+import dumb
+import smart
+import smarter
+import sat
+import iterative
+import parallel
+from nogood import NogoodStore
+from zobrist import TranspositionTable
+
+
+# conflicts allowed to the SAT backend, None for no limit
+sat_budget = None
+
+
+class OutOfBudget(Exception):
+    pass
+
+
+'''
+@ function: load a puzzle file into the start state
+@ param:    path: txt file path
+@ return:   start_state: Matrix of puzzle with character stored as number
+            source: Array of color sources sorted by color
+            value: Array of color value in puzzle
+'''
+def load_puzzle(path):
+    puzzle = smarter.read_puzzles(path)
+    start_state,source,value = smarter.build_Start_State(puzzle)
+    source = sorted(source,key=lambda list:list[2])
+    return start_state,source,value
+
+
+'''
+@ function: run dumb.py random backtracking
+@ param:    start_state: initial state
+            source: Array of color source
+            value: Array of color value
+            visit: TranspositionTable to use, None for a new one
+@ return:   solution: matrix of solution or None
+            nodes: number of expanded nodes
+'''
+def run_dumb(start_state,source,value,visit=None):
+    reset('dumb')
+    state = deepcopy(start_state)
+    solution,status = dumb.recursive_backtrack_dumb(state,start_state,source,value,TranspositionTable() if visit is None else visit)
+    if status != 2:
+        solution = None
+    return solution,dumb.bt_counter
+
+
+'''
+@ function: run smart.py backtracking
+@ param:    start_state: initial state
+            source: Array of color source
+            value: Array of color value
+            visit: TranspositionTable to use, None for a new one
+@ return:   solution: matrix of solution or None
+            nodes: number of expanded nodes
+'''
+def run_smart(start_state,source,value,visit=None):
+    reset('smart')
+    state = deepcopy(start_state)
+    solution = smart.recursive_backtrack(state,start_state,source,value,TranspositionTable() if visit is None else visit)
+    return solution,smart.bt_counter
+
+
+'''
+@ function: run smarter.py forward checking backtracking
+@ param:    start_state: initial state
+            source: Array of color source
+            value: Array of color value
+            visit: TranspositionTable to use, None for a new one
+@ return:   solution: matrix of solution or None
+            nodes: number of expanded nodes
+'''
+def run_smarter(start_state,source,value,visit=None):
+    reset('smarter')
+    if smarter.use_backjump:
+        smarter.nogoods = NogoodStore()
+    state = smarter.forced_move(deepcopy(start_state),source)
+    solution = smarter.recursive_backtrack(state,start_state,source,value,TranspositionTable() if visit is None else visit)
+    return solution,smarter.bt_counter
+
+
+'''
+@ function: run smarter.py path-head search
+@ param:    start_state: initial state
+            source: Array of color source
+            value: Array of color value
+            visit: TranspositionTable to use, None for a new one
+@ return:   solution: matrix of solution or None
+            nodes: number of expanded nodes
+'''
+def run_head(start_state,source,value,visit=None):
+    reset('head')
+    state = smarter.forced_move(deepcopy(start_state),source)
+    solution = smarter.head_backtrack(state,start_state,source,TranspositionTable() if visit is None else visit)
+    return solution,smarter.bt_counter
+
+
+'''
+@ function: run smarter.py search on an explicit stack
+@ param:    start_state: initial state
+            source: Array of color source
+            value: Array of color value
+            visit: TranspositionTable to use, None for a new one
+@ return:   solution: matrix of solution or None
+            nodes: number of expanded nodes
+'''
+def run_iterative(start_state,source,value,visit=None):
+    reset('iterative')
+    search = iterative.Search(start_state,source,value,visit)
+    search.run()
+    return search.solution,search.nodes
+
+
+'''
+@ function: run the iterative search for a while, picking up from a
+            checkpoint file if there is one and leaving one behind if the
+            time runs out
+@ param:    path: puzzle file path
+            checkpoint: checkpoint file path
+            seconds: time allowed in this run, None for no limit
+@ return:   solution: matrix of solution or None
+            nodes: number of expanded nodes over every run
+            status: 'solved', 'unsat' or 'paused'
+'''
+def resume_iterative(path,checkpoint,seconds=None):
+    reset('iterative')
+    if os.path.exists(checkpoint):
+        search = iterative.Search.load(checkpoint)
+    else:
+        search = iterative.Search(*load_puzzle(path))
+    status = search.run(None,seconds)
+    if status == 'paused':
+        search.save(checkpoint)
+    elif os.path.exists(checkpoint):
+        os.remove(checkpoint)
+    return search.solution,search.nodes,status
+
+
+'''
+@ function: run smarter.py search over a pool of worker processes
+@ param:    start_state: initial state
+            source: Array of color source
+            value: Array of color value
+@ return:   solution: matrix of solution or None
+            nodes: number of expanded nodes over all workers
+'''
+def run_parallel(start_state,source,value):
+    reset('parallel')
+    solution,smarter.bt_counter = parallel.parallel_search(start_state,source,value)
+    return solution,smarter.bt_counter
+
+
+'''
+@ function: run the SAT backend
+@ param:    start_state: initial state
+            source: Array of color source
+            value: Array of color value
+@ return:   solution: matrix of solution or None, None only when the
+                      puzzle has no solution
+            nodes: number of decisions
+'''
+def run_sat(start_state,source,value):
+    solution,solver,status = sat.solve_sat(start_state,source,value,budget=sat_budget)
+    if status == 'budget':
+        # running out of conflicts proves nothing, report it like a timeout
+        raise OutOfBudget()
+    return solution,solver.decisions
+
+
+'''
+@ function: module holding the counters of an engine
+@ param:    engine: engine name
+@ return:   module or None
+'''
+def engine_module(engine):
+    return {'dumb':dumb,'smart':smart,'smarter':smarter,'head':smarter,'iterative':smarter,'parallel':smarter}.get(engine)
+
+
+'''
+@ function: reset the global counters of an engine and seed its random choices
+@ param:    engine: engine name
+            seed: random seed, None to leave the generator alone
+@ return:   none
+'''
+def reset(engine,seed=None):
+    module = engine_module(engine)
+    if module is not None:
+        module.bt_counter = 0
+        module.check_counter = 0
+        if hasattr(module,'prune_counter'):
+            for rule in module.prune_counter:
+                module.prune_counter[rule] = 0
+        if hasattr(module,'nogoods'):
+            # nogoods only hold for the puzzle they were learned on
+            module.nogoods = None
+    if seed is not None:
+        dumb.rand.seed(seed)
+
+
+'''
+@ function: counters of an engine so far, also valid for interrupted solves
+@ param:    engine: engine name
+@ return:   dictionary of expanded nodes, consistency checks and states
+            rejected by each prune rule
+'''
+def counters(engine):
+    module = engine_module(engine)
+    if module is None:
+        return {'nodes':0,'checks':0,'prunes':{}}
+    return {'nodes':module.bt_counter,'checks':module.check_counter,
+            'prunes':dict(getattr(module,'prune_counter',{}))}
+
+
+ENGINE = {
+    'dumb': run_dumb,
+    'smart': run_smart,
+    'smarter': run_smarter,
+    'head': run_head,
+    'iterative': run_iterative,
+    'parallel': run_parallel,
+    'sat': run_sat,
+}
+
+
+'''
+@ function: convert a solution matrix into printable rows
+@ param:    solution: matrix of solution
+@ return:   Array of row string
+'''
+def solution_rows(solution):
+    if solution is None:
+        return None
+    solution = np.asarray(solution)
+    return [''.join(chr(x) for x in row) for row in solution]
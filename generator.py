@@ -0,0 +1,298 @@
+import argparse
+import os
+import random
+import string
+import sys
+
+import numpy as np
+
+import sat
+
+
+# source characters, '_' is the empty cell
+ALPHABET = string.ascii_uppercase+string.ascii_lowercase+string.digits+string.punctuation.replace('_','')
+
+# board sizes of the graded corpus
+CORPUS = [5,6,7,8,9,10,12,14,16,18,20,22,25,28,30]
+
+
+'''
+@ function: neighbors of a cell inside the board
+@ param:    cell: (row,col)
+            rows: number of rows
+            cols: number of columns
+@ return:   Array of neighbor cell
+'''
+def neighbor(cell,rows,cols):
+    output = []
+    for dr,dc in ((-1,0),(1,0),(0,-1),(0,1)):
+        if (0 <= cell[0]+dr < rows) and (0 <= cell[1]+dc < cols):
+            output.append((cell[0]+dr,cell[1]+dc))
+    return output
+
+
+'''
+@ function: random Hamiltonian path by backbite moves on a zigzag path
+@ param:    rows: number of rows
+            cols: number of columns
+            rng: random generator
+            twist: backbite moves per cell, more moves give a more winding path
+@ return:   Array of cell in path order
+'''
+def random_path(rows,cols,rng,twist):
+    path = [(row,col if row%2 == 0 else cols-1-col) for row in range(rows) for col in range(cols)]
+    if len(path) < 2:
+        return path
+    pos = {cell:i for i,cell in enumerate(path)}
+    last = len(path)-1
+    for _ in range(int(rows*cols*twist)):
+        # link an end to one of its neighbors and reverse the loop that forms
+        if rng.random() < 0.5:
+            i = pos[rng.choice(neighbor(path[0],rows,cols))]
+            if i == 1:
+                continue
+            path[:i] = path[i-1::-1]
+            span = range(i)
+        else:
+            i = pos[rng.choice(neighbor(path[last],rows,cols))]
+            if i == last-1:
+                continue
+            path[i+1:] = path[:i:-1]
+            span = range(i+1,last+1)
+        for j in span:
+            pos[path[j]] = j
+    return path
+
+
+'''
+@ function: cut a path into flows that never touch themselves
+@ param:    path: Array of cell in path order
+            rows: number of rows
+            cols: number of columns
+@ return:   Array of flow, each an Array of cell
+'''
+def cut_path(path,rows,cols):
+    output = []
+    cur = []
+    member = set()
+    for cell in path:
+        # a flow touching itself would leave a cell with three same color neighbors
+        touch = [n for n in neighbor(cell,rows,cols) if (n in member) and (n != cur[-1])]
+        if len(touch) > 0:
+            output.append(cur)
+            cur = []
+            member = set()
+        cur.append(cell)
+        member.add(cell)
+    output.append(cur)
+    return output
+
+
+'''
+@ function: join flows whose ends are adjacent while the joined flow stays
+            free of self contact
+@ param:    flows: Array of flow
+            rows: number of rows
+            cols: number of columns
+            rng: random generator
+@ return:   Array of flow
+'''
+def merge_flows(flows,rows,cols,rng):
+    flows = {i:flow for i,flow in enumerate(flows)}
+    owner = {}
+    for i,flow in flows.items():
+        for cell in flow:
+            owner[cell] = i
+
+    changed = True
+    while changed:
+        changed = False
+        order = list(flows)
+        rng.shuffle(order)
+        for i in order:
+            if i not in flows:
+                continue
+            for end in (flows[i][0],flows[i][-1]):
+                choice = [n for n in neighbor(end,rows,cols) if (owner[n] != i) and (n in (flows[owner[n]][0],flows[owner[n]][-1]))]
+                rng.shuffle(choice)
+                for n in choice:
+                    j = owner[n]
+                    # the two ends must be the only contact between the flows
+                    contact = 0
+                    for cell in flows[j]:
+                        contact += len([m for m in neighbor(cell,rows,cols) if owner[m] == i])
+                    if contact != 1:
+                        continue
+                    head = flows[i] if flows[i][-1] == end else flows[i][::-1]
+                    tail = flows[j] if flows[j][0] == n else flows[j][::-1]
+                    flows[i] = head+tail
+                    for cell in tail:
+                        owner[cell] = i
+                    del flows[j]
+                    changed = True
+                    break
+                if changed:
+                    break
+    return list(flows.values())
+
+
+'''
+@ function: split the longest flows until there are enough colors
+@ param:    flows: Array of flow
+            colors: number of colors wanted
+            rng: random generator
+            min_length: shortest flow allowed
+@ return:   Array of flow, or None when no flow is long enough to split
+'''
+def split_flows(flows,colors,rng,min_length=3):
+    flows = list(flows)
+    while len(flows) < colors:
+        flows.sort(key=len)
+        flow = flows.pop()
+        if len(flow) < 2*min_length:
+            return None
+        i = rng.randint(min_length,len(flow)-min_length)
+        flows += [flow[:i],flow[i:]]
+    return flows
+
+
+'''
+@ function: puzzle rows with the two ends of every flow as sources
+@ param:    flows: Array of flow
+            rows: number of rows
+            cols: number of columns
+@ return:   puzzle: Array of row string
+            solution: Array of row string
+'''
+def plant(flows,rows,cols):
+    puzzle = [['_']*cols for _ in range(rows)]
+    solution = [['_']*cols for _ in range(rows)]
+    for i,flow in enumerate(flows):
+        for cell in flow:
+            solution[cell[0]][cell[1]] = ALPHABET[i]
+        for cell in (flow[0],flow[-1]):
+            puzzle[cell[0]][cell[1]] = ALPHABET[i]
+    return [''.join(x) for x in puzzle],[''.join(x) for x in solution]
+
+
+'''
+@ function: check that a puzzle has exactly one solution
+@ param:    puzzle: Array of row string
+            budget: conflict budget of each SAT solve, None for no limit
+@ return:   True when unique, False when not unique or undecided in budget
+'''
+def is_unique(puzzle,budget=None):
+    raw = np.asarray([list(x) for x in puzzle])
+    start_state,source,value = sat.build_Start_State(raw)
+    return sat.count_solutions(start_state,source,value,2,budget) == 1
+
+
+'''
+@ function: generate a solvable puzzle
+@ param:    rows: number of rows
+            cols: number of columns
+            colors: number of colors, None to keep what the random paths need
+            seed: random seed, None for a random puzzle
+            unique: only accept puzzles with exactly one solution
+            attempts: random paths tried before giving up
+            budget: conflict budget of each uniqueness check
+@ return:   puzzle: Array of row string in read_puzzles format
+            solution: Array of row string of the planted solution
+'''
+def generate(rows,cols,colors=None,seed=None,unique=False,attempts=500,budget=20000):
+    if (colors is not None) and not (1 <= colors <= len(ALPHABET)):
+        raise ValueError("colors must be between 1 and %d" % len(ALPHABET))
+    if rows*cols < 3:
+        raise ValueError("board too small")
+    rng = random.Random(seed)
+    twist = 5.0
+    for attempt in range(attempts):
+        path = random_path(rows,cols,rng,twist)
+        flows = merge_flows(cut_path(path,rows,cols),rows,cols,rng)
+        if (len(flows) > len(ALPHABET)) or ((colors is not None) and (len(flows) > colors)):
+            # straighter paths need fewer cuts
+            twist *= 0.8
+            continue
+        if colors is not None:
+            flows = split_flows(flows,colors,rng)
+            if flows is None:
+                continue
+        if min([len(flow) for flow in flows]) < 3:
+            continue
+        rng.shuffle(flows)
+        puzzle,solution = plant(flows,rows,cols)
+        if unique and not is_unique(puzzle,budget):
+            continue
+        return puzzle,solution
+    raise ValueError("no %dx%d puzzle with %s colors found in %d attempts" % (rows,cols,colors,attempts))
+
+
+'''
+@ function: write a puzzle file
+@ param:    path: txt file path
+            puzzle: Array of row string
+@ return:   none
+'''
+def write_puzzle(path,puzzle):
+    file = open(path,'w')
+    file.write('\n'.join(puzzle)+'\n')
+    file.close()
+
+
+'''
+@ function: write a graded corpus of square puzzles
+@ param:    directory: output directory
+            sizes: Array of board size
+            count: puzzles per size
+            seed: base random seed
+            unique: only accept puzzles with exactly one solution
+@ return:   Array of written file path
+'''
+def build_corpus(directory,sizes=CORPUS,count=1,seed=0,unique=False):
+    if not os.path.isdir(directory):
+        os.makedirs(directory)
+    output = []
+    for size in sizes:
+        for i in range(count):
+            puzzle,_ = generate(size,size,None,seed*100000+size*100+i,unique)
+            path = os.path.join(directory,"gen_%02dx%02d_%d.txt" % (size,size,i))
+            write_puzzle(path,puzzle)
+            output.append(path)
+    return output
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Generate solvable Flow puzzles.")
+    parser.add_argument('rows',type=int,nargs='?',help="board height")
+    parser.add_argument('cols',type=int,nargs='?',help="board width (default: same as rows)")
+    parser.add_argument('-c','--colors',type=int,default=None,help="number of colors (default: what the paths need)")
+    parser.add_argument('-s','--seed',type=int,default=None,help="random seed")
+    parser.add_argument('-u','--unique',action='store_true',help="only emit puzzles with a unique solution")
+    parser.add_argument('-o','--output',default=None,help="write the puzzle here instead of stdout")
+    parser.add_argument('--solution',action='store_true',help="also print the planted solution to stderr")
+    parser.add_argument('--corpus',default=None,help="write a graded 5x5 to 30x30 corpus into this directory")
+    parser.add_argument('--count',type=int,default=1,help="puzzles per size in the corpus")
+    args = parser.parse_args(argv)
+
+    if args.corpus is not None:
+        seed = 0 if args.seed is None else args.seed
+        for path in build_corpus(args.corpus,CORPUS,args.count,seed,args.unique):
+            print(path)
+        return
+    if args.rows is None:
+        parser.error("rows is required without --corpus")
+    cols = args.rows if args.cols is None else args.cols
+    try:
+        puzzle,solution = generate(args.rows,cols,args.colors,args.seed,args.unique)
+    except ValueError as error:
+        parser.error(str(error))
+    if args.output is not None:
+        write_puzzle(args.output,puzzle)
+    else:
+        print('\n'.join(puzzle))
+    if args.solution:
+        print('\n'.join(solution),file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
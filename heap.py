@@ -0,0 +1,123 @@
+'''
+@ class:    binary min-heap of cell index with a position index, so the key
+            of any cell can change or the cell can leave in O(log n).
+            Integer keys distinct per cell make the top the same whatever
+            order the changes came in.
+@ param:    size: number of cells
+'''
+class IndexedHeap:
+    def __init__(self,size):
+        self.heap = []
+        # position of every cell in heap, -1 when it is not there
+        self.pos = [-1]*size
+        self.key = [0]*size
+
+    def __len__(self):
+        return len(self.heap)
+
+    def __contains__(self,x):
+        return self.pos[x] >= 0
+
+    '''
+    @ function: cell with the smallest key
+    @ return:   cell index, None when the heap is empty
+    '''
+    def top(self):
+        return self.heap[0] if self.heap else None
+
+    '''
+    @ function: make room for more cells
+    @ param:    size: number of cells
+    @ return:   none
+    '''
+    def grow(self,size):
+        if size > len(self.pos):
+            self.pos.extend([-1]*(size-len(self.pos)))
+            self.key.extend([0]*(size-len(self.key)))
+
+    '''
+    @ function: build the heap from scratch
+    @ param:    keys: dictionary of cell index to key
+    @ return:   none
+    '''
+    def build(self,keys):
+        for x in self.heap:
+            self.pos[x] = -1
+        self.heap = sorted(keys,key=lambda x:keys[x])
+        for i,x in enumerate(self.heap):
+            self.pos[x] = i
+            self.key[x] = keys[x]
+
+    '''
+    @ function: put a cell in with a key or move it to a new key
+    @ param:    x: cell index
+                key: integer key, None takes the cell out
+    @ return:   none
+    '''
+    def update(self,x,key):
+        if key is None:
+            self.remove(x)
+            return
+        i = self.pos[x]
+        if i < 0:
+            self.key[x] = key
+            self.pos[x] = len(self.heap)
+            self.heap.append(x)
+            self.sift_up(len(self.heap)-1)
+            return
+        old = self.key[x]
+        if key == old:
+            return
+        self.key[x] = key
+        if key < old:
+            self.sift_up(i)
+        else:
+            self.sift_down(i)
+
+    def remove(self,x):
+        i = self.pos[x]
+        if i < 0:
+            return
+        self.pos[x] = -1
+        last = self.heap.pop()
+        if i == len(self.heap):
+            return
+        self.heap[i] = last
+        self.pos[last] = i
+        if self.key[last] < self.key[x]:
+            self.sift_up(i)
+        else:
+            self.sift_down(i)
+
+    def sift_up(self,i):
+        heap,pos,key = self.heap,self.pos,self.key
+        x = heap[i]
+        while i > 0:
+            parent = (i-1) >> 1
+            y = heap[parent]
+            if key[y] <= key[x]:
+                break
+            heap[i] = y
+            pos[y] = i
+            i = parent
+        heap[i] = x
+        pos[x] = i
+
+    def sift_down(self,i):
+        heap,pos,key = self.heap,self.pos,self.key
+        n = len(heap)
+        x = heap[i]
+        while True:
+            child = 2*i+1
+            if child >= n:
+                break
+            if (child+1 < n) and (key[heap[child+1]] < key[heap[child]]):
+                child += 1
+            y = heap[child]
+            if key[x] <= key[y]:
+                break
+            heap[i] = y
+            pos[y] = i
+            i = child
+        heap[i] = x
+        pos[x] = i
@@ -0,0 +1,304 @@
+import argparse
+import json
+import sys
+import time
+import zlib
+
+import numpy as np
+
+import smarter
+from domain import Domains
+from unionfind import UnionFind
+from zobrist import TranspositionTable
+
+
+'''
+@ function: rows of a state as strings, '_' for empty cells
+@ param:    state: matrix of state or None
+@ return:   Array of row string or None
+'''
+def state_rows(state):
+    if state is None:
+        return None
+    return [''.join(chr(x) if x else '_' for x in row) for row in np.asarray(state).tolist()]
+
+
+'''
+@ class:    smarter.py search on an explicit stack of decision frames, so it
+            never recurses and can stop after a node or time budget and go
+            on later. Each frame holds [cell,values left,value tried,domain
+            mark,union-find mark,hash key], the marks undo the tried value.
+@ param:    start_state: initial state
+            source: Array of color source sorted by color
+            value: Array of color value in puzzle
+            visit: TranspositionTable of visited state, None for a new one
+            table: Adjacency.near of the board, None for the shared one
+'''
+class Search:
+    def __init__(self,start_state,source,value,visit=None,table=None):
+        self.start_state = start_state
+        self.source = sorted(source,key=lambda list:list[2])
+        self.value = value
+        self.visit = TranspositionTable() if visit is None else visit
+        self.state = start_state.copy()
+        self.cols = self.state.shape[1]
+        self.uf = UnionFind.from_state(self.state)
+        self.domains = Domains(self.state,start_state,self.source,value,table)
+        self.stack = []
+        self.solution = None
+        self.status = 'paused'
+        self.nodes = 0
+        self.elapsed = 0.0
+
+        colored = [x for x in range(len(self.domains.dom)) if self.state[divmod(x,self.cols)] != 0]
+        if (self.domains.propagate(self.state,self.uf,colored) is None) or \
+           not smarter.is_consistent(self.state,self.start_state,self.source):
+            self.status = 'unsat'
+        else:
+            self.expand(self.visit.hash(self.state))
+            if (self.status == 'paused') and not self.stack:
+                self.status = 'unsat'
+
+    '''
+    @ function: push a frame for the next variable of the current state
+    @ param:    key: hash value of the current state
+    @ return:   False when the state is complete or has nothing to assign
+    '''
+    def expand(self,key):
+        if smarter.is_complete(self.state,self.start_state):
+            if smarter.trace is not None:
+                smarter.trace.solved(len(self.stack))
+            self.solution = self.state.copy()
+            self.status = 'solved'
+            return False
+        var = smarter.select_variable(self.state,self.value,None,self.domains)
+        if var is None:
+            return False
+        self.stack.append([var[0]*self.cols+var[1],list(smarter.select_value(var,self.state,self.domains,self.uf)),None,0,0,key])
+        return True
+
+    '''
+    @ function: try a value on the top frame, propagate and check it
+    @ param:    frame: top frame
+                val: color value
+                record: hash value after assigning val to the frame's cell
+    @ return:   hash value of the child state, None when it is inconsistent
+    '''
+    def descend(self,frame,val,record):
+        x = frame[0]
+        frame[2] = val
+        frame[3] = self.domains.mark()
+        frame[4] = self.uf.mark()
+        self.domains.assign(self.state,x,val)
+        assigned = self.domains.propagate(self.state,self.uf,[x])
+        if (assigned is None) or not smarter.is_consistent_batch(self.state,self.start_state,self.source,[x]+assigned,self.cols):
+            if smarter.trace is not None:
+                smarter.trace.prune(x,len(self.stack)-1,'domain' if assigned is None else None)
+            self.retreat(frame)
+            return None
+        for y in assigned:
+            record = self.visit.toggle(record,y//self.cols,y%self.cols,self.state[y//self.cols,y%self.cols])
+        return record
+
+    '''
+    @ function: undo the value tried on a frame
+    @ param:    frame: decision frame
+    @ return:   none
+    '''
+    def retreat(self,frame):
+        self.domains.undo(self.state,frame[3])
+        self.uf.undo(frame[4])
+        frame[2] = None
+
+    '''
+    @ function: search until solved, exhausted or out of budget
+    @ param:    nodes: number of nodes allowed in this run, None for no limit
+                seconds: time allowed in this run, None for no limit
+    @ return:   status: 'solved', 'unsat' or 'paused'
+    '''
+    def run(self,nodes=None,seconds=None):
+        start_time = time.time()
+        count = 0
+        while (self.status == 'paused') and self.stack:
+            if ((nodes is not None) and (count >= nodes)) or \
+               ((seconds is not None) and (time.time()-start_time >= seconds)):
+                break
+            frame = self.stack[-1]
+            if frame[2] is not None:
+                # back from a failed child
+                if smarter.trace is not None:
+                    smarter.trace.backtrack(frame[0],len(self.stack)-1)
+                self.retreat(frame)
+            if len(frame[1]) == 0:
+                self.stack.pop()
+                continue
+            val = frame[1].pop(0)
+            record = self.visit.toggle(frame[5],frame[0]//self.cols,frame[0]%self.cols,val)
+            snapshot = self.visit.snapshot(self.state,frame[0]//self.cols,frame[0]%self.cols,val)
+            if smarter.trace is not None:
+                smarter.trace.decide(frame[0],val,len(self.stack)-1)
+            if self.visit.seen(record,snapshot):
+                if smarter.trace is not None:
+                    smarter.trace.prune(frame[0],len(self.stack)-1,'visited')
+                continue
+            self.visit.add(record,len(self.stack)-1,snapshot)
+            child = self.descend(frame,val,record)
+            if child is None:
+                continue
+            count += 1
+            smarter.bt_counter += 1
+            self.expand(child)
+        if (self.status == 'paused') and not self.stack:
+            self.status = 'unsat'
+        self.nodes += count
+        self.elapsed += time.time()-start_time
+        return self.status
+
+    '''
+    @ function: compact description of the search, the puzzle plus the value
+                tried and the values left on every frame
+    @ return:   dictionary that json can store
+    '''
+    def checkpoint(self):
+        return {
+            'version': 1,
+            'puzzle': state_rows(self.start_state),
+            'frames': [[frame[0],frame[2],frame[1]] for frame in self.stack],
+            'status': self.status,
+            'solution': state_rows(self.solution),
+            'nodes': self.nodes,
+            'elapsed': self.elapsed,
+        }
+
+    '''
+    @ function: rebuild a search from a checkpoint by replaying its decisions,
+                the transposition table starts empty again
+    @ param:    data: dictionary from checkpoint()
+    @ return:   Search ready to run
+    '''
+    @classmethod
+    def restore(cls,data):
+        puzzle = np.asarray([list(x) for x in data['puzzle']])
+        start_state,source,value = smarter.build_Start_State(puzzle)
+        search = cls(start_state,source,value)
+        search.nodes = data['nodes']
+        search.elapsed = data['elapsed']
+        if data['status'] != 'paused':
+            search.status = data['status']
+            if data['solution'] is not None:
+                search.solution = np.asarray([[ord(x) for x in row] for row in data['solution']],dtype=np.uint8)
+            return search
+
+        if search.replay(data['frames']) is None:
+            raise ValueError("checkpoint does not match this puzzle")
+        return search
+
+    '''
+    @ function: descend from the root along a list of decisions
+    @ param:    frames: Array of [cell,value tried,values left] from the root,
+                        the last value tried may be None
+    @ return:   hash value of the state reached, None when a decision is
+                inconsistent
+    '''
+    def replay(self,frames):
+        self.stack = []
+        key = self.visit.hash(self.state)
+        for x,val,rest in frames:
+            frame = [x,list(rest),None,0,0,key]
+            self.stack.append(frame)
+            if val is None:
+                break
+            snapshot = self.visit.snapshot(self.state,x//self.cols,x%self.cols,val)
+            key = self.visit.toggle(key,x//self.cols,x%self.cols,val)
+            self.visit.add(key,len(self.stack)-1,snapshot)
+            key = self.descend(frame,val,key)
+            if key is None:
+                return None
+        return key
+
+    '''
+    @ function: limit the search to the subtree below a path of decisions,
+                run() then ends with 'unsat' once that subtree is exhausted
+    @ param:    decisions: Array of [cell,value] from the root
+    @ return:   none
+    '''
+    def branch(self,decisions):
+        key = self.replay([[x,val,[]] for x,val in decisions[:-1]])
+        if key is None:
+            raise ValueError("decisions do not match this puzzle")
+        # the last value is tried by run() like any other
+        self.stack.append([decisions[-1][0],[decisions[-1][1]],None,0,0,key])
+
+    '''
+    @ function: give away untried values of the frame closest to the root,
+                those hold the largest subtrees
+    @ param:    count: number of values wanted
+    @ return:   Array of decision path, one per value given away
+    '''
+    def split(self,count):
+        for i,frame in enumerate(self.stack):
+            if len(frame[1]) == 0:
+                continue
+            give = frame[1][max(len(frame[1])-count,0):]
+            del frame[1][len(frame[1])-len(give):]
+            prefix = [[x[0],x[2]] for x in self.stack[:i]]
+            return [prefix+[[frame[0],val]] for val in give]
+        return []
+
+    '''
+    @ function: write a zlib compressed json checkpoint
+    @ param:    path: checkpoint file path
+    @ return:   none
+    '''
+    def save(self,path):
+        file = open(path,'wb')
+        file.write(zlib.compress(json.dumps(self.checkpoint(),separators=(',',':')).encode()))
+        file.close()
+
+    '''
+    @ function: read a checkpoint written by save()
+    @ param:    path: checkpoint file path
+    @ return:   Search ready to run
+    '''
+    @classmethod
+    def load(cls,path):
+        file = open(path,'rb')
+        data = json.loads(zlib.decompress(file.read()).decode())
+        file.close()
+        return cls.restore(data)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Iterative Flow search that can stop and resume.")
+    parser.add_argument('puzzle',nargs='?',help="puzzle file")
+    parser.add_argument('-n','--nodes',type=int,default=None,help="nodes allowed in this run")
+    parser.add_argument('-t','--seconds',type=float,default=None,help="seconds allowed in this run")
+    parser.add_argument('-c','--checkpoint',default=None,help="save the search here when the budget runs out")
+    parser.add_argument('-r','--resume',default=None,help="resume from this checkpoint instead of a puzzle")
+    args = parser.parse_args(argv)
+
+    if args.resume is not None:
+        search = Search.load(args.resume)
+    elif args.puzzle is not None:
+        puzzle = smarter.read_puzzles(args.puzzle)
+        start_state,source,value = smarter.build_Start_State(puzzle)
+        search = Search(start_state,source,value)
+    else:
+        parser.error("a puzzle or --resume is required")
+
+    status = search.run(args.nodes,args.seconds)
+    if status == 'solved':
+        smarter.print_solution(search.solution)
+    elif status == 'paused':
+        if args.checkpoint is None:
+            print("Paused without --checkpoint, progress is lost",file=sys.stderr)
+        else:
+            search.save(args.checkpoint)
+            print("Paused, checkpoint saved to",args.checkpoint)
+    else:
+        print("No solution")
+    print("Status:",status,"Nodes:",search.nodes,"Time used: %.3f" % search.elapsed)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,493 @@
+import numpy as np
+from collections import deque
+
+from adjacency import adjacency
+
+
+# value of a cell taken out of the empty graph, never a source character
+BLOCK = 255
+
+
+'''
+@ function: shift the state so that every cell sees one of its neighbors
+@ param:    state: current state
+@ return:   Array of 4 neighbor matrix (top, bottom, left, right), cells
+            outside the board hold a negative value unique to that direction
+'''
+def neighbor_planes(state):
+    state = state.astype(np.int16)
+    top = np.full(state.shape,-1,dtype=np.int16)
+    bottom = np.full(state.shape,-2,dtype=np.int16)
+    left = np.full(state.shape,-3,dtype=np.int16)
+    right = np.full(state.shape,-4,dtype=np.int16)
+    top[1:,:] = state[:-1,:]
+    bottom[:-1,:] = state[1:,:]
+    left[:,1:] = state[:,:-1]
+    right[:,:-1] = state[:,1:]
+    return [top,bottom,left,right]
+
+
+'''
+@ function: count same color and empty neighbors of every cell at once
+@ param:    state: current state
+@ return:   same: matrix of same color neighbor count
+            zero: matrix of unassigned neighbor count
+            planes: Array of 4 neighbor matrix
+'''
+def neighbor_count(state):
+    planes = neighbor_planes(state)
+    same = np.zeros(state.shape,dtype=np.int8)
+    zero = np.zeros(state.shape,dtype=np.int8)
+    for plane in planes:
+        same += (plane == state)
+        zero += (plane == 0)
+    return same,zero,planes
+
+
+'''
+@ function: largest number of neighbors sharing one color for every cell
+@ param:    planes: Array of 4 neighbor matrix
+@ return:   matrix of largest neighbor color multiplicity
+'''
+def neighbor_multiplicity(planes):
+    output = np.zeros(planes[0].shape,dtype=np.int8)
+    for plane in planes:
+        count = np.zeros(planes[0].shape,dtype=np.int8)
+        for other in planes:
+            count += (plane == other)
+        output = np.maximum(output,count)
+    return output
+
+
+'''
+@ function: check the local constraints of every cell at once
+@ param:    state: current state
+            start_state: initial state
+            strict: use the rules of smarter.py instead of smart.py and dumb.py
+@ return:   boolean value of local consistency
+'''
+def check_grid(state,start_state,strict=True):
+    same,zero,planes = neighbor_count(state)
+    empty = (state == 0)
+    head = (start_state != 0)
+    path = ~empty & ~head
+
+    if strict:
+        # no same color neighbor and at most one empty neighbor on a path
+        if np.any(path & (same==0) & (zero<=1)):
+            return False
+        # isolated source
+        if np.any(head & (same==0) & (zero==0)):
+            return False
+        # dead path end
+        if np.any(path & (same==1) & (zero==0)):
+            return False
+    else:
+        # no same color neighbor and no empty neighbor
+        if np.any(~empty & (same==0) & (zero==0)):
+            return False
+    # path zig-zag
+    if np.any(path & (same>2)):
+        return False
+    # source zig-zag
+    if np.any(head & (same>1)):
+        return False
+
+    # unassigned variable without empty neighbor needs exactly one pair
+    closed = empty & (zero==0)
+    if np.any(closed):
+        if np.any(neighbor_multiplicity(planes)[closed] != 2):
+            return False
+    return True
+
+
+'''
+@ function: check state completeness w.r.t constraints
+@ param:    state: current state
+            start_state: initial state
+@ return:   0: not complete with incomplete assignment
+            1: not complete with complete assignment
+            2: complete
+'''
+def complete_grid(state,start_state):
+    if not np.all(state):
+        return 0
+    same,zero,planes = neighbor_count(state)
+    head = (start_state != 0)
+    # path has two same color neighbors, source has one
+    if np.any(same[~head] != 2) or np.any(same[head] != 1):
+        return 1
+    # and no color has a loop apart from its path
+    label,color = label_regions(state)
+    if len(color)-1 != len(np.unique(state)):
+        return 1
+    return 2
+
+
+'''
+@ function: label connected regions of equal valued cells in one pass
+@ param:    state: current state
+@ return:   label: Array of region label of every cell in row major order,
+                   labels start from 1
+            color: Array of color value of every region, color[0] unused
+'''
+def label_regions(state):
+    near = adjacency(state.shape[0],state.shape[1]).near
+    flat = state.ravel().tolist()
+    label = [0]*len(flat)
+    color = [0]
+    for start in range(len(flat)):
+        if label[start]:
+            continue
+        color.append(flat[start])
+        label[start] = len(color)-1
+        queue = deque([start])
+        while queue:
+            x = queue.popleft()
+            for y in near[x]:
+                if (not label[y]) and (flat[y] == flat[start]):
+                    label[y] = label[start]
+                    queue.append(y)
+    return label,color
+
+
+'''
+@ function: region labels of a state with the regions touching each region
+            across an empty cell border
+@ param:    state: current state
+@ return:   label: Array of region label of every cell in row major order
+            color: Array of color value of every region
+            border: Array of Set of region label next to every region
+'''
+def region_graph(state):
+    near = adjacency(state.shape[0],state.shape[1]).near
+    label,color = label_regions(state)
+    border = [set() for _ in color]
+    for x in range(len(label)):
+        if color[label[x]] == 0:
+            continue
+        for y in near[x]:
+            if color[label[y]] == 0:
+                border[label[x]].add(label[y])
+                border[label[y]].add(label[x])
+    return label,color,border
+
+
+'''
+@ function: check every color pair can still be linked through empty cells
+            and cells of its own color
+@ param:    state: current state
+            source: Array of color source sorted by color
+            colors: Set of color value to check, None for all colors
+            regions: region_graph of the state, None to build it
+@ return:   boolean value of forward checking consistency
+'''
+def link_grid(state,source,colors=None,regions=None):
+    cols = state.shape[1]
+    if regions is None:
+        regions = region_graph(state)
+    label,color,border = regions
+
+    for i in range(0,len(source),2):
+        value = source[i][2]
+        if (colors is not None) and (value not in colors):
+            continue
+        start = label[source[i][0]*cols+source[i][1]]
+        goal = label[source[i+1][0]*cols+source[i+1][1]]
+        # walk empty regions and the regions of this color between them
+        visit = set([start])
+        queue = deque([start])
+        while queue and (goal not in visit):
+            x = queue.popleft()
+            for y in border[x]:
+                if (y not in visit) and (color[y] in (0,value)):
+                    visit.add(y)
+                    queue.append(y)
+        if goal not in visit:
+            return False
+    return True
+
+
+'''
+@ function: colors whose two sources are already joined
+@ param:    state: current state
+            source: Array of color source sorted by color
+            regions: region_graph of the state
+@ return:   Array of color value
+'''
+def finished_color(state,source,regions):
+    cols = state.shape[1]
+    label = regions[0]
+    return [source[i][2] for i in range(0,len(source),2)
+            if label[source[i][0]*cols+source[i][1]] == label[source[i+1][0]*cols+source[i+1][1]]]
+
+
+'''
+@ function: cells a flow can still grow from
+@ param:    state: current state
+            start_state: initial state
+            finished: Array of color value already joined
+@ return:   boolean matrix, true on a source without a same color neighbor or a
+            path cell with less than two, of a color not yet joined
+'''
+def open_ends(state,start_state,finished):
+    same,zero,planes = neighbor_count(state)
+    head = (start_state != 0)
+    path = (state != 0) & ~head
+    ends = (head & (same==0)) | (path & (same<=1))
+    if len(finished):
+        ends &= ~np.isin(state,finished)
+    return ends
+
+
+'''
+@ function: cells whose dead end or stranded status can differ from the
+            state before some cells were colored: the cells within two steps
+            of them, and within one step of a color they joined, whose open
+            ends all closed at once
+@ param:    state: current state
+            cells: Array of cell index just colored
+            regions: region_graph of the state
+            finished: Array of color value already joined
+@ return:   Set of cell index
+'''
+def prune_area(state,cells,regions,finished):
+    near = adjacency(state.shape[0],state.shape[1]).near
+    label,color,border = regions
+    done = set(finished)
+    joined = [x for x in cells if color[label[x]] in done]
+    seen = set(joined)
+    while joined:
+        x = joined.pop()
+        for y in near[x]:
+            if (y not in seen) and (label[y] == label[x]):
+                seen.add(y)
+                joined.append(y)
+    # cells whose open end status can change
+    area = set(cells)
+    area.update([y for x in cells for y in near[x]])
+    area.update(seen)
+    area.update([y for x in list(area) for y in near[x]])
+    return area
+
+
+'''
+@ function: find an empty cell no flow can pass through, it has one empty
+            neighbor and no open end next to it, or no empty neighbor and no
+            color with two open ends next to it
+@ param:    state: current state
+            ends: matrix of open_ends
+            area: Set of cell index to look at, None for every cell
+@ return:   boolean value of a dead end being found
+'''
+def dead_end(state,ends,area=None):
+    if area is not None:
+        near = adjacency(state.shape[0],state.shape[1]).near
+        for y in area:
+            if state.item(y) != 0:
+                continue
+            zero = 0
+            colors = []
+            for z in near[y]:
+                value = state.item(z)
+                if value == 0:
+                    zero += 1
+                elif ends.item(z):
+                    colors.append(value)
+            if (zero == 1) and (len(colors) == 0):
+                return True
+            if (zero == 0) and (len(set(colors)) == len(colors)):
+                return True
+        return False
+
+    same,zero,planes = neighbor_count(state)
+    empty = (state == 0)
+    # color of each neighbor when it is an open end, negative otherwise
+    open_planes = []
+    for plane,end in zip(planes,neighbor_planes(ends)):
+        open_planes.append(np.where(end > 0,plane,-1-len(open_planes)))
+    count = np.zeros(state.shape,dtype=np.int8)
+    for plane in open_planes:
+        count += (plane > 0)
+    if np.any(empty & (zero==1) & (count==0)):
+        return True
+    closed = empty & (zero==0)
+    if np.any(closed):
+        if np.any(neighbor_multiplicity(open_planes)[closed] < 2):
+            return True
+    return False
+
+
+'''
+@ function: find an empty region no flow can run through, every flow
+            crossing a region enters and leaves it through two open ends of
+            its color on the region border
+@ param:    state: current state
+            ends: matrix of open_ends
+            regions: region_graph of the state
+            area: Set of cell index whose empty regions are looked at, None
+                  for every region
+@ return:   boolean value of a stranded region being found
+'''
+def stranded(state,ends,regions,area=None):
+    near = adjacency(state.shape[0],state.shape[1]).near
+    label,color,border = regions
+    if area is None:
+        check = range(1,len(color))
+    else:
+        check = set(label[y] for y in area if color[label[y]] == 0)
+    entry = {}
+    for x in np.flatnonzero(ends).tolist():
+        for y in near[x]:
+            if (color[label[y]] == 0) and ((area is None) or (label[y] in check)):
+                entry.setdefault((label[y],color[label[x]]),set()).add(x)
+    reachable = set(key[0] for key,cells in entry.items() if len(cells) >= 2)
+    for region in check:
+        if (color[region] == 0) and (region not in reachable):
+            return True
+    return False
+
+
+'''
+@ function: empty neighbors of a cell
+@ param:    x: cell index in row major order
+            flat: Array of cell value in row major order
+            near: Adjacency.near of the board
+@ return:   Array of cell index
+'''
+def empty_neighbor(x,flat,near):
+    return [y for y in near[x] if flat[y] == 0]
+
+
+'''
+@ function: depth first search tree of the graph of empty cells
+@ param:    state: current state
+@ return:   order: Array of visit order of every cell, 0 for colored cells
+            size: Array of subtree size of every cell
+            cut: dictionary from articulation point to the Array of its
+                 children whose subtree is cut off when it is removed
+'''
+def cut_tree(state):
+    near = adjacency(state.shape[0],state.shape[1]).near
+    flat = state.ravel().tolist()
+    order = [0]*len(flat)
+    low = [0]*len(flat)
+    size = [1]*len(flat)
+    cut = {}
+    count = 0
+    for root in range(len(flat)):
+        if flat[root] or order[root]:
+            continue
+        count += 1
+        order[root] = low[root] = count
+        children = []
+        # iterative depth first search, each entry is (cell,parent,neighbors left)
+        stack = [(root,-1,empty_neighbor(root,flat,near))]
+        while stack:
+            x,parent,rest = stack[-1]
+            if rest:
+                y = rest.pop()
+                if not order[y]:
+                    count += 1
+                    order[y] = low[y] = count
+                    if x == root:
+                        children.append(y)
+                    stack.append((y,x,empty_neighbor(y,flat,near)))
+                elif y != parent:
+                    low[x] = min(low[x],order[y])
+                continue
+            stack.pop()
+            if parent >= 0:
+                low[parent] = min(low[parent],low[x])
+                size[parent] += size[x]
+                if (parent != root) and (low[x] >= order[parent]):
+                    cut.setdefault(parent,[]).append(x)
+        if len(children) > 1:
+            cut[root] = children
+    return order,size,cut
+
+
+'''
+@ function: articulation points of the graph of empty cells
+@ param:    state: current state
+@ return:   Array of cell index in row major order whose removal splits its
+            empty region
+'''
+def articulation_points(state):
+    return sorted(cut_tree(state)[2])
+
+
+'''
+@ function: root of a node in a dictionary based union-find
+@ param:    parent: dictionary from node to parent, roots are missing
+            a: node
+@ return:   root node
+'''
+def find_root(parent,a):
+    while a in parent:
+        a = parent[a]
+    return a
+
+
+'''
+@ function: find an empty cell that two or more unfinished colors must all
+            run through, while one cell only lets one flow pass
+@ param:    state: current state
+            source: Array of color source sorted by color
+            regions: region_graph of the state
+@ return:   boolean value of a bottleneck being found
+'''
+def bottleneck(state,source,regions):
+    cols = state.shape[1]
+    near = adjacency(state.shape[0],cols).near
+    label,color,border = regions
+    order,size,cut = cut_tree(state)
+    if len(cut) == 0:
+        return False
+    flat = state.ravel().tolist()
+    # empty cells next to the regions of every unfinished color
+    pair = {}
+    for i in range(0,len(source),2):
+        start = label[source[i][0]*cols+source[i][1]]
+        goal = label[source[i+1][0]*cols+source[i+1][1]]
+        if start != goal:
+            pair[source[i][2]] = (start,goal)
+    edge = {}
+    for x in range(len(flat)):
+        if flat[x] not in pair:
+            continue
+        for y in near[x]:
+            if flat[y] == 0:
+                edge.setdefault(flat[x],[]).append((label[x],y))
+
+    suspect = {}
+    for x,children in cut.items():
+        if label[x] not in suspect:
+            suspect[label[x]] = set(color[r] for r in border[label[x]] if color[r] in pair)
+        if len(suspect[label[x]]) < 2:
+            continue
+        span = [(order[c],order[c]+size[c]) for c in children]
+        need = 0
+        for value in suspect[label[x]]:
+            # join regions of this color through the pieces left without x:
+            # a cut off subtree, the rest of x's region, or another region
+            parent = {}
+            for r,y in edge[value]:
+                if y == x:
+                    continue
+                piece = -label[y]
+                if label[y] == label[x]:
+                    for k in range(len(span)):
+                        if span[k][0] <= order[y] < span[k][1]:
+                            piece = ('child',k)
+                            break
+                a = find_root(parent,r)
+                b = find_root(parent,piece)
+                if a != b:
+                    parent[a] = b
+            start,goal = pair[value]
+            if find_root(parent,start) != find_root(parent,goal):
+                need += 1
+                if need > 1:
+                    return True
+    return False
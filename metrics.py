@@ -0,0 +1,130 @@
+import json
+import time
+
+
+# functions timed when an engine module has them
+TRACED = ['recursive_backtrack','head_backtrack','recursive_backtrack_dumb',
+          'is_consistent','is_consistent_local','is_consistent_batch','is_consistent_dumb',
+          'checkLink','checkColor','checkPrune',
+          'select_variable','select_domain','select_variable_dumb',
+          'forced_move','forced_iter']
+
+# functions that recurse, their nesting is the search depth, with the
+# position of their visited state argument
+RECURSIVE = {'recursive_backtrack':4,'head_backtrack':3,'recursive_backtrack_dumb':4}
+
+
+'''
+@ class:    call counts and times of an engine module's search functions.
+            start() swaps the module functions for timed wrappers and stop()
+            puts the originals back, so a solve without Metrics runs the
+            untouched functions. The search calls its helpers through module
+            globals, which is what makes the swap reach every call.
+@ param:    module: engine module, e.g. smarter
+            names: Array of function name to time
+'''
+class Metrics:
+    def __init__(self,module,names=TRACED):
+        self.module = module
+        self.names = [name for name in names if callable(getattr(module,name,None))]
+        self.original = {}
+        self.reset()
+
+    def reset(self):
+        # name: [calls,seconds], time of a recursive function counts its outermost call
+        self.calls = {name:[0,0.0] for name in self.names}
+        self.level = 0
+        self.depth = 0
+        self.visit = None
+        self.elapsed = 0.0
+        self.start_time = None
+
+    '''
+    @ function: timed wrapper of one function
+    @ param:    name: function name
+                func: original function
+    @ return:   wrapper function
+    '''
+    def wrap(self,name,func):
+        stat = self.calls[name]
+        clock = time.perf_counter
+        if name not in RECURSIVE:
+            def wrapper(*args,**kwargs):
+                stat[0] += 1
+                begin = clock()
+                try:
+                    return func(*args,**kwargs)
+                finally:
+                    stat[1] += clock()-begin
+            return wrapper
+
+        def recursive(*args,**kwargs):
+            stat[0] += 1
+            self.level += 1
+            if self.level > self.depth:
+                self.depth = self.level
+            if self.level > 1:
+                try:
+                    return func(*args,**kwargs)
+                finally:
+                    self.level -= 1
+            if len(args) > RECURSIVE[name]:
+                self.visit = args[RECURSIVE[name]]
+            begin = clock()
+            try:
+                return func(*args,**kwargs)
+            finally:
+                stat[1] += clock()-begin
+                self.level -= 1
+        return recursive
+
+    def start(self):
+        self.reset()
+        for name in self.names:
+            self.original[name] = getattr(self.module,name)
+            setattr(self.module,name,self.wrap(name,self.original[name]))
+        self.start_time = time.perf_counter()
+
+    def stop(self):
+        if self.start_time is not None:
+            self.elapsed = time.perf_counter()-self.start_time
+            self.start_time = None
+        for name,func in self.original.items():
+            setattr(self.module,name,func)
+        self.original = {}
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self,*error):
+        self.stop()
+        return False
+
+    '''
+    @ function: metrics of the last solve
+    @ return:   dictionary of time, nodes, nodes per second, value ordering,
+                max depth, visited states, prunes by rule, nogood store
+                counters and calls and seconds per function
+    '''
+    def report(self):
+        nodes = int(getattr(self.module,'bt_counter',0))
+        visited = None
+        if self.visit is not None:
+            visited = len(self.visit)
+        nogoods = getattr(self.module,'nogoods',None)
+        return {
+            'time': self.elapsed,
+            'nodes': nodes,
+            'nodes_per_second': nodes/self.elapsed if self.elapsed > 0 else 0.0,
+            'checks': int(getattr(self.module,'check_counter',0)),
+            'value_order': getattr(self.module,'value_order',None),
+            'max_depth': self.depth,
+            'visited': visited,
+            'prunes': dict(getattr(self.module,'prune_counter',{})),
+            'nogoods': None if nogoods is None else nogoods.stats(),
+            'calls': {name:{'calls':stat[0],'seconds':stat[1]} for name,stat in self.calls.items() if stat[0] > 0},
+        }
+
+    def to_json(self):
+        return json.dumps(self.report())
@@ -0,0 +1,73 @@
+from collections import OrderedDict
+
+
+'''
+@ class:    bounded store of nogoods, sets of (cell,color) the search proved
+            can not all hold in a solution. Every nogood is watched under
+            each of its cells, so a check only looks at the nogoods of the
+            cells that just changed. Nogoods above size cells are not kept
+            and the least recently matched one goes when capacity is reached.
+@ param:    capacity: number of nogoods kept
+            size: largest number of cells in a nogood
+'''
+class NogoodStore:
+    def __init__(self,capacity=10000,size=6):
+        self.capacity = capacity
+        self.size = size
+        self.table = OrderedDict()
+        # (cell,color): Set of nogood holding it
+        self.watch = {}
+        self.hits = 0
+        self.evictions = 0
+
+    def __len__(self):
+        return len(self.table)
+
+    '''
+    @ function: store a nogood
+    @ param:    literals: Array of (cell index,color value)
+    @ return:   boolean value of the nogood being kept
+    '''
+    def add(self,literals):
+        if (len(literals) == 0) or (len(literals) > self.size):
+            return False
+        key = frozenset(literals)
+        if key in self.table:
+            self.table.move_to_end(key)
+            return True
+        self.table[key] = tuple(literals)
+        for literal in key:
+            self.watch.setdefault(literal,set()).add(key)
+        if len(self.table) > self.capacity:
+            old,_ = self.table.popitem(last=False)
+            for literal in old:
+                self.watch[literal].discard(old)
+                if len(self.watch[literal]) == 0:
+                    del self.watch[literal]
+            self.evictions += 1
+        return True
+
+    '''
+    @ function: nogood that holds in a state, looking only at nogoods on
+                cells that just changed
+    @ param:    state: current state
+                cells: Array of cell index just colored
+                cols: number of columns of the state
+    @ return:   Array of (cell index,color value), None when none holds
+    '''
+    def find(self,state,cells,cols):
+        for x in cells:
+            for key in self.watch.get((x,int(state[x//cols,x%cols])),()):
+                if all([state[y//cols,y%cols] == color for y,color in key]):
+                    self.hits += 1
+                    self.table.move_to_end(key)
+                    return self.table[key]
+        return None
+
+    '''
+    @ function: report store counters
+    @ param:    none
+    @ return:   dictionary of counters
+    '''
+    def stats(self):
+        return {'capacity':self.capacity,'size':len(self),'hits':self.hits,'evictions':self.evictions}
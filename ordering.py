@@ -0,0 +1,100 @@
+from collections import deque
+
+
+'''
+@ function: keep the order select_variable gave, colors of more neighbors
+            first and then the rest in value order
+@ param:    var: variable as [row,col,Array of color value]
+            state: current state
+            domains: Domains of the state
+            uf: UnionFind of the state
+@ return:   Array of color value
+'''
+def neighbor_order(var,state,domains,uf):
+    return var[2]
+
+
+'''
+@ function: least constraining value, colors that take the fewest options
+            away from the empty neighbors first
+@ param:    var: variable as [row,col,Array of color value]
+            state: current state
+            domains: Domains of the state
+            uf: UnionFind of the state
+@ return:   Array of color value
+'''
+def lcv_order(var,state,domains,uf):
+    x = var[0]*domains.cols+var[1]
+    empty = [y for y in domains.neighbor(x) if state[divmod(y,domains.cols)] == 0]
+    if (len(var[2]) < 2) or (len(empty) == 0):
+        return var[2]
+    cost = {}
+    for val in var[2]:
+        state[var[0],var[1]] = val
+        lost = 0
+        for y in empty:
+            old = domains.options(y)
+            lost += bin(old & ~domains.domain_of(state,y)).count('1')
+        cost[val] = lost
+    state[var[0],var[1]] = 0
+    # sorted is stable, ties keep the neighbor order
+    return sorted(var[2],key=lambda val:cost[val])
+
+
+'''
+@ function: breadth first distance from a cell over empty cells to the
+            other end of every color, the part of the flow that does not
+            touch the cell
+@ param:    state: current state
+            domains: Domains of the state
+            uf: UnionFind of the state
+            x: cell index
+@ return:   dictionary of color value to distance
+'''
+def partner_distance(state,domains,uf,x):
+    cols = domains.cols
+    # flows next to x already reach it, their own set does not count
+    near = set()
+    for y in domains.neighbor(x):
+        if state[divmod(y,cols)] != 0:
+            near.add(uf.find(y))
+    output = {}
+    dist = {x:0}
+    queue = deque([x])
+    while queue:
+        z = queue.popleft()
+        for y in domains.neighbor(z):
+            if y in dist:
+                continue
+            color = int(state[divmod(y,cols)])
+            if color == 0:
+                dist[y] = dist[z]+1
+                queue.append(y)
+            elif (color not in output) and (uf.find(y) not in near):
+                output[color] = dist[z]+1
+    return output
+
+
+'''
+@ function: colors whose unconnected end is closest over empty cells first,
+            colors that can not reach their other end last
+@ param:    var: variable as [row,col,Array of color value]
+            state: current state
+            domains: Domains of the state
+            uf: UnionFind of the state
+@ return:   Array of color value
+'''
+def distance_order(var,state,domains,uf):
+    if len(var[2]) < 2:
+        return var[2]
+    dist = partner_distance(state,domains,uf,var[0]*domains.cols+var[1])
+    far = len(domains.dom)
+    return sorted(var[2],key=lambda val:dist.get(val,far))
+
+
+# value orderings smarter.select_value can use
+ORDERING = {
+    'neighbor': neighbor_order,
+    'lcv': lcv_order,
+    'distance': distance_order,
+}
@@ -0,0 +1,175 @@
+import argparse
+import multiprocessing
+import os
+import queue
+import time
+
+import numpy as np
+
+import iterative
+import smarter
+from zobrist import TranspositionTable
+
+
+# nodes a worker searches between looks at the stop flag and idle workers
+SLICE = 32
+
+# slots of the shared counters
+IDLE = 0
+QUEUED = 1
+PENDING = 2
+
+
+'''
+@ function: worker loop, search work units until told to stop and hand
+            subtrees to idle workers between slices
+@ param:    puzzle: (start_state,source,value)
+            tasks: queue of work unit, each a decision path from the root
+            results: queue of ('solved',rows) and a final ('nodes',count)
+            count: shared Array of idle workers, queued units and units not
+                   finished yet, its lock guards all three
+            stop: Event set when the search is over
+            nodes: nodes per slice
+@ return:   none
+'''
+def work(puzzle,tasks,results,count,stop,nodes=SLICE):
+    start_state,source,value = puzzle
+    # states fully searched in one unit stay useless in the next
+    visit = TranspositionTable()
+    total = 0
+    idle = False
+    while not stop.is_set():
+        try:
+            decisions = tasks.get(timeout=0.05)
+        except queue.Empty:
+            if not idle:
+                with count.get_lock():
+                    count[IDLE] += 1
+                idle = True
+            continue
+        with count.get_lock():
+            count[QUEUED] -= 1
+            if idle:
+                count[IDLE] -= 1
+        idle = False
+
+        search = iterative.Search(start_state,source,value,visit)
+        search.branch(decisions)
+        while (search.run(nodes) == 'paused') and not stop.is_set():
+            units = []
+            with count.get_lock():
+                want = count[IDLE]-count[QUEUED]
+                if want > 0:
+                    units = search.split(want)
+                    count[QUEUED] += len(units)
+                    count[PENDING] += len(units)
+            for unit in units:
+                tasks.put(unit)
+        total += search.nodes
+        if search.status == 'solved':
+            results.put(('solved',iterative.state_rows(search.solution)))
+            stop.set()
+        with count.get_lock():
+            count[PENDING] -= 1
+    results.put(('nodes',total))
+
+
+'''
+@ function: smarter.py search of one puzzle over several processes. The
+            values of the first variable after propagation are the first
+            work units, idle workers then get untried values near the root
+            of busy ones. The first solution stops every worker, and a worker
+            that dies raises RuntimeError.
+@ param:    start_state: initial state
+            source: Array of color source
+            value: Array of color value
+            jobs: number of worker processes, None for one per core
+            nodes: nodes a worker searches between looks at idle workers
+@ return:   solution: matrix of solution or None
+            nodes: number of expanded nodes over all workers
+'''
+def parallel_search(start_state,source,value,jobs=None,nodes=SLICE):
+    jobs = jobs or os.cpu_count() or 1
+    root = iterative.Search(start_state,source,value)
+    if root.status != 'paused':
+        return root.solution,0
+
+    tasks = multiprocessing.Queue()
+    results = multiprocessing.Queue()
+    stop = multiprocessing.Event()
+    units = root.split(len(root.stack[0][1]))
+    count = multiprocessing.Array('i',[0,len(units),len(units)])
+    for unit in units:
+        tasks.put(unit)
+    puzzle = (start_state,root.source,value)
+    workers = [multiprocessing.Process(target=work,args=(puzzle,tasks,results,count,stop,nodes)) for _ in range(jobs)]
+    for worker in workers:
+        worker.start()
+
+    solution = None
+    total = 0
+    try:
+        while solution is None:
+            try:
+                message = results.get(timeout=0.05)
+            except queue.Empty:
+                if count[PENDING] == 0:
+                    break
+                # a worker only ends by itself after stop, one that died
+                # took its unit along and PENDING never drains
+                dead = [worker.exitcode for worker in workers if worker.exitcode not in (None,0)]
+                if dead:
+                    raise RuntimeError("parallel worker died with exit code %d" % dead[0])
+                continue
+            if message[0] == 'solved':
+                solution = message[1]
+            else:
+                total += message[1]
+                jobs -= 1
+        stop.set()
+        # every worker sends its node count last, a solution may come before it
+        while jobs > 0:
+            try:
+                message = results.get(timeout=1)
+            except queue.Empty:
+                if not any([worker.is_alive() for worker in workers]):
+                    break
+                continue
+            if message[0] == 'solved':
+                solution = solution or message[1]
+            else:
+                total += message[1]
+                jobs -= 1
+    finally:
+        stop.set()
+        for worker in workers:
+            worker.join(1)
+            if worker.is_alive():
+                worker.terminate()
+                worker.join()
+    if solution is not None:
+        solution = np.asarray([[ord(x) for x in row] for row in solution],dtype=np.uint8)
+    return solution,total
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Search one Flow puzzle with several processes.")
+    parser.add_argument('puzzle',help="puzzle file")
+    parser.add_argument('-j','--jobs',type=int,default=None,help="worker processes (default: all cores)")
+    parser.add_argument('-n','--nodes',type=int,default=SLICE,help="nodes between looks at idle workers")
+    args = parser.parse_args(argv)
+
+    puzzle = smarter.read_puzzles(args.puzzle)
+    start_state,source,value = smarter.build_Start_State(puzzle)
+    start_time = time.time()
+    solution,smarter.bt_counter = parallel_search(start_state,source,value,args.jobs,args.nodes)
+    if solution is None:
+        print("No solution")
+    else:
+        smarter.print_solution(solution)
+    print("Time used:",time.time()-start_time)
+    print("Total iteration:",smarter.bt_counter)
+
+
+if __name__ == "__main__":
+    main()
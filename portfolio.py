@@ -0,0 +1,216 @@
+import argparse
+import json
+import multiprocessing
+import os
+import queue
+import time
+
+import batch
+import engines
+import ordering
+import smarter
+import zobrist
+
+
+# configurations raced by default, see parse_config for the format
+PORTFOLIO = ['smarter','smarter:nobottleneck','smarter:distance','head','sat']
+
+
+'''
+@ function: parse a configuration written as
+            engine[:seed][:nobottleneck][:nobackjump][:verify][:ordering]
+@ param:    text: configuration string, e.g. 'dumb:7' or 'smarter:nobottleneck:lcv'
+@ return:   dictionary of name, engine, seed, bottleneck, backjump, verify
+            and order
+'''
+def parse_config(text):
+    field = text.split(':')
+    if field[0] not in engines.ENGINE:
+        raise ValueError("unknown engine %r in %r" % (field[0],text))
+    config = {'name':text,'engine':field[0],'seed':None,'bottleneck':True,'backjump':True,
+              'verify':False,'order':'neighbor'}
+    for option in field[1:]:
+        if option.lstrip('-').isdigit():
+            config['seed'] = int(option)
+        elif option == 'nobottleneck':
+            config['bottleneck'] = False
+        elif option == 'nobackjump':
+            config['backjump'] = False
+        elif option == 'verify':
+            config['verify'] = True
+        elif option in ordering.ORDERING:
+            config['order'] = option
+        else:
+            raise ValueError("unknown option %r in %r" % (option,text))
+    return config
+
+
+'''
+@ function: whether an unsolved result of a configuration proves there is no
+            solution. The other engines skip states by a Zobrist key alone and
+            a collision can skip a state never searched. sat only reports
+            unsolved when the formula is unsatisfiable, running out of its
+            conflict budget is a timeout.
+@ param:    config: dictionary from parse_config
+@ return:   boolean value
+'''
+def proves_unsolved(config):
+    return (config['engine'] == 'sat') or config['verify']
+
+
+'''
+@ function: run one configuration on a puzzle inside its own process
+@ param:    path: puzzle file path
+            config: dictionary from parse_config
+            results: queue the result goes on
+@ return:   none
+'''
+def run_config(path,config,results):
+    engines.reset(config['engine'],config['seed'])
+    smarter.use_bottleneck = config['bottleneck']
+    smarter.use_backjump = config['backjump']
+    smarter.value_order = config['order']
+    zobrist.use_verify = config['verify']
+    result = batch.solve_file(path,config['engine'])
+    result['config'] = config['name']
+    results.put(result)
+
+
+'''
+@ function: race several configurations on one puzzle, keep the first that
+            settles it and stop the others. A solution settles it, and so
+            does unsolved from a configuration that proves_unsolved; any
+            other unsolved only counts once every configuration has reported.
+@ param:    path: puzzle file path
+            configs: Array of configuration dictionary
+            timeout: seconds allowed for the whole race, None for no limit
+@ return:   dictionary of puzzle, status, solution, time, nodes and the
+            winning config, 'config' is None when no configuration settled it
+'''
+def solve_portfolio(path,configs,timeout=None):
+    start_time = time.time()
+    results = multiprocessing.Queue()
+    workers = []
+    for config in configs:
+        worker = multiprocessing.Process(target=run_config,args=(path,config,results),daemon=True)
+        worker.start()
+        workers.append(worker)
+
+    output = {'puzzle':path,'status':'timeout','solution':None,'time':0.0,'nodes':0,'config':None}
+    proof = dict((config['name'],proves_unsolved(config)) for config in configs)
+    errors = []
+    unsolved = None
+    try:
+        for _ in workers:
+            wait = None if timeout is None else max(timeout-(time.time()-start_time),0)
+            try:
+                result = results.get(timeout=wait)
+            except queue.Empty:
+                break
+            if (result['status'] == 'solved') or ((result['status'] == 'unsolved') and proof[result['config']]):
+                output.update(result)
+                del output['engine']
+                break
+            if result['status'] == 'unsolved':
+                if unsolved is None:
+                    unsolved = result
+                continue
+            errors.append(result)
+        else:
+            # every configuration has reported
+            if unsolved is not None:
+                output.update(unsolved)
+                del output['engine']
+            else:
+                output['status'] = 'error'
+                output['errors'] = [(result['config'],result.get('error')) for result in errors]
+    finally:
+        for worker in workers:
+            if worker.is_alive():
+                worker.terminate()
+        for worker in workers:
+            worker.join()
+        results.close()
+    output['time'] = time.time()-start_time
+    output['configs'] = [config['name'] for config in configs]
+    return output
+
+
+'''
+@ function: count wins and winning time of each configuration in a log
+@ param:    lines: Array of result dictionary written by solve_portfolio
+@ return:   dictionary of config name to dictionary of races, wins and
+            total winning time
+'''
+def win_stats(lines):
+    output = {}
+    for result in lines:
+        for name in result.get('configs',[]):
+            stat = output.setdefault(name,{'races':0,'wins':0,'time':0.0})
+            stat['races'] += 1
+            if name == result.get('config'):
+                stat['wins'] += 1
+                stat['time'] += result['time']
+    return output
+
+
+'''
+@ function: read the results of a JSON lines log
+@ param:    path: log file path
+@ return:   Array of result dictionary
+'''
+def read_log(path):
+    file = open(path)
+    output = [json.loads(line) for line in file if line.strip()]
+    file.close()
+    return output
+
+
+def print_stats(stats):
+    print("%-24s %6s %6s %10s" % ('config','races','wins','mean win'))
+    for name,stat in sorted(stats.items(),key=lambda item:-item[1]['wins']):
+        mean = stat['time']/stat['wins'] if stat['wins'] else 0.0
+        print("%-24s %6d %6d %9.3fs" % (name,stat['races'],stat['wins'],mean))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Race several solver configurations on each Flow puzzle.")
+    parser.add_argument('puzzles',nargs='*',help="puzzle files, directories or glob patterns")
+    parser.add_argument('-p','--portfolio',default=','.join(PORTFOLIO),
+                        help="comma separated configs, each engine[:seed][:nobottleneck][:nobackjump][:verify][:ordering]")
+    parser.add_argument('-t','--timeout',type=float,default=None,help="seconds allowed per puzzle")
+    parser.add_argument('-l','--log',default=None,help="append a JSON line per puzzle here for win statistics")
+    parser.add_argument('--stats',action='store_true',help="print the win statistics of --log and exit")
+    args = parser.parse_args(argv)
+
+    if args.stats:
+        if (args.log is None) or not os.path.exists(args.log):
+            parser.error("--stats needs an existing --log")
+        print_stats(win_stats(read_log(args.log)))
+        return
+    if len(args.puzzles) == 0:
+        parser.error("no puzzle given")
+    try:
+        configs = [parse_config(text) for text in args.portfolio.split(',')]
+    except ValueError as error:
+        parser.error(str(error))
+
+    log = open(args.log,'a') if args.log else None
+    lines = []
+    paths = batch.find_puzzles(args.puzzles)
+    for path in paths:
+        result = solve_portfolio(path,configs,args.timeout)
+        lines.append(result)
+        if log is not None:
+            log.write(json.dumps(result)+'\n')
+            log.flush()
+        print("%-32s %-8s %8.3fs %s" % (os.path.basename(path),result['status'],result['time'],result['config']))
+        if (len(paths) == 1) and (result['solution'] is not None):
+            print('\n'.join(result['solution']))
+    if log is not None:
+        log.close()
+    print_stats(win_stats(lines))
+
+
+if __name__ == "__main__":
+    main()
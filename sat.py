@@ -0,0 +1,600 @@
+import numpy as np
+import sys
+import time
+
+from adjacency import adjacency
+from heap import IndexedHeap
+from smarter import read_puzzles,build_Start_State,print_solution
+
+
+'''
+@ function: Luby restart sequence
+@ param:    i: index in the sequence, starting from 1
+@ return:   i-th element of the sequence
+'''
+def luby(i):
+    k = 1
+    while (1 << k) - 1 < i:
+        k += 1
+    while (1 << k) - 1 != i:
+        i -= (1 << (k-1)) - 1
+        k = 1
+        while (1 << k) - 1 < i:
+            k += 1
+    return 1 << (k-1)
+
+
+'''
+@ class:    CDCL SAT solver with two watched literals, VSIDS branching,
+            phase saving, first UIP clause learning and Luby restarts.
+            Variables are numbered from 1 and literals are DIMACS integers;
+            internally literal v is 2*v and literal -v is 2*v+1.
+'''
+class Solver:
+    def __init__(self):
+        self.nvars = 0
+        self.watches = [[],[]]
+        self.lval = [0,0]
+        self.level = [0]
+        self.reason = [None]
+        self.activity = [0.0]
+        self.polarity = [False]
+        self.seen = [False]
+        self.trail = []
+        self.trail_lim = []
+        self.qhead = 0
+        # unassigned variables by activity, assigned ones leave when popped
+        self.order = IndexedHeap(1)
+        self.var_inc = 1.0
+        self.var_decay = 0.95
+        self.clauses = []
+        self.learnts = []
+        self.lbd = {}
+        self.max_learnts = 2000
+        self.ok = True
+        self.model = None
+        self.conflicts = 0
+        self.decisions = 0
+        self.propagations = 0
+        self.restarts = 0
+
+    '''
+    @ function: add a new variable
+    @ param:    none
+    @ return:   index of the variable
+    '''
+    def new_var(self):
+        self.nvars += 1
+        self.watches.append([])
+        self.watches.append([])
+        self.lval.append(0)
+        self.lval.append(0)
+        self.level.append(0)
+        self.reason.append(None)
+        self.activity.append(0.0)
+        self.polarity.append(False)
+        self.seen.append(False)
+        self.order.grow(self.nvars+1)
+        self.order.update(self.nvars,0.0)
+        return self.nvars
+
+    '''
+    @ function: add a clause, may be called between two solve calls
+    @ param:    lits: Array of DIMACS literal
+    @ return:   False if the formula became trivially unsatisfiable
+    '''
+    def add_clause(self,lits):
+        if not self.ok:
+            return False
+        self.cancel_until(0)
+        clause = set()
+        for lit in lits:
+            while abs(lit) > self.nvars:
+                self.new_var()
+            x = 2*lit if lit > 0 else -2*lit+1
+            # tautology
+            if x^1 in clause:
+                return True
+            clause.add(x)
+        output = []
+        for x in clause:
+            if self.lval[x] == 1:
+                return True
+            if self.lval[x] == 0:
+                output.append(x)
+        if len(output) == 0:
+            self.ok = False
+            return False
+        if len(output) == 1:
+            self.enqueue(output[0],None)
+            if self.propagate() is not None:
+                self.ok = False
+            return self.ok
+        self.clauses.append(output)
+        self.watches[output[0]^1].append(output)
+        self.watches[output[1]^1].append(output)
+        return True
+
+    def enqueue(self,x,reason):
+        self.lval[x] = 1
+        self.lval[x^1] = -1
+        self.level[x>>1] = len(self.trail_lim)
+        self.reason[x>>1] = reason
+        self.trail.append(x)
+
+    '''
+    @ function: unit propagation over watched literals
+    @ param:    none
+    @ return:   conflicting clause or None
+    '''
+    def propagate(self):
+        lval = self.lval
+        trail = self.trail
+        watches = self.watches
+        while self.qhead < len(trail):
+            p = trail[self.qhead]
+            self.qhead += 1
+            self.propagations += 1
+            false_lit = p^1
+            # clauses are stored in the watch list of the negation of their watch
+            ws = watches[p]
+            i = 0
+            j = 0
+            n = len(ws)
+            while i < n:
+                c = ws[i]
+                i += 1
+                if c[0] == false_lit:
+                    c[0] = c[1]
+                    c[1] = false_lit
+                first = c[0]
+                if lval[first] == 1:
+                    ws[j] = c
+                    j += 1
+                    continue
+                found = False
+                for k in range(2,len(c)):
+                    if lval[c[k]] != -1:
+                        c[1] = c[k]
+                        c[k] = false_lit
+                        watches[c[1]^1].append(c)
+                        found = True
+                        break
+                if found:
+                    continue
+                ws[j] = c
+                j += 1
+                if lval[first] == -1:
+                    while i < n:
+                        ws[j] = ws[i]
+                        j += 1
+                        i += 1
+                    del ws[j:]
+                    self.qhead = len(trail)
+                    return c
+                self.enqueue(first,c)
+            del ws[j:]
+        return None
+
+    def bump(self,v):
+        self.activity[v] += self.var_inc
+        if self.activity[v] > 1e100:
+            for u in range(1,self.nvars+1):
+                self.activity[u] *= 1e-100
+            self.var_inc *= 1e-100
+            self.order.build({u:-self.activity[u] for u in self.order.heap})
+        elif v in self.order:
+            self.order.update(v,-self.activity[v])
+
+    '''
+    @ function: first UIP conflict analysis
+    @ param:    confl: conflicting clause
+    @ return:   learnt: learnt clause with the asserting literal first
+                bt_level: level to jump back to
+    '''
+    def analyze(self,confl):
+        seen = self.seen
+        level = self.level
+        cur_level = len(self.trail_lim)
+        learnt = [0]
+        counter = 0
+        p = None
+        idx = len(self.trail)-1
+        clause = confl
+        while True:
+            for q in (clause if p is None else clause[1:]):
+                v = q>>1
+                if (not seen[v]) and (level[v] > 0):
+                    seen[v] = True
+                    self.bump(v)
+                    if level[v] >= cur_level:
+                        counter += 1
+                    else:
+                        learnt.append(q)
+            while not seen[self.trail[idx]>>1]:
+                idx -= 1
+            p = self.trail[idx]
+            idx -= 1
+            clause = self.reason[p>>1]
+            seen[p>>1] = False
+            counter -= 1
+            if counter == 0:
+                break
+        learnt[0] = p^1
+        for q in learnt[1:]:
+            seen[q>>1] = False
+
+        bt_level = 0
+        if len(learnt) > 1:
+            best = 1
+            for k in range(2,len(learnt)):
+                if level[learnt[k]>>1] > level[learnt[best]>>1]:
+                    best = k
+            learnt[1],learnt[best] = learnt[best],learnt[1]
+            bt_level = level[learnt[1]>>1]
+        return learnt,bt_level
+
+    def cancel_until(self,lvl):
+        if len(self.trail_lim) <= lvl:
+            return
+        for k in range(len(self.trail)-1,self.trail_lim[lvl]-1,-1):
+            x = self.trail[k]
+            v = x>>1
+            self.lval[x] = 0
+            self.lval[x^1] = 0
+            self.reason[v] = None
+            # phase saving
+            self.polarity[v] = (x & 1) == 0
+            if v not in self.order:
+                self.order.update(v,-self.activity[v])
+        del self.trail[self.trail_lim[lvl]:]
+        del self.trail_lim[lvl:]
+        self.qhead = len(self.trail)
+
+    def pick_branch(self):
+        order = self.order
+        while len(order) > 0:
+            v = order.top()
+            order.remove(v)
+            if self.lval[2*v] == 0:
+                return v
+        return None
+
+    '''
+    @ function: drop the less useful half of the learnt clauses at level 0
+    @ param:    none
+    @ return:   none
+    '''
+    def reduce_db(self):
+        self.learnts.sort(key=lambda c:(self.lbd[id(c)],len(c)))
+        keep = self.learnts[:len(self.learnts)//2]
+        keep += [c for c in self.learnts[len(self.learnts)//2:] if self.lbd[id(c)] <= 2]
+        self.lbd = {id(c):self.lbd[id(c)] for c in keep}
+        self.learnts = keep
+        for ws in self.watches:
+            del ws[:]
+        for c in self.clauses+self.learnts:
+            # move non-false literals to the watched positions
+            c.sort(key=lambda x:self.lval[x] == -1)
+            self.watches[c[0]^1].append(c)
+            self.watches[c[1]^1].append(c)
+        self.max_learnts = int(self.max_learnts*1.1)
+
+    '''
+    @ function: CDCL search until a model, a refutation or a restart
+    @ param:    nof_conflicts: conflicts allowed before restart
+                budget: total conflicts allowed, None for unlimited
+    @ return:   True, False, or None for restart / out of budget
+    '''
+    def search(self,nof_conflicts,budget):
+        count = 0
+        while True:
+            confl = self.propagate()
+            if confl is not None:
+                self.conflicts += 1
+                count += 1
+                if len(self.trail_lim) == 0:
+                    self.ok = False
+                    return False
+                learnt,bt_level = self.analyze(confl)
+                self.cancel_until(bt_level)
+                if len(learnt) == 1:
+                    self.enqueue(learnt[0],None)
+                else:
+                    self.learnts.append(learnt)
+                    self.lbd[id(learnt)] = len(set(self.level[x>>1] for x in learnt))
+                    self.watches[learnt[0]^1].append(learnt)
+                    self.watches[learnt[1]^1].append(learnt)
+                    self.enqueue(learnt[0],learnt)
+                self.var_inc /= self.var_decay
+            else:
+                if (count >= nof_conflicts) or ((budget is not None) and (self.conflicts >= budget)):
+                    self.cancel_until(0)
+                    return None
+                v = self.pick_branch()
+                if v is None:
+                    self.model = [False]+[self.lval[2*u] == 1 for u in range(1,self.nvars+1)]
+                    self.cancel_until(0)
+                    return True
+                self.decisions += 1
+                self.trail_lim.append(len(self.trail))
+                self.enqueue(2*v if self.polarity[v] else 2*v+1,None)
+
+    '''
+    @ function: solve the current formula
+    @ param:    budget: total conflicts allowed, None for unlimited
+    @ return:   True if satisfiable (model in self.model), False if not,
+                None if the budget ran out
+    '''
+    def solve(self,budget=None):
+        if not self.ok:
+            return False
+        self.cancel_until(0)
+        if self.propagate() is not None:
+            self.ok = False
+            return False
+        while True:
+            self.restarts += 1
+            status = self.search(luby(self.restarts)*100,budget)
+            if status is not None:
+                return status
+            if (budget is not None) and (self.conflicts >= budget):
+                return None
+            if len(self.learnts) > self.max_learnts:
+                self.reduce_db()
+
+    '''
+    @ function: value of a variable in the last model
+    @ param:    v: variable index
+    @ return:   boolean value
+    '''
+    def value(self,v):
+        return self.model[v]
+
+
+# direction types of a path cell, as the two neighbors it links to
+DIRECTION = [((0,-1),(0,1)),((-1,0),(1,0)),((-1,0),(0,-1)),((-1,0),(0,1)),((1,0),(0,-1)),((1,0),(0,1))]
+
+
+'''
+@ class:    CNF encoding of a puzzle.
+            x(cell,color) is true when the cell has that color, and every
+            non source cell picks one direction type linking it to exactly two
+            neighbors of its own color.
+@ param:    start_state: initial state
+            source: Array of color source
+            value: Array of color value in puzzle
+'''
+class FlowEncoding:
+    def __init__(self,start_state,source,value):
+        self.start_state = start_state
+        self.rows = start_state.shape[0]
+        self.cols = start_state.shape[1]
+        self.value = [int(v) for v in value]
+        self.source = source
+        self.clauses = []
+        self.nvars = self.rows*self.cols*len(self.value)
+        self.direction = {}
+        self.build()
+
+    def x(self,row,col,k):
+        return 1+(row*self.cols+col)*len(self.value)+k
+
+    def neighbor(self,row,col):
+        return adjacency(self.rows,self.cols).pos[row*self.cols+col]
+
+    def exactly_one(self,lits):
+        self.clauses.append(list(lits))
+        for i in range(len(lits)):
+            for j in range(i+1,len(lits)):
+                self.clauses.append([-lits[i],-lits[j]])
+
+    def build(self):
+        K = len(self.value)
+        color_index = {v:k for k,v in enumerate(self.value)}
+        for row in range(self.rows):
+            for col in range(self.cols):
+                # one color per cell
+                self.exactly_one([self.x(row,col,k) for k in range(K)])
+                neighbor = self.neighbor(row,col)
+
+                # source: fixed color with exactly one same color neighbor
+                if self.start_state[row,col] != 0:
+                    k = color_index[int(self.start_state[row,col])]
+                    self.clauses.append([self.x(row,col,k)])
+                    self.exactly_one([self.x(n[0],n[1],k) for n in neighbor])
+                    continue
+
+                # path: one direction type, linked neighbors share the color
+                types = []
+                for t,(a,b) in enumerate(DIRECTION):
+                    link = [[row+a[0],col+a[1]],[row+b[0],col+b[1]]]
+                    if (link[0] not in neighbor) or (link[1] not in neighbor):
+                        continue
+                    self.nvars += 1
+                    d = self.nvars
+                    self.direction[(row,col,t)] = d
+                    types.append(d)
+                    for n in neighbor:
+                        for k in range(K):
+                            if n in link:
+                                self.clauses.append([-d,-self.x(row,col,k),self.x(n[0],n[1],k)])
+                                self.clauses.append([-d,self.x(row,col,k),-self.x(n[0],n[1],k)])
+                            else:
+                                self.clauses.append([-d,-self.x(row,col,k),-self.x(n[0],n[1],k)])
+                self.exactly_one(types)
+
+        # a 2x2 block of one color always closes a cycle
+        for row in range(self.rows-1):
+            for col in range(self.cols-1):
+                for k in range(K):
+                    self.clauses.append([-self.x(row,col,k),-self.x(row+1,col,k),
+                                         -self.x(row,col+1,k),-self.x(row+1,col+1,k)])
+
+    '''
+    @ function: decode a model into the puzzle grid
+    @ param:    model: Array of variable value
+    @ return:   matrix of solution
+    '''
+    def decode(self,model):
+        output = np.zeros((self.rows,self.cols),dtype=np.uint8)
+        for row in range(self.rows):
+            for col in range(self.cols):
+                for k in range(len(self.value)):
+                    if model[self.x(row,col,k)]:
+                        output[row,col] = self.value[k]
+        return output
+
+    '''
+    @ function: find cycles in a decoded solution
+    @ param:    solution: matrix of solution
+                model: Array of variable value
+    @ return:   Array of clause, each forbidding the direction types of one cycle
+    '''
+    def cycle_clauses(self,solution,model):
+        visit = np.zeros(solution.shape,dtype=bool)
+        for i in range(0,len(self.source),2):
+            # walk from one source to the other
+            prev = None
+            cur = [self.source[i][0],self.source[i][1]]
+            while cur is not None:
+                visit[cur[0],cur[1]] = True
+                step = None
+                for n in self.neighbor(cur[0],cur[1]):
+                    if (n != prev) and (not visit[n[0],n[1]]) and (solution[n[0],n[1]] == solution[cur[0],cur[1]]):
+                        step = n
+                        break
+                prev = cur
+                cur = step
+
+        output = []
+        for row in range(self.rows):
+            for col in range(self.cols):
+                if visit[row,col]:
+                    continue
+                # collect the cycle through this cell
+                clause = []
+                stack = [[row,col]]
+                visit[row,col] = True
+                while stack:
+                    cur = stack.pop()
+                    for t in range(len(DIRECTION)):
+                        d = self.direction.get((cur[0],cur[1],t))
+                        if (d is not None) and model[d]:
+                            clause.append(-d)
+                    for n in self.neighbor(cur[0],cur[1]):
+                        if (not visit[n[0],n[1]]) and (solution[n[0],n[1]] == solution[cur[0],cur[1]]):
+                            visit[n[0],n[1]] = True
+                            stack.append(n)
+                if len(clause):
+                    output.append(clause)
+        return output
+
+    '''
+    @ function: write the encoding in DIMACS format
+    @ param:    path: output file path
+    @ return:   none
+    '''
+    def write_dimacs(self,path):
+        file = open(path,'w')
+        file.write("p cnf %d %d\n" % (self.nvars,len(self.clauses)))
+        for clause in self.clauses:
+            file.write(' '.join(str(x) for x in clause)+" 0\n")
+        file.close()
+
+
+'''
+@ function: solve a puzzle through the SAT encoding, removing cycles lazily
+@ param:    start_state: initial state
+            source: Array of color source
+            value: Array of color value in puzzle
+            dimacs: optional file path to write the base encoding to
+            budget: total conflicts allowed, None for unlimited
+@ return:   solution: matrix of solution or None
+            solver: Solver holding the search statistics
+            status: 'solved', 'unsat' or 'budget' when the budget ran out
+                    before the puzzle was settled
+'''
+def solve_sat(start_state,source,value,dimacs=None,budget=None):
+    source = sorted(source,key=lambda list:list[2])
+    encoding = FlowEncoding(start_state,source,value)
+    if dimacs is not None:
+        encoding.write_dimacs(dimacs)
+
+    solver = Solver()
+    for _ in range(encoding.nvars):
+        solver.new_var()
+    for clause in encoding.clauses:
+        solver.add_clause(clause)
+
+    while True:
+        status = solver.solve(budget)
+        if status is None:
+            return None,solver,'budget'
+        if not status:
+            return None,solver,'unsat'
+        solution = encoding.decode(solver.model)
+        cycles = encoding.cycle_clauses(solution,solver.model)
+        if len(cycles) == 0:
+            return solution,solver,'solved'
+        for clause in cycles:
+            encoding.clauses.append(clause)
+            solver.add_clause(clause)
+
+
+
+'''
+@ function: count solutions of a puzzle up to a limit, by blocking every
+            solution found and solving again
+@ param:    start_state: initial state
+            source: Array of color source
+            value: Array of color value in puzzle
+            limit: stop counting at this many solutions
+            budget: conflict budget of each solve, None for no limit
+@ return:   number of solutions found, None when the budget ran out first
+'''
+def count_solutions(start_state,source,value,limit=2,budget=None):
+    source = sorted(source,key=lambda list:list[2])
+    encoding = FlowEncoding(start_state,source,value)
+    solver = Solver()
+    for _ in range(encoding.nvars):
+        solver.new_var()
+    for clause in encoding.clauses:
+        solver.add_clause(clause)
+
+    count = 0
+    while count < limit:
+        status = solver.solve(budget)
+        if status is None:
+            return None
+        if not status:
+            break
+        solution = encoding.decode(solver.model)
+        cycles = encoding.cycle_clauses(solution,solver.model)
+        for clause in cycles:
+            solver.add_clause(clause)
+        if len(cycles) > 0:
+            continue
+        count += 1
+        # no other solution may give every cell the same color
+        block = []
+        for row in range(encoding.rows):
+            for col in range(encoding.cols):
+                if start_state[row,col] == 0:
+                    block.append(-encoding.x(row,col,encoding.value.index(int(solution[row,col]))))
+        if len(block) == 0:
+            break
+        solver.add_clause(block)
+    return count
+
+if __name__ == "__main__":
+    puzzle = read_puzzles(sys.argv[1])
+    start_state,source,value = build_Start_State(puzzle)
+    start_time = time.time()
+    solution,solver,status = solve_sat(start_state,source,value,sys.argv[2] if len(sys.argv) > 2 else None)
+    if solution is None:
+        print("No solution")
+    else:
+        print_solution(solution)
+    print("Time used:",time.time()-start_time)
+    print("Conflicts:",solver.conflicts,"Decisions:",solver.decisions)
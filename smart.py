@@ -1,7 +1,14 @@
 
 import numpy as np
+import sys
 import time
 from copy import deepcopy
+import bitboard
+from bitboard import BitBoard
+import kernels
+from adjacency import adjacency
+from zobrist import TranspositionTable
+from unionfind import UnionFind
 
 
 '''
@@ -81,20 +88,8 @@ def build_Start_State(rawPuzzle):
 @ return:   output: Array of neighbor color value
 ''' 
 def neighbour(location,state):
-    output = []
-    if location[0]>0:
-        output.append(state[location[0]-1,location[1]])
-
-    if location[0]<state.shape[1]-1:
-        output.append(state[location[0]+1,location[1]])
-
-    if location[1]>0:
-        output.append(state[location[0],location[1]-1])
-
-    if location[1]<state.shape[0]-1:
-        output.append(state[location[0],location[1]+1])
-
-    return output
+    adj = adjacency(state.shape[0],state.shape[1])
+    return [state[loc[0],loc[1]] for loc in adj.pos[location[0]*adj.cols+location[1]]]
 
 
 '''
@@ -105,37 +100,17 @@ def neighbour(location,state):
             nonzero: Array of assigned neighbor color
 ''' 
 def find_neighbor(state,cur):
-    row = cur[0]
-    col = cur[1]
     zero = []
     nonzero = []
-    # bottom neighbor
-    if row < state.shape[0]-1:
-        if state[row+1,col] != 0:
+    adj = adjacency(state.shape[0],state.shape[1])
+    for loc in adj.pos[cur[0]*adj.cols+cur[1]]:
+        color = state[loc[0],loc[1]]
+        if color != 0:
             # [color]
-            nonzero.append(state[row+1,col])
+            nonzero.append(color)
         else:
             # [row,col]
-            zero.append([row+1,col])
-    # top neighbor
-    if row > 0:
-        if state[row-1,col] != 0:
-            nonzero.append(state[row-1,col])
-        else:
-            zero.append([row-1,col])
-    # right neighbor
-    if col < state.shape[1]-1:
-        if state[row,col+1] != 0:
-            nonzero.append(state[row,col+1])
-        else:
-            zero.append([row,col+1])
-    # left neighbor
-    if col > 0:
-        if state[row,col-1] != 0:
-            nonzero.append(state[row,col-1])
-        else:
-            zero.append([row,col-1]) 
-
+            zero.append(loc)
     return zero,nonzero
 
 
@@ -147,33 +122,12 @@ def find_neighbor(state,cur):
 @ return:   boolean value of current consistency        
 ''' 
 def is_consistent(state,start_state,source):
-    for i in range(state.shape[0]):
-        for j in range(state.shape[1]):
-
-            cur = state[i,j]
-            zero,nonzero = find_neighbor(state,[i,j])
-            color,count = np.unique(nonzero,return_counts=True)
-            num = len(zero)+len(nonzero)
-            # check assigned variable
-            if cur != 0:
-                if(len(zero)==0) and (cur not in color):
-                        return False
-                # check path zig-zag
-                if start_state[i,j] == 0:
-                    if count[color==cur] > 2:
-                        return False
-                # check source zig-zag
-                else:
-                    if count[color==cur] > 1:
-                        return False
-            # check unassigned variable            
-            else:
-                if(len(zero)==0):
-                    if(len(color)==num):
-                        return False
-                    temp = color[count>2]
-                    if len(temp) > 0:
-                        return False
+    global check_counter
+    check_counter += 1
+    if isinstance(state,BitBoard):
+        return bitboard.is_consistent(state,start_state,source,strict=False)
+    if not kernels.check_grid(state,start_state,strict=False):
+        return False
     # forward checking                  
     return checkLink(state,source)
 
@@ -185,23 +139,9 @@ def is_consistent(state,start_state,source):
 @ return:   boolean value of current completeness
 ''' 
 def is_complete(state,start_state):
-    # check for unassigned variable
-    if 0 in state:
-        return False
-    # check color path
-    for row in range(state.shape[0]):
-        for col in range(state.shape[0]):
-            neighbor = neighbour([row,col],state)
-            color,count = np.unique(neighbor,return_counts=True)
-            # check path
-            if start_state[row,col] == 0:
-                if count[color==state[row,col]] != 2:
-                    return False
-            # check source
-            else:
-                if count[color==start_state[row,col]] != 1:
-                    return False
-    return True
+    if isinstance(state,BitBoard):
+        return bitboard.is_complete(state,start_state)
+    return kernels.complete_grid(state,start_state) == 2
 
 
 '''
@@ -209,9 +149,11 @@ def is_complete(state,start_state):
 @ param:    state: current state
             value: Array of all color value
             connected: Array of value that should not be used
-@ return:   variable with most assignable value
+@ return:   variable with most assignable value, None when no cell is left
 ''' 
 def select_variable(state,value,connected):
+    if isinstance(state,BitBoard):
+        return bitboard.select_variable(state,value,connected)
     variable = np.column_stack(np.where(state==0))
     output = []
     for var in variable:
@@ -232,6 +174,9 @@ def select_variable(state,value,connected):
                 color.remove(i)
         output.append([var[0],var[1],color])
 
+    # a full board that is not complete has nothing left to assign
+    if len(output) == 0:
+        return None
     output = sorted(output,key=lambda list:len(list[2]))
     return output[0]
 
@@ -251,29 +196,41 @@ def select_value(var):
             start_state: initial state
             source: Array of color source
             value: Array of all color value
-            visit: Set of visited state
+            visit: TranspositionTable of visited state
+            key: hash value of current state, None to hash it from scratch
+            depth: current search depth
+            uf: UnionFind of current state, None to build it from scratch
 @ return:   Array of assignable value
 ''' 
-def recursive_backtrack(state,start_state,source,value,visit):
+def recursive_backtrack(state,start_state,source,value,visit,key=None,depth=0,uf=None):
     global bt_counter
     if is_complete(state,start_state):
         return state
-    connected = checkColor(state,source)
+    if key is None:
+        key = visit.hash(state)
+    if uf is None:
+        uf = UnionFind.from_state(state)
+    connected = checkColor(state,source,uf)
     var = select_variable(state,value,connected)
+    if var is None:
+        return None
 
     for val in select_value(var):
-        state[var[0],var[1]] = val
-        record = state.tostring()
-        if record not in visit:
-            visit.add(record)
-        else:
+        record = visit.toggle(key,var[0],var[1],val)
+        snapshot = visit.snapshot(state,var[0],var[1],val)
+        if visit.seen(record,snapshot):
             continue
+        visit.add(record,depth,snapshot)
+        state[var[0],var[1]] = val
 
         if is_consistent(state,start_state,source):
-            result = recursive_backtrack(state,start_state,source,value,visit)
+            mark = uf.mark()
+            uf.link(state,var)
+            result = recursive_backtrack(state,start_state,source,value,visit,record,depth+1,uf)
             bt_counter += 1
             if result is not None:
                 return result
+            uf.undo(mark)
         state[var[0],var[1]] = 0
 
     return None
@@ -328,23 +285,23 @@ def forced_iter(state,forced):
 @ return:   boolean value of forward checking consistency
 '''
 def checkLink(state,source):
-    for i in range(0,len(source),2):
-        start = [source[i][0],source[i][1]]
-        goal = [source[i+1][0],source[i+1][1]]
-        # use BFS to check linkage
-        if not BFS(state,start,goal):
-            return False
-
-    return True
+    # one region labeling pass instead of a BFS per color pair
+    return kernels.link_grid(state,source)
 
 
 '''
 @ function: helper function that checks completed color value
 @ param:    state: current state
             source: Array of color source
+            uf: UnionFind of the state, None to search with BFS
 @ return:   Array of color value that is completed hence should not be used anymore
 '''
-def checkColor(state,source):
+def checkColor(state,source,uf=None):
+    if uf is not None:
+        return [source[i][2] for i in range(0,len(source),2)
+                if uf.connected(source[i][0]*uf.cols+source[i][1],source[i+1][0]*uf.cols+source[i+1][1])]
+    if isinstance(state,BitBoard):
+        return bitboard.checkColor(state,source)
     connected = []
     for i in range(0,len(source),2):
         start = [source[i][0],source[i][1]]
@@ -363,20 +320,8 @@ def checkColor(state,source):
 @ return:   output: Array of neighbor index
 '''
 def bfs_neighbor(location,puzzles):
-    output = []
-    if location[0]>0:
-        output.append([location[0]-1,location[1]])
-
-    if location[0]<puzzles.shape[1]-1:
-        output.append([location[0]+1,location[1]])
-
-    if location[1]>0:
-        output.append([location[0],location[1]-1])
-
-    if location[1]<puzzles.shape[0]-1:
-        output.append([location[0],location[1]+1])
-
-    return output
+    adj = adjacency(puzzles.shape[0],puzzles.shape[1])
+    return adj.pos[location[0]*adj.cols+location[1]]
 
 
 '''
@@ -446,24 +391,28 @@ def BFScolor(state,start,goal):
 
 ###########################################################################
 
-puzzle = read_puzzles("input991.txt")
-start_state,source,value = build_Start_State(puzzle)
-source = sorted(source,key=lambda list:list[2])
-visit = set()
-state = deepcopy(start_state)
-
-print_puzzles(puzzle)
-print("Start State")
-print(state,'\n')
-
 bt_counter = 0
-start_time = time.time()
-state = forced_move(state,source)
-print("Forced State")
-print(state,'\n')
-
-solution = recursive_backtrack(state,start_state,source,value,visit)
-print("Goal State")
-print(solution,'\n')
-print("Time used:",time.time()-start_time)
-print("Total iteration:",bt_counter)
\ No newline at end of file
+check_counter = 0
+
+if __name__ == "__main__":
+    puzzle = read_puzzles(sys.argv[1] if len(sys.argv) > 1 else "input991.txt")
+    start_state,source,value = build_Start_State(puzzle)
+    source = sorted(source,key=lambda list:list[2])
+    visit = TranspositionTable()
+    state = deepcopy(start_state)
+
+    print_puzzles(puzzle)
+    print("Start State")
+    print(state,'\n')
+
+    start_time = time.time()
+    state = forced_move(state,source)
+    print("Forced State")
+    print(state,'\n')
+
+    solution = recursive_backtrack(state,start_state,source,value,visit)
+    print("Goal State")
+    print(solution,'\n')
+    print("Time used:",time.time()-start_time)
+    print("Total iteration:",bt_counter)
+    print("Visited states:",visit.stats())
@@ -1,7 +1,16 @@
 
 import numpy as np
+import sys
 import time
 from copy import deepcopy
+import bitboard
+from bitboard import BitBoard
+import kernels
+from adjacency import adjacency
+from zobrist import TranspositionTable
+from unionfind import UnionFind
+from domain import Domains
+import ordering
 
 
 '''
@@ -80,20 +89,8 @@ def build_Start_State(rawPuzzle):
 @ return:   output: Array of neighbor color value
 ''' 
 def neighbour(location,state):
-    output = []
-    if location[0]>0:
-        output.append(state[location[0]-1,location[1]])
-
-    if location[0]<state.shape[1]-1:
-        output.append(state[location[0]+1,location[1]])
-
-    if location[1]>0:
-        output.append(state[location[0],location[1]-1])
-
-    if location[1]<state.shape[0]-1:
-        output.append(state[location[0],location[1]+1])
-
-    return output
+    adj = adjacency(state.shape[0],state.shape[1])
+    return [state[loc[0],loc[1]] for loc in adj.pos[location[0]*adj.cols+location[1]]]
 
 
 '''
@@ -104,94 +101,158 @@ def neighbour(location,state):
             nonzero: Array of assigned neighbor color
 ''' 
 def find_neighbor(state,cur):
-    row = cur[0]
-    col = cur[1]
     zero = []
     nonzero = []
-    # bottom neighbor
-    if row < state.shape[0]-1:
-        if state[row+1,col] != 0:
+    adj = adjacency(state.shape[0],state.shape[1])
+    for loc in adj.pos[cur[0]*adj.cols+cur[1]]:
+        color = state[loc[0],loc[1]]
+        if color != 0:
             # [color]
-            nonzero.append(state[row+1,col])
+            nonzero.append(color)
         else:
             # [row,col]
-            zero.append([row+1,col])
-    # top neighbor
-    if row > 0:
-        if state[row-1,col] != 0:
-            nonzero.append(state[row-1,col])
-        else:
-            zero.append([row-1,col])
-    # right neighbor
-    if col < state.shape[1]-1:
-        if state[row,col+1] != 0:
-            nonzero.append(state[row,col+1])
-        else:
-            zero.append([row,col+1])
-    # left neighbor
-    if col > 0:
-        if state[row,col-1] != 0:
-            nonzero.append(state[row,col-1])
-        else:
-            zero.append([row,col-1]) 
-
+            zero.append(loc)
     return zero,nonzero
 
 
+'''
+@ function: check single variable consistency w.r.t constraints
+@ param:    state: current state
+            start_state: initial state
+            cur: query position index
+@ return:   boolean value of variable consistency
+'''
+def check_variable(state,start_state,cur):
+    i = cur[0]
+    j = cur[1]
+    value = state[i,j]
+    zero,nonzero = find_neighbor(state,[i,j])
+    color,count = np.unique(nonzero,return_counts=True)
+    num = len(zero)+len(nonzero)
+    # check assigned variable
+    if value != 0:
+        # if no same color neighbor
+        if value not in color:
+            # if no empty neighbor
+            if len(zero) == 0:
+                return False
+            # if one empty neighbor and it is not source
+            elif (len(zero)==1) and (start_state[i,j]==0):
+                return False
+        # if has same color neighbor
+        else:
+            # if not source
+            if start_state[i,j] == 0:
+                # if no empty neighbor and one same color neighbor
+                if (len(zero)==0) and (count[color==value]==1):
+                    return False
+                # check path zig-zag
+                if count[color==value] > 2:
+                    return False
+            # if source
+            else:
+                # check source zig-zag
+                if count[color==value] > 1:
+                    return False
+    # check unassigned variable
+    else:
+        # if no empty neighbor
+        if len(zero) == 0:
+            # if neighbot color unique
+            if len(color) == num:
+                return False
+            elif (len(color)==1) and ((num==3) or (num==4)):
+                return False
+            # if neighbor has
+            if len(color[count>2]) > 0:
+                return False
+    return True
+
+
 '''
 @ function: check state consistency w.r.t constraints
 @ param:    state: current state
             start_state: initial state
             source: Array of color source
-@ return:   boolean value of current consistency        
-''' 
-def is_consistent(state,start_state,source):
-    for i in range(state.shape[0]):
-        for j in range(state.shape[1]):
+            cur: position index of last assignment, None for full scan
+@ return:   boolean value of current consistency
+'''
+def is_consistent(state,start_state,source,cur=None):
+    global check_counter
+    check_counter += 1
+    if isinstance(state,BitBoard):
+        return bitboard.is_consistent(state,start_state,source)
+    # incremental check
+    if cur is not None:
+        return is_consistent_local(state,start_state,source,cur)
+
+    if not kernels.check_grid(state,start_state):
+        prune_counter['local'] += 1
+        return False
+    # forward checking
+    return checkLink(state,source,None,start_state)
 
-            cur = state[i,j]
-            zero,nonzero = find_neighbor(state,[i,j])
-            color,count = np.unique(nonzero,return_counts=True)
-            num = len(zero)+len(nonzero)
-            # check assigned variable
-            if cur != 0:
-                # if no same color neighbor
-                if cur not in color:
-                    # if no empty neighbor
-                    if len(zero) == 0:
-                        return False
-                    # if one empty neighbor and it is not source
-                    elif (len(zero)==1) and (start_state[i,j]==0):
-                        return False
-                # if has same color neighbor
-                else:
-                    # if not source
-                    if start_state[i,j] == 0:
-                        # if no empty neighbor and one same color neighbor
-                        if (len(zero)==0) and (count[color==state[i,j]]==1):
-                            return False
-                        # check path zig-zag
-                        if count[color==cur] > 2:
-                            return False
-                    # if source
-                    else:
-                        # check source zig-zag
-                        if count[color==cur] > 1:
-                            return False
-            # check unassigned variable            
-            else:
-                # if no empty neighbor
-                if len(zero) == 0:
-                    # if neighbot color unique
-                    if len(color) == num:
-                        return False
-                    elif (len(color)==1) and ((num==3) or (num==4)):
-                        return False
-                    # if neighbor has
-                    if len(color[count>2]) > 0:
-                        return False
-    # forward checking                  
-    return checkLink(state,source)
+
+'''
+@ function: check state consistency around the last assignment only,
+            assuming the state before that assignment was consistent
+@ param:    state: current state
+            start_state: initial state
+            source: Array of color source
+            cur: position index of last assignment
+@ return:   boolean value of current consistency
+'''
+def is_consistent_local(state,start_state,source,cur):
+    # only the assigned variable and its neighbors can change status
+    if not check_variable(state,start_state,cur):
+        prune_counter['local'] += 1
+        return False
+    for loc in bfs_neighbor(cur,state):
+        if not check_variable(state,start_state,loc):
+            prune_counter['local'] += 1
+            return False
+    # one labeling pass checks every color about as fast as a few
+    return checkLink(state,source,None,start_state,[cur[0]*state.shape[1]+cur[1]])
+
+
+'''
+@ function: check state consistency around a batch of assignments, the
+            stored nogoods on the changed cells, the local rules on every
+            changed cell and its neighbors, then one forward check for the
+            whole batch. culprit is set to the cells whose colors explain a
+            failure, None when it takes the whole state.
+@ param:    state: current state
+            start_state: initial state
+            source: Array of color source
+            cells: Array of cell index in row major order just assigned
+            cols: number of columns of the state
+@ return:   boolean value of current consistency
+'''
+def is_consistent_batch(state,start_state,source,cells,cols):
+    global check_counter,culprit
+    check_counter += 1
+    culprit = None
+    if nogoods is not None:
+        found = nogoods.find(state,cells,cols)
+        if found is not None:
+            prune_counter['nogood'] += 1
+            culprit = [y for y,_ in found]
+            return False
+    if isinstance(state,BitBoard):
+        return bitboard.is_consistent(state,start_state,source)
+    seen = set()
+    for x in cells:
+        cur = [x//cols,x%cols]
+        for loc in [cur]+bfs_neighbor(cur,state):
+            if tuple(loc) in seen:
+                continue
+            seen.add(tuple(loc))
+            if not check_variable(state,start_state,loc):
+                prune_counter['local'] += 1
+                # the rules only read the cell and its neighbors
+                culprit = [y[0]*cols+y[1] for y in [loc]+bfs_neighbor(loc,state)]
+                return False
+    return checkLink(state,source,None,start_state,cells)
 
 
 '''
@@ -201,23 +262,9 @@ def is_consistent(state,start_state,source):
 @ return:   boolean value of current completeness
 ''' 
 def is_complete(state,start_state):
-    # check for unassigned variable
-    if 0 in state:
-        return False
-    # check color path
-    for row in range(state.shape[0]):
-        for col in range(state.shape[0]):
-            neighbor = neighbour([row,col],state)
-            color,count = np.unique(neighbor,return_counts=True)
-            # check path
-            if start_state[row,col] == 0:
-                if count[color==state[row,col]] != 2:
-                    return False
-            # check source
-            else:
-                if count[color==start_state[row,col]] != 1:
-                    return False
-    return True
+    if isinstance(state,BitBoard):
+        return bitboard.is_complete(state,start_state)
+    return kernels.complete_grid(state,start_state) == 2
 
 
 '''
@@ -225,9 +272,14 @@ def is_complete(state,start_state):
 @ param:    state: current state
             value: Array of all color value
             connected: Array of value that should not be used
-@ return:   variable with most assignable value
+            domains: Domains of the state, None to build color lists here
+@ return:   variable with most assignable value, None when no cell is left
 ''' 
-def select_variable(state,value,connected):
+def select_variable(state,value,connected,domains=None):
+    if domains is not None:
+        return select_domain(state,domains)
+    if isinstance(state,BitBoard):
+        return bitboard.select_variable(state,value,connected)
     variable = np.column_stack(np.where(state==0))
     output = []
     for var in variable:
@@ -248,49 +300,286 @@ def select_variable(state,value,connected):
                 color.remove(i)
         output.append([var[0],var[1],color])
 
+    # a full board that is not complete has nothing left to assign
+    if len(output) == 0:
+        return None
     output = sorted(output,key=lambda list:len(list[2]))
     return output[0]
 
 
+'''
+@ function: select the empty cell next to a flow with the smallest domain,
+            the top of the domain heap
+@ param:    state: current state
+            domains: Domains of the state
+@ return:   variable as [row,col,Array of color value], colors of more
+            neighbors first, None when no cell is left
+'''
+def select_domain(state,domains):
+    x = domains.select()
+    if x is None:
+        return None
+    count = {}
+    for y in domains.neighbor(x):
+        color = int(state[divmod(y,domains.cols)])
+        if color != 0:
+            count[color] = count.get(color,0)+1
+    bits = domains.options(x)
+    output = [c for _,c in sorted([(n,c) for c,n in count.items()],reverse=True) if bits & domains.bit.get(c,0)]
+    output += [c for c in domains.colors(bits) if c not in output]
+    return [x//domains.cols,x%domains.cols,output]
+
+
 '''
 @ function: find assignable value given a variable
 @ param:    var: current variable
-@ return:   Array of assignable value
+            state: current state, None to keep the order of var
+            domains: Domains of the state
+            uf: UnionFind of the state
+@ return:   Array of assignable value in the order of value_order
 ''' 
-def select_value(var):
-    return var[2]
+def select_value(var,state=None,domains=None,uf=None):
+    if (domains is None) or (value_order == 'neighbor'):
+        return var[2]
+    return ordering.ORDERING[value_order](var,state,domains,uf)
 
 
 '''
-@ function: recursive backtracking to find solution
+@ function: recursive backtracking to find solution. With use_backjump a
+            failed call leaves in conflict the decision depths its failure
+            follows from, a caller whose depth is not among them returns
+            at once, and a failure over few decisions goes to nogoods.
 @ param:    state: current state
             start_state: initial state
             source: Array of color source
             value: Array of all color value
-            visit: Set of visited state
+            visit: TranspositionTable of visited state
+            key: hash value of current state, None to hash it from scratch
+            depth: current search depth
+            uf: UnionFind of current state, None to build it from scratch
+            domains: Domains of current state, None to build and propagate
+                     them from scratch
 @ return:   Array of assignable value
 ''' 
-def recursive_backtrack(state,start_state,source,value,visit):
-    global bt_counter
+def recursive_backtrack(state,start_state,source,value,visit,key=None,depth=0,uf=None,domains=None):
+    global bt_counter,conflict
+    # without the depths behind a failure every earlier decision is suspect
+    conflict = (1 << depth)-1
+    if uf is None:
+        uf = UnionFind.from_state(state)
+    if domains is None:
+        # propagating every colored cell once also makes the forced moves
+        domains = Domains(state,start_state,source,value)
+        if use_backjump:
+            domains.track()
+        colored = [x for x in range(len(domains.dom)) if state[divmod(x,domains.cols)] != 0]
+        if domains.propagate(state,uf,colored) is None:
+            return None
+        if not is_consistent(state,start_state,source):
+            return None
     if is_complete(state,start_state):
+        if trace is not None:
+            trace.solved(depth)
         return state
-    connected = checkColor(state,source)
-    var = select_variable(state,value,connected)
-
-    for val in select_value(var):
-        state[var[0],var[1]] = val
-        record = state.tostring()
-        if record not in visit:
-            visit.add(record)
+    if key is None:
+        key = visit.hash(state)
+    var = select_variable(state,value,None,domains)
+    if var is None:
+        return None
+
+    x = var[0]*domains.cols+var[1]
+    tracked = domains.deps is not None
+    # depths behind the failure of every value of x, starting with the
+    # colors x can not take
+    below = (1 << depth)-1
+    found = domains.reason(state,x) if tracked else below
+    for val in select_value(var,state,domains,uf):
+        record = visit.toggle(key,var[0],var[1],val)
+        snapshot = visit.snapshot(state,var[0],var[1],val)
+        if trace is not None:
+            trace.decide(x,val,depth)
+        if visit.seen(record,snapshot):
+            if trace is not None:
+                trace.prune(x,depth,'visited')
+            found |= below
+            continue
+        visit.add(record,depth,snapshot)
+        mark = domains.mark()
+        uf_mark = uf.mark()
+        domains.decide(state,x,val,depth)
+        assigned = domains.propagate(state,uf,[x])
+
+        if (assigned is not None) and is_consistent_batch(state,start_state,source,[x]+assigned,domains.cols):
+            # the child state also holds the propagated cells
+            child = record
+            for y in assigned:
+                child = visit.toggle(child,y//domains.cols,y%domains.cols,state[y//domains.cols,y%domains.cols])
+            result = recursive_backtrack(state,start_state,source,value,visit,child,depth+1,uf,domains)
+            bt_counter += 1
+            if result is not None:
+                return result
+            if trace is not None:
+                trace.backtrack(x,depth)
+            failed = conflict
         else:
+            if trace is not None:
+                trace.prune(x,depth,'domain' if assigned is None else None)
+            if not tracked:
+                failed = 0
+            elif assigned is None:
+                failed = domains.conflict
+            elif culprit is None:
+                failed = below | (1 << depth)
+            else:
+                failed = domains.explain(state,culprit)
+        domains.undo(state,mark)
+        uf.undo(uf_mark)
+        if tracked and not (failed & (1 << depth)):
+            # x plays no part, its other values fail the same way
+            conflict = failed
+            return None
+        found |= failed & below
+
+    conflict = found
+    if tracked and (nogoods is not None):
+        nogoods.add(domains.literals(found))
+    return None
+
+
+'''
+@ function: follow a flow from its source along the same color
+@ param:    state: current state
+            start: source position where the walk starts
+            goal: source position of the same color
+@ return:   head: last position of the flow
+            done: boolean value of reaching goal
+'''
+def walk_flow(state,start,goal):
+    color = state[start[0],start[1]]
+    prev = None
+    cur = start
+    while cur != goal:
+        step = None
+        for loc in bfs_neighbor(cur,state):
+            if (loc != prev) and (state[loc[0],loc[1]] == color):
+                step = loc
+                break
+        if step is None:
+            return cur,False
+        prev = cur
+        cur = step
+    return cur,True
+
+
+'''
+@ function: build flow heads of every color pair
+@ param:    state: current state
+            source: Array of color source
+@ return:   Array of flow with each entry storing [head,tail,done]
+'''
+def flow_heads(state,source):
+    heads = []
+    for i in range(0,len(source),2):
+        start = [source[i][0],source[i][1]]
+        goal = [source[i+1][0],source[i+1][1]]
+        head,done = walk_flow(state,start,goal)
+        tail,_ = walk_flow(state,goal,start)
+        heads.append([head,tail,done])
+    return heads
+
+
+'''
+@ function: find moves that extend a flow head by one cell
+@ param:    state: current state
+            head: head position of the flow
+            tail: position the flow has to reach
+@ return:   Array of move with each entry storing [position,done]
+'''
+def head_moves(state,head,tail):
+    color = state[head[0],head[1]]
+    output = []
+    zero,nonzero = find_neighbor(state,head)
+    for move in zero:
+        done = False
+        valid = True
+        for loc in bfs_neighbor(move,state):
+            if (loc == head) or (state[loc[0],loc[1]] != color):
+                continue
+            # touching the tail finishes the flow, touching itself is a zig-zag
+            if loc == tail:
+                done = True
+            else:
+                valid = False
+        if valid:
+            output.append([move,done])
+    # try moves that finish the flow first
+    return sorted(output,key=lambda list:not list[1])
+
+
+'''
+@ function: backtracking that extends flows from their heads
+@ param:    state: current state
+            start_state: initial state
+            source: Array of color source
+            visit: TranspositionTable of visited state
+            heads: Array of flow head, None to build it from state
+            key: hash value of current state, None to hash it from scratch
+            depth: current search depth
+@ return:   solution state or None
+'''
+def head_backtrack(state,start_state,source,visit,heads=None,key=None,depth=0):
+    global bt_counter
+    if heads is None:
+        heads = flow_heads(state,source)
+    if key is None:
+        key = visit.hash(state)
+
+    # extend the unfinished flow with fewest moves
+    best = None
+    for i in range(len(heads)):
+        head,tail,done = heads[i]
+        if done:
+            continue
+        moves = head_moves(state,head,tail)
+        if (best is None) or (len(moves) < len(best[1])):
+            best = [i,moves]
+            if len(moves) == 0:
+                return None
+    if best is None:
+        if is_complete(state,start_state):
+            if trace is not None:
+                trace.solved(depth)
+            return state
+        return None
+
+    i,moves = best
+    head,tail,done = heads[i]
+    color = state[head[0],head[1]]
+    for move,finish in moves:
+        x = move[0]*state.shape[1]+move[1]
+        record = visit.toggle(key,move[0],move[1],color)
+        snapshot = visit.snapshot(state,move[0],move[1],color)
+        if trace is not None:
+            trace.decide(x,color,depth)
+        if visit.seen(record,snapshot):
+            if trace is not None:
+                trace.prune(x,depth,'visited')
             continue
+        visit.add(record,depth,snapshot)
+        state[move[0],move[1]] = color
 
-        if is_consistent(state,start_state,source):
-            result = recursive_backtrack(state,start_state,source,value,visit)
+        if is_consistent(state,start_state,source,move):
+            heads[i] = [move,tail,finish]
+            result = head_backtrack(state,start_state,source,visit,heads,record,depth+1)
             bt_counter += 1
             if result is not None:
                 return result
-        state[var[0],var[1]] = 0
+            heads[i] = [head,tail,done]
+            if trace is not None:
+                trace.backtrack(x,depth)
+        elif trace is not None:
+            trace.prune(x,depth)
+        state[move[0],move[1]] = 0
 
     return None
 
@@ -307,7 +596,8 @@ def forced_move(state,source):
         zero,nonzero = find_neighbor(state,[src[0],src[1]])
         color,count = np.unique(nonzero,return_counts=True)
         if (len(zero)==1):
-            if(src[2] in color) and (count[src[2]==color]>1):
+            # source already has its only same color neighbor
+            if(src[2] in color) and (count[src[2]==color]>0):
                 continue
             state[zero[0][0],zero[0][1]] = src[2]
             forced.append(zero[0])
@@ -341,16 +631,48 @@ def forced_iter(state,forced):
 @ function: forward checking helper function
 @ param:    state: current state
             source: Array of color source
+            colors: Set of color value to check, None for all colors
+            start_state: initial state, None to skip the region prunes
+            cells: Array of cell index just colored, None when the state
+                   before them was not checked
 @ return:   boolean value of forward checking consistency
 '''
-def checkLink(state,source):
-    for i in range(0,len(source),2):
-        start = [source[i][0],source[i][1]]
-        goal = [source[i+1][0],source[i+1][1]]
-        # use BFS to check linkage
-        if not BFS(state,start,goal):
-            return False
+def checkLink(state,source,colors=None,start_state=None,cells=None):
+    # one region labeling pass instead of a BFS per color pair
+    regions = kernels.region_graph(state)
+    if not kernels.link_grid(state,source,colors,regions):
+        prune_counter['link'] += 1
+        return False
+    if start_state is None:
+        return True
+    return checkPrune(state,start_state,source,regions,cells)
 
+
+'''
+@ function: prune states with a dead end cell, a stranded empty region or
+            an empty cell several colors must all run through. The state
+            before cells were colored passed the dead end and stranded
+            prunes, so those only look near the cells.
+@ param:    state: current state
+            start_state: initial state
+            source: Array of color source
+            regions: region_graph of the state
+            cells: Array of cell index just colored, None to look everywhere
+@ return:   boolean value of passing every prune
+'''
+def checkPrune(state,start_state,source,regions,cells=None):
+    finished = kernels.finished_color(state,source,regions)
+    ends = kernels.open_ends(state,start_state,finished)
+    area = None if cells is None else kernels.prune_area(state,cells,regions,finished)
+    if kernels.dead_end(state,ends,area):
+        prune_counter['dead_end'] += 1
+        return False
+    if kernels.stranded(state,ends,regions,area):
+        prune_counter['stranded'] += 1
+        return False
+    if use_bottleneck and kernels.bottleneck(state,source,regions):
+        prune_counter['bottleneck'] += 1
+        return False
     return True
 
 
@@ -358,9 +680,15 @@ def checkLink(state,source):
 @ function: helper function that checks completed color value
 @ param:    state: current state
             source: Array of color source
+            uf: UnionFind of the state, None to search with BFS
 @ return:   Array of color value that is completed hence should not be used anymore
 '''
-def checkColor(state,source):
+def checkColor(state,source,uf=None):
+    if uf is not None:
+        return [source[i][2] for i in range(0,len(source),2)
+                if uf.connected(source[i][0]*uf.cols+source[i][1],source[i+1][0]*uf.cols+source[i+1][1])]
+    if isinstance(state,BitBoard):
+        return bitboard.checkColor(state,source)
     connected = []
     for i in range(0,len(source),2):
         start = [source[i][0],source[i][1]]
@@ -379,20 +707,8 @@ def checkColor(state,source):
 @ return:   output: Array of neighbor index
 '''
 def bfs_neighbor(location,puzzles):
-    output = []
-    if location[0]>0:
-        output.append([location[0]-1,location[1]])
-
-    if location[0]<puzzles.shape[1]-1:
-        output.append([location[0]+1,location[1]])
-
-    if location[1]>0:
-        output.append([location[0],location[1]-1])
-
-    if location[1]<puzzles.shape[0]-1:
-        output.append([location[0],location[1]+1])
-
-    return output
+    adj = adjacency(puzzles.shape[0],puzzles.shape[1])
+    return adj.pos[location[0]*adj.cols+location[1]]
 
 
 '''
@@ -506,29 +822,50 @@ def BFScolor(state,start,goal):
 
 ###########################################################################
 
-puzzle = read_puzzles("input55.txt")
-start_state,source,value = build_Start_State(puzzle)
-source = sorted(source,key=lambda list:list[2])
-visit = set()
-state = deepcopy(start_state)
-# color_dict = build_color_dict(state,source,value)
-
-print_puzzles(puzzle)
-# print("Start State")
-# print(state,'\n')
-
-# # for k,v in color_dict.items():
-# #     print(k,v)
-
 bt_counter = 0
-start_time = time.time()
-state = forced_move(state,source)
-# print("Forced State")
-# print(state,'\n')
-
-solution = recursive_backtrack(state,start_state,source,value,visit)
-print_solution(solution)
-# print("Goal State")
-# print(solution,'\n')
-print("Time used:",time.time()-start_time)
-print("Total iteration:",bt_counter)
\ No newline at end of file
+check_counter = 0
+# states rejected by each rule of is_consistent
+prune_counter = {'local':0,'link':0,'dead_end':0,'stranded':0,'bottleneck':0,'nogood':0}
+# articulation point check in checkPrune, costs a labeling pass per cut cell
+use_bottleneck = True
+# tracelog.Trace the searches record into, None to record nothing
+trace = None
+# value ordering of select_value, a name in ordering.ORDERING
+value_order = 'neighbor'
+# conflict-directed backjumping in recursive_backtrack
+use_backjump = True
+# NogoodStore is_consistent_batch checks, None to check none
+nogoods = None
+# decision depths behind the last failed recursive_backtrack, as a bitmask
+conflict = 0
+# cells whose colors explain the last failed is_consistent_batch, None for all
+culprit = None
+
+if __name__ == "__main__":
+    puzzle = read_puzzles(sys.argv[1] if len(sys.argv) > 1 else "input55.txt")
+    start_state,source,value = build_Start_State(puzzle)
+    source = sorted(source,key=lambda list:list[2])
+    visit = TranspositionTable()
+    state = deepcopy(start_state)
+    # color_dict = build_color_dict(state,source,value)
+
+    print_puzzles(puzzle)
+    # print("Start State")
+    # print(state,'\n')
+
+    # # for k,v in color_dict.items():
+    # #     print(k,v)
+
+    start_time = time.time()
+    state = forced_move(state,source)
+    # print("Forced State")
+    # print(state,'\n')
+
+    solution = recursive_backtrack(state,start_state,source,value,visit)
+    print_solution(solution)
+    # print("Goal State")
+    # print(solution,'\n')
+    print("Time used:",time.time()-start_time)
+    print("Total iteration:",bt_counter)
+    print("Visited states:",visit.stats())
+    print("Prunes:",prune_counter)
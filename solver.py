@@ -0,0 +1,152 @@
+import signal
+import sys
+import threading
+import time
+from collections import OrderedDict
+
+import numpy as np
+
+import batch
+import engines
+import iterative
+import smarter
+from adjacency import adjacency
+from zobrist import TranspositionTable,Zobrist
+
+
+# engines that take a TranspositionTable from the solver
+VISITED = ['dumb','smart','smarter','head']
+
+# solvers kept by solve(), one per board shape, the least recently used
+# goes once there are more than SOLVER_LIMIT, each holds a Zobrist table of
+# 256 keys per cell
+SOLVER = OrderedDict()
+SOLVER_LIMIT = 8
+
+
+'''
+@ function: puzzle rows from a file path, Array of row string or matrix
+            of character
+@ param:    grid: puzzle
+@ return:   matrix of character in read_puzzles format
+'''
+def as_puzzle(grid):
+    if isinstance(grid,str):
+        return smarter.read_puzzles(grid)
+    rows = [list(row) for row in grid]
+    if (len(rows) == 0) or any([len(row) != len(rows[0]) for row in rows]):
+        raise ValueError("puzzle rows must be non-empty and of equal length")
+    return np.asarray(rows)
+
+
+'''
+@ class:    reusable solver for boards of one shape. The Zobrist keys and
+            the neighbor tables are built once and every puzzle gets a fresh
+            transposition table on top of them, so a long-lived worker only
+            pays for parsing the puzzle and the search itself.
+@ param:    rows: number of rows
+            cols: number of columns
+            capacity: transposition table capacity
+            cache: SolutionCache looked up before every search, None for none
+'''
+class Solver:
+    def __init__(self,rows,cols,capacity=1<<20,cache=None):
+        self.shape = (rows,cols)
+        self.capacity = capacity
+        self.cache = cache
+        self.zobrist = Zobrist(self.shape)
+        self.table = adjacency(rows,cols).near
+
+    def visit(self):
+        return TranspositionTable(self.capacity,zobrist=self.zobrist)
+
+    '''
+    @ function: solve one puzzle
+    @ param:    grid: puzzle file path, Array of row string or matrix of
+                      character, '_' for empty cells
+                engine: engine name in engines.ENGINE
+                budget: seconds allowed, None for no limit. The recursive
+                        engines are stopped with SIGALRM, which only works
+                        in the main thread.
+                cache: SolutionCache to use instead of the solver's own
+    @ return:   dictionary of status ('solved', 'unsolved' or 'timeout'),
+                solution as Array of row string, time and nodes, with
+                cached set when the solution came from the cache
+    '''
+    def solve(self,grid,engine='iterative',budget=None,cache=None):
+        puzzle = as_puzzle(grid)
+        if tuple(puzzle.shape) != self.shape:
+            raise ValueError("puzzle is %dx%d, solver is for %dx%d" % (puzzle.shape+self.shape))
+        if engine not in engines.ENGINE:
+            raise ValueError("unknown engine: %s" % engine)
+        start_state,source,value = smarter.build_Start_State(puzzle)
+        source = sorted(source,key=lambda list:list[2])
+        result = {'status':'unsolved','solution':None,'time':0.0,'nodes':0}
+        start_time = time.time()
+        if cache is None:
+            cache = self.cache
+        if cache is not None:
+            solution = cache.get(start_state)
+            if solution is not None:
+                result.update({'status':'solved','solution':engines.solution_rows(solution),'cached':True})
+                result['time'] = time.time()-start_time
+                return result
+
+        if engine == 'iterative':
+            engines.reset(engine)
+            search = iterative.Search(start_state,source,value,self.visit(),self.table)
+            status = search.run(None,budget)
+            solution,nodes = search.solution,search.nodes
+            if status == 'paused':
+                result['status'] = 'timeout'
+        else:
+            use_alarm = budget is not None
+            if use_alarm and (not hasattr(signal,'setitimer') or (threading.current_thread() is not threading.main_thread())):
+                raise ValueError("a budget for engine %s needs SIGALRM in the main thread" % engine)
+            if use_alarm:
+                handler = signal.signal(signal.SIGALRM,batch.alarm)
+                signal.setitimer(signal.ITIMER_REAL,budget)
+            # deep boards recurse once per assigned cell
+            sys.setrecursionlimit(max(sys.getrecursionlimit(),100000))
+            try:
+                if engine in VISITED:
+                    solution,nodes = engines.ENGINE[engine](start_state,source,value,self.visit())
+                else:
+                    solution,nodes = engines.ENGINE[engine](start_state,source,value)
+            except (batch.Timeout,engines.OutOfBudget):
+                solution,nodes = None,engines.counters(engine)['nodes']
+                result['status'] = 'timeout'
+            finally:
+                if use_alarm:
+                    signal.setitimer(signal.ITIMER_REAL,0)
+                    signal.signal(signal.SIGALRM,handler)
+
+        result['nodes'] = int(nodes)
+        if solution is not None:
+            result['status'] = 'solved'
+            result['solution'] = engines.solution_rows(solution)
+            if cache is not None:
+                cache.put(start_state,solution)
+        result['time'] = time.time()-start_time
+        return result
+
+
+'''
+@ function: solve one puzzle with a solver kept for its board shape, the
+            SOLVER_LIMIT most recently used shapes keep theirs
+@ param:    grid: puzzle file path, Array of row string or matrix of character
+            engine: engine name in engines.ENGINE
+            budget: seconds allowed, None for no limit
+            cache: SolutionCache in front of the search, None for none
+@ return:   dictionary of status, solution, time and nodes
+'''
+def solve(grid,engine='iterative',budget=None,cache=None):
+    puzzle = as_puzzle(grid)
+    shape = tuple(puzzle.shape)
+    if shape in SOLVER:
+        SOLVER.move_to_end(shape)
+    else:
+        SOLVER[shape] = Solver(*shape)
+        if len(SOLVER) > SOLVER_LIMIT:
+            SOLVER.popitem(last=False)
+    return SOLVER[shape].solve(puzzle,engine,budget,cache)
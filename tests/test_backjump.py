@@ -0,0 +1,63 @@
+import glob
+import os
+
+import numpy as np
+import pytest
+
+import engines
+import kernels
+import sat
+import smarter
+
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SOLVABLE = sorted(glob.glob(os.path.join(ROOT,'puzzles','bench_*.txt')))+ \
+           sorted(glob.glob(os.path.join(ROOT,'puzzles','graded','gen_[01]*.txt')))+ \
+           [os.path.join(ROOT,'puzzles','graded','gen_20x20_0.txt')]
+# graded boards with one color taken out leave cells no flow can fill; the
+# search has to back up over several decisions to see it
+UNSOLVABLE = [('gen_07x07_0.txt','C'),('gen_07x07_0.txt','D'),('gen_07x07_0.txt','E'),('gen_09x09_0.txt','F')]
+
+
+def run(start_state,source,value,backjump):
+    smarter.use_backjump = backjump
+    return engines.run_smarter(start_state,source,value)
+
+
+def drop_color(name,letter):
+    start_state,source,value = engines.load_puzzle(os.path.join(ROOT,'puzzles','graded',name))
+    start_state[start_state == ord(letter)] = 0
+    source = [x for x in source if x[2] != ord(letter)]
+    value = [x for x in value if x != ord(letter)]
+    return start_state,source,value
+
+
+@pytest.mark.parametrize('path',SOLVABLE,ids=os.path.basename)
+def test_backjumping_finds_the_same_solution(path,monkeypatch):
+    monkeypatch.setattr(smarter,'use_backjump',True)
+    start_state,source,value = engines.load_puzzle(path)
+    jumped,_ = run(start_state,source,value,True)
+    plain,_ = run(start_state,source,value,False)
+    assert kernels.check_grid(jumped,start_state,strict=True)
+    assert np.array_equal(jumped,plain)
+
+
+@pytest.mark.parametrize('name,letter',UNSOLVABLE)
+def test_backjumping_agrees_on_unsolvable_boards(name,letter,monkeypatch):
+    monkeypatch.setattr(smarter,'use_backjump',True)
+    start_state,source,value = drop_color(name,letter)
+    assert sat.count_solutions(start_state,source,value,limit=1) == 0
+    jumped,jumped_nodes = run(start_state,source,value,True)
+    plain,plain_nodes = run(start_state,source,value,False)
+    assert (jumped is None) and (plain is None)
+    # skipping decisions never searches more
+    assert jumped_nodes <= plain_nodes
+
+
+def test_crossing_puzzle_has_no_solution_either_way(monkeypatch):
+    monkeypatch.setattr(smarter,'use_backjump',True)
+    puzzle = np.asarray([list(row) for row in ['_A_','B_B','_A_']])
+    start_state,source,value = smarter.build_Start_State(puzzle)
+    source = sorted(source,key=lambda list:list[2])
+    assert run(start_state,source,value,True)[0] is None
+    assert run(start_state,source,value,False)[0] is None
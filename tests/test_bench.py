@@ -0,0 +1,33 @@
+import bench
+
+
+def record(puzzle,status='solved',time=1.0,nodes=100,checks=500,memory=1000):
+    return {'engine':'smarter','puzzle':puzzle,'status':status,'time':time,'nodes':nodes,
+            'checks':checks,'memory':memory}
+
+
+def test_equal_runs_have_no_regression():
+    baseline = [record('a.txt'),record('b.txt')]
+    assert bench.compare([record('a.txt'),record('b.txt')],baseline) == []
+
+
+def test_time_regression():
+    found = bench.compare([record('a.txt',time=2.0)],[record('a.txt')],tolerance=0.25)
+    assert len(found) == 1
+    assert 'time' in found[0]
+    # small absolute changes are noise
+    assert bench.compare([record('a.txt',time=0.05)],[record('a.txt',time=0.02)]) == []
+
+
+def test_node_regression():
+    found = bench.compare([record('a.txt',nodes=126)],[record('a.txt')],tolerance=0.25)
+    assert len(found) == 1
+    assert 'nodes' in found[0]
+    assert bench.compare([record('a.txt',nodes=125)],[record('a.txt')],tolerance=0.25) == []
+
+
+def test_status_regression():
+    found = bench.compare([record('a.txt',status='timeout')],[record('a.txt')])
+    assert found == ["smarter a.txt: timeout, baseline solved it"]
+    # a board the baseline did not solve either is not flagged
+    assert bench.compare([record('a.txt',status='timeout')],[record('a.txt',status='timeout')]) == []
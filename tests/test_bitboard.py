@@ -0,0 +1,55 @@
+import os
+
+import numpy as np
+import pytest
+
+import engines
+import kernels
+import smart
+import smarter
+from bitboard import BitBoard
+from domain import Domains
+from nogood import NogoodStore
+from zobrist import TranspositionTable
+
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+PUZZLE = os.path.join(ROOT,'puzzles','graded','gen_07x07_0.txt')
+# boards smart.py solves in well under a second
+SMALL = [os.path.join(ROOT,'puzzles',name) for name in
+         ['bench_05x05.txt','bench_06x06.txt','bench_07x07.txt','bench_09x09.txt',
+          os.path.join('graded','gen_05x05_0.txt'),os.path.join('graded','gen_06x06_0.txt')]]
+
+
+@pytest.mark.parametrize('path',SMALL,ids=os.path.basename)
+def test_smart_gives_the_same_solution_on_both_backends(path):
+    start_state,source,value = engines.load_puzzle(path)
+    engines.reset('smart')
+    solution = smart.recursive_backtrack(start_state.copy(),start_state,source,value,TranspositionTable())
+    nodes = smart.bt_counter
+    engines.reset('smart')
+    found = smart.recursive_backtrack(BitBoard.from_array(start_state),start_state,source,value,TranspositionTable())
+    assert kernels.check_grid(solution,start_state,strict=True)
+    assert np.array_equal(found.to_array(),solution)
+    assert smart.bt_counter == nodes
+
+
+@pytest.mark.parametrize('path',SMALL+[PUZZLE],ids=os.path.basename)
+def test_smarter_gives_the_same_solution_on_both_backends(path):
+    start_state,source,value = engines.load_puzzle(path)
+    solution,nodes = engines.run_smarter(start_state,source,value)
+    engines.reset('smarter')
+    smarter.nogoods = NogoodStore()
+    board = BitBoard.from_array(smarter.forced_move(start_state.copy(),source))
+    found = smarter.recursive_backtrack(board,start_state,source,value,TranspositionTable())
+    assert kernels.check_grid(solution,start_state,strict=True)
+    assert np.array_equal(found.to_array(),solution)
+
+
+def test_domains_find_the_cells_of_a_color_on_a_bitboard():
+    start_state,source,value = engines.load_puzzle(PUZZLE)
+    domains = Domains(start_state,start_state,source,value)
+    board = BitBoard.from_array(start_state)
+    for color in value:
+        assert domains.cells_of(board,color) == domains.cells_of(start_state,color)
+        assert len(domains.cells_of(board,color)) == 2
@@ -0,0 +1,44 @@
+import os
+import random
+
+import numpy as np
+
+import cache
+import engines
+
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+PUZZLE = os.path.join(ROOT,'puzzles','graded','gen_08x08_0.txt')
+
+
+def relabel(grid,rng):
+    color = sorted(set(grid[grid != 0].tolist()))
+    name = rng.sample(range(ord('A'),ord('Z')+1),len(color))
+    table = np.zeros(256,dtype=np.uint8)
+    for old,new in zip(color,name):
+        table[old] = new
+    return table[grid]
+
+
+def test_canonical_is_the_same_under_every_symmetry_and_relabeling():
+    rng = random.Random(5)
+    start_state,source,value = engines.load_puzzle(PUZZLE)
+    key = cache.canonical(start_state)[0]
+    for k,flip in cache.SYMMETRY:
+        moved = np.ascontiguousarray(cache.transform(start_state,k,flip))
+        assert cache.canonical(moved)[0] == key
+        assert cache.canonical(relabel(moved,rng))[0] == key
+
+
+def test_hit_returns_the_solution_in_the_puzzle_orientation():
+    rng = random.Random(7)
+    start_state,source,value = engines.load_puzzle(PUZZLE)
+    solution,nodes = engines.run_sat(start_state,source,value)
+    store = cache.SolutionCache()
+    store.put(start_state,solution)
+    for k,flip in cache.SYMMETRY:
+        table = np.zeros(256,dtype=np.uint8)
+        table[start_state[start_state != 0]] = relabel(start_state,rng)[start_state != 0]
+        moved = np.ascontiguousarray(table[cache.transform(start_state,k,flip)])
+        found = store.get(moved)
+        assert np.array_equal(found,table[cache.transform(solution,k,flip)])
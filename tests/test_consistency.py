@@ -0,0 +1,53 @@
+import os
+import random
+
+import numpy as np
+import pytest
+
+import engines
+import kernels
+import smarter
+
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+# graded boards, with one color taken out of some so they have no solution
+BOARDS = [('gen_05x05_0.txt',None),('gen_07x07_0.txt',None),('gen_09x09_0.txt',None),
+          ('gen_07x07_0.txt','E'),('gen_09x09_0.txt','F')]
+
+
+def puzzle(name,letter=None):
+    start_state,source,value = engines.load_puzzle(os.path.join(ROOT,'puzzles','graded',name))
+    if letter is not None:
+        start_state[start_state == ord(letter)] = 0
+        source = [x for x in source if x[2] != ord(letter)]
+        value = [x for x in value if x != ord(letter)]
+    return start_state,source,value
+
+
+@pytest.mark.parametrize('name,letter',BOARDS)
+@pytest.mark.parametrize('batch',[1,3])
+def test_incremental_checks_match_a_full_check(name,letter,batch):
+    rng = random.Random(batch)
+    start_state,source,value = puzzle(name,letter)
+    rows,cols = start_state.shape
+    near = kernels.adjacency(rows,cols).near
+    engines.reset('smarter')
+    outcome = set()
+    for _ in range(100):
+        state = start_state.copy()
+        # grow random flows from a consistent state until a check fails
+        while True:
+            front = [x for x in np.flatnonzero(state == 0).tolist() if any([state.flat[y] for y in near[x]])]
+            if not front:
+                break
+            cells = rng.sample(front,min(len(front),rng.randint(1,batch)))
+            for x in cells:
+                state.flat[x] = rng.choice([state.flat[y] for y in near[x] if state.flat[y]])
+            full = smarter.is_consistent(state,start_state,source)
+            assert smarter.is_consistent_batch(state,start_state,source,cells,cols) == full
+            if len(cells) == 1:
+                assert smarter.is_consistent(state,start_state,source,list(divmod(cells[0],cols))) == full
+            outcome.add(full)
+            if not full:
+                break
+    assert outcome == {True,False}
@@ -0,0 +1,26 @@
+import glob
+import os
+
+import numpy as np
+import pytest
+
+import engines
+import sat
+
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+GRADED = sorted(glob.glob(os.path.join(ROOT,'puzzles','graded','gen_0*.txt')))+ \
+         [os.path.join(ROOT,'puzzles','graded','gen_10x10_0.txt')]
+
+
+@pytest.mark.parametrize('path',GRADED,ids=os.path.basename)
+def test_graded_puzzles_have_one_solution(path):
+    start_state,source,value = engines.load_puzzle(path)
+    assert sat.count_solutions(start_state,source,value,limit=2) == 1
+
+
+def test_crossing_puzzle_has_no_solution():
+    # A has to cross B
+    puzzle = np.asarray([list(row) for row in ['_A_','B_B','_A_']])
+    start_state,source,value = sat.build_Start_State(puzzle)
+    assert sat.count_solutions(start_state,source,value) == 0
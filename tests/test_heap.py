@@ -0,0 +1,38 @@
+import random
+
+from heap import IndexedHeap
+
+
+def test_update_and_pop_in_key_order():
+    rng = random.Random(3)
+    heap = IndexedHeap(50)
+    keys = {}
+    for _ in range(500):
+        x = rng.randrange(50)
+        if (x in keys) and (rng.random() < 0.2):
+            heap.update(x,None)
+            del keys[x]
+        else:
+            keys[x] = rng.randrange(1000)*50+x
+            heap.update(x,keys[x])
+        assert len(heap) == len(keys)
+        assert heap.top() == min(keys,key=keys.get)
+    order = []
+    while len(heap) > 0:
+        x = heap.top()
+        heap.remove(x)
+        order.append(x)
+    assert order == sorted(keys,key=keys.get)
+    assert heap.top() is None
+
+
+def test_build_and_contains():
+    heap = IndexedHeap(4)
+    heap.build({0:30,2:10,3:20})
+    assert (2 in heap) and (1 not in heap)
+    assert heap.top() == 2
+    heap.update(0,5)
+    assert heap.top() == 0
+    heap.grow(6)
+    heap.update(5,1)
+    assert heap.top() == 5
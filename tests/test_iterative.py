@@ -0,0 +1,24 @@
+import os
+
+import numpy as np
+
+import engines
+import iterative
+
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+PUZZLE = os.path.join(ROOT,'puzzles','graded','gen_14x14_0.txt')
+
+
+def test_checkpoint_restore_gives_the_same_result(tmp_path):
+    whole = iterative.Search(*engines.load_puzzle(PUZZLE))
+    assert whole.run() == 'solved'
+
+    search = iterative.Search(*engines.load_puzzle(PUZZLE))
+    assert search.run(3) == 'paused'
+    path = str(tmp_path/'search.ckpt')
+    search.save(path)
+    resumed = iterative.Search.load(path)
+    assert resumed.stack and (resumed.status == 'paused')
+    assert resumed.run() == 'solved'
+    assert np.array_equal(resumed.solution,whole.solution)
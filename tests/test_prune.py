@@ -0,0 +1,194 @@
+import os
+import random
+
+import numpy as np
+import pytest
+
+import engines
+import kernels
+import smart
+import smarter
+
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+BOARDS = [os.path.join(ROOT,'puzzles','graded',name) for name in
+          ['gen_05x05_0.txt','gen_07x07_0.txt','gen_09x09_0.txt']]
+# graded boards with one color taken out have no solution
+UNSOLVABLE = [('gen_07x07_0.txt','C'),('gen_07x07_0.txt','E'),('gen_09x09_0.txt','F')]
+
+
+# start state and a state with path cells, lower case letters in rows are
+# path cells of that color
+def board(start_rows,rows):
+    start_state,source,value = smarter.build_Start_State(np.asarray([list(row) for row in start_rows]))
+    state = start_state.copy()
+    for i,row in enumerate(rows):
+        for j,char in enumerate(row):
+            if char.islower():
+                state[i,j] = ord(char.upper())
+    return state,start_state,sorted(source,key=lambda list:list[2])
+
+
+# partial states with random colors in some empty cells
+def random_states(path,count,seed):
+    rng = random.Random(seed)
+    start_state,source,value = engines.load_puzzle(path)
+    for _ in range(count):
+        state = start_state.copy()
+        fill = rng.random()*0.6
+        for x in np.flatnonzero(start_state == 0).tolist():
+            if rng.random() < fill:
+                state.flat[x] = rng.choice(value)
+        yield state,start_state,source,value
+
+
+# puzzle of a graded board, with one color taken out when letter is given
+def puzzle(name,letter=None):
+    start_state,source,value = engines.load_puzzle(os.path.join(ROOT,'puzzles','graded',name))
+    if letter is not None:
+        start_state[start_state == ord(letter)] = 0
+        source = [x for x in source if x[2] != ord(letter)]
+        value = [x for x in value if x != ord(letter)]
+    return start_state,source,value
+
+
+# dead end and stranded answers of a state, looking only at the prune area
+# of cells when they are given
+def region_prunes(state,start_state,source,cells=None):
+    regions = kernels.region_graph(state)
+    finished = kernels.finished_color(state,source,regions)
+    ends = kernels.open_ends(state,start_state,finished)
+    area = None if cells is None else kernels.prune_area(state,cells,regions,finished)
+    return kernels.dead_end(state,ends,area),kernels.stranded(state,ends,regions,area)
+
+
+# result of one forward check and the prune counters it raised
+def prunes(state,start_state,source):
+    engines.reset('smarter')
+    result = smarter.checkLink(state,source,None,start_state)
+    return result,{rule:count for rule,count in smarter.prune_counter.items() if count}
+
+
+@pytest.mark.parametrize('path',BOARDS,ids=os.path.basename)
+def test_link_grid_matches_a_bfs_per_pair(path):
+    rng = random.Random(1)
+    for state,start_state,source,value in random_states(path,300,2):
+        linked = [smart.BFS(state,list(source[i][:2]),list(source[i+1][:2])) for i in range(0,len(source),2)]
+        assert kernels.link_grid(state,source) == all(linked)
+        colors = set(rng.sample(value,2))
+        assert kernels.link_grid(state,source,colors) == \
+            all([linked[i//2] for i in range(0,len(source),2) if source[i][2] in colors])
+
+
+def test_link_prune_is_counted():
+    state,start_state,source = board(['A_A','___','B_B'],['AbA','_b_','B_B'])
+    assert prunes(state,start_state,source) == (False,{'link':1})
+
+
+def test_open_state_is_not_pruned():
+    state,start_state,source = board(['A_A','___','B_B'],['A_A','___','B_B'])
+    assert prunes(state,start_state,source) == (True,{})
+
+
+@pytest.mark.parametrize('name,letter',[(os.path.basename(path),None) for path in BOARDS]+UNSOLVABLE)
+def test_local_prunes_match_a_full_scan(name,letter):
+    rng = random.Random(3)
+    start_state,source,value = puzzle(name,letter)
+    rows,cols = start_state.shape
+    outcome = set()
+    for _ in range(150):
+        state = start_state.copy()
+        # grow random flows while the state passes both prunes, a batch of
+        # one to three cells at a time like propagation colors them
+        while True:
+            front = [x for x in np.flatnonzero(state == 0).tolist()
+                     if any([state.flat[y] for y in kernels.adjacency(rows,cols).near[x]])]
+            if not front:
+                break
+            cells = rng.sample(front,min(len(front),rng.randint(1,3)))
+            for x in cells:
+                state.flat[x] = rng.choice([state.flat[y] for y in kernels.adjacency(rows,cols).near[x] if state.flat[y]] or value)
+            full = region_prunes(state,start_state,source)
+            assert region_prunes(state,start_state,source,cells) == full
+            outcome.add(any(full))
+            if any(full):
+                break
+    assert outcome == {True,False}
+
+
+@pytest.mark.parametrize('name,letter',UNSOLVABLE)
+def test_local_prunes_match_a_full_scan_during_search(name,letter,monkeypatch):
+    start_state,source,value = puzzle(name,letter)
+    check = smarter.checkPrune
+    seen = []
+    def compare(state,start_state,source,regions,cells=None):
+        result = check(state,start_state,source,regions,cells)
+        if cells is not None:
+            saved = dict(smarter.prune_counter)
+            assert check(state,start_state,source,regions) == result
+            smarter.prune_counter.update(saved)
+            seen.append(result)
+        return result
+    monkeypatch.setattr(smarter,'checkPrune',compare)
+    # the head search still rejects states with these prunes
+    assert engines.run_head(start_state,source,value)[0] is None
+    assert (True in seen) and (False in seen)
+
+
+def test_dead_end_prune_is_counted():
+    # the middle column has an end cell no open flow reaches
+    state,start_state,source = board(['A_B','___','A_B'],['A_B','a_b','A_B'])
+    assert prunes(state,start_state,source) == (False,{'dead_end':1})
+
+
+def test_stranded_prune_is_counted():
+    # every flow is finished around an empty 2x2 block
+    state,start_state,source = board(['A__A','B__C','B__C','DDEE'],['AaaA','B__C','B__C','DDEE'])
+    assert prunes(state,start_state,source) == (False,{'stranded':1})
+
+
+# colors whose sources can no longer be linked once cell x is filled
+def needs(state,source,x):
+    blocked = state.copy()
+    blocked.flat[x] = kernels.BLOCK
+    return [source[i][2] for i in range(0,len(source),2) if not kernels.link_grid(blocked,source,{source[i][2]})]
+
+
+# number of empty regions of a state
+def empty_regions(state):
+    label,color = kernels.label_regions(state)
+    return color.count(0)
+
+
+@pytest.mark.parametrize('path',BOARDS,ids=os.path.basename)
+def test_articulation_points_split_an_empty_region(path):
+    for state,start_state,source,value in random_states(path,100,4):
+        count = empty_regions(state)
+        split = []
+        for x in np.flatnonzero(state == 0).tolist():
+            blocked = state.copy()
+            blocked.flat[x] = kernels.BLOCK
+            if empty_regions(blocked) > count:
+                split.append(x)
+        assert kernels.articulation_points(state) == split
+
+
+@pytest.mark.parametrize('path',BOARDS,ids=os.path.basename)
+def test_bottleneck_finds_a_cut_cell_two_colors_need(path):
+    outcome = set()
+    for state,start_state,source,value in random_states(path,300,5):
+        if not kernels.link_grid(state,source):
+            continue
+        found = kernels.bottleneck(state,source,kernels.region_graph(state))
+        assert found == any([len(needs(state,source,x)) >= 2 for x in kernels.articulation_points(state)])
+        outcome.add(found)
+    assert outcome == {True,False}
+
+
+def test_bottleneck_prune_is_counted(monkeypatch):
+    # A and B both have to cross the middle cell
+    rows = ['A_C_B','__C__','_____','__D__','B_D_A']
+    state,start_state,source = board(rows,rows)
+    assert prunes(state,start_state,source) == (False,{'bottleneck':1})
+    monkeypatch.setattr(smarter,'use_bottleneck',False)
+    assert prunes(state,start_state,source) == (True,{})
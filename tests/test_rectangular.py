@@ -0,0 +1,170 @@
+import random
+from collections import deque
+
+import numpy as np
+import pytest
+
+import generator
+import kernels
+import smarter
+
+
+SHAPES = [(5,9),(9,5),(4,10),(7,12),(12,7)]
+
+
+# start state and solved state of a generated rectangular board
+def rectangle(rows,cols,seed):
+    puzzle,solution = generator.generate(rows,cols,seed=seed)
+    start_state,source,value = smarter.build_Start_State(np.asarray([list(x) for x in puzzle]))
+    solved = np.asarray([[ord(char) for char in row] for row in solution],dtype=start_state.dtype)
+    return solved,start_state,value
+
+
+# colors of the cells next to a cell, with explicit row and col bounds
+def neighbour(state,row,col):
+    output = []
+    for i,j in [(row+1,col),(row-1,col),(row,col+1),(row,col-1)]:
+        if (0 <= i < state.shape[0]) and (0 <= j < state.shape[1]):
+            output.append(state[i,j])
+    return output
+
+
+# the old per cell loop of smarter.is_consistent, without the link check
+def scalar_consistent(state,start_state):
+    for i in range(state.shape[0]):
+        for j in range(state.shape[1]):
+            cur = state[i,j]
+            near = neighbour(state,i,j)
+            zero = [x for x in near if x == 0]
+            color,count = np.unique([x for x in near if x != 0],return_counts=True)
+            num = len(near)
+            if cur != 0:
+                if cur not in color:
+                    if len(zero) == 0:
+                        return False
+                    elif (len(zero)==1) and (start_state[i,j]==0):
+                        return False
+                else:
+                    if start_state[i,j] == 0:
+                        if (len(zero)==0) and (count[color==cur]==1):
+                            return False
+                        if count[color==cur] > 2:
+                            return False
+                    else:
+                        if count[color==cur] > 1:
+                            return False
+            else:
+                if len(zero) == 0:
+                    if len(color) == num:
+                        return False
+                    elif (len(color)==1) and ((num==3) or (num==4)):
+                        return False
+                    if len(color[count>2]) > 0:
+                        return False
+    return True
+
+
+# the old is_complete loop, walking state.shape[1] columns and counting a
+# missing color as zero
+def scalar_complete(state,start_state):
+    if 0 in state:
+        return False
+    for row in range(state.shape[0]):
+        for col in range(state.shape[1]):
+            color,count = np.unique(neighbour(state,row,col),return_counts=True)
+            if start_state[row,col] == 0:
+                if sum(count[color==state[row,col]]) != 2:
+                    return False
+            else:
+                if sum(count[color==start_state[row,col]]) != 1:
+                    return False
+    return True
+
+
+# flood fill of same color regions and the empty regions next to each one
+def scalar_regions(state):
+    rows,cols = state.shape
+    label = [[0]*cols for _ in range(rows)]
+    color = [0]
+    for row in range(rows):
+        for col in range(cols):
+            if label[row][col]:
+                continue
+            color.append(state[row,col])
+            label[row][col] = len(color)-1
+            queue = deque([(row,col)])
+            while queue:
+                i,j = queue.popleft()
+                for a,b in [(i+1,j),(i-1,j),(i,j+1),(i,j-1)]:
+                    if (0 <= a < rows) and (0 <= b < cols) and (not label[a][b]) and (state[a,b] == state[row,col]):
+                        label[a][b] = label[row][col]
+                        queue.append((a,b))
+    border = [set() for _ in color]
+    for row in range(rows):
+        for col in range(cols):
+            if state[row,col] == 0:
+                continue
+            for a,b in [(row+1,col),(row-1,col),(row,col+1),(row,col-1)]:
+                if (0 <= a < rows) and (0 <= b < cols) and (state[a,b] == 0):
+                    border[label[row][col]].add(label[a][b])
+                    border[label[a][b]].add(label[row][col])
+    return sum(label,[]),color,border
+
+
+# solved state with some cells cleared, recolored or swapped with a neighbor
+def variants(solved,start_state,value,count,seed):
+    rng = random.Random(seed)
+    rows,cols = solved.shape
+    free = np.flatnonzero(start_state == 0).tolist()
+    for _ in range(count):
+        state = solved.copy()
+        kind = rng.randrange(3)
+        if kind == 0:
+            for x in rng.sample(free,rng.randint(1,len(free)//2)):
+                state.flat[x] = 0
+        elif kind == 1:
+            for x in rng.sample(free,rng.randint(1,3)):
+                state.flat[x] = rng.choice(value)
+        else:
+            x = rng.choice(free)
+            y = x+1 if (x%cols < cols-1) else x-1
+            if start_state.flat[y] == 0:
+                state.flat[x],state.flat[y] = state.flat[y],state.flat[x]
+        yield state
+
+
+@pytest.mark.parametrize('rows,cols',SHAPES)
+def test_check_grid_matches_the_scalar_loop(rows,cols):
+    solved,start_state,value = rectangle(rows,cols,rows*cols)
+    assert kernels.check_grid(solved,start_state)
+    assert kernels.check_grid(start_state,start_state) == scalar_consistent(start_state,start_state)
+    results = set()
+    for state in variants(solved,start_state,value,300,rows):
+        expect = scalar_consistent(state,start_state)
+        assert kernels.check_grid(state,start_state) == expect
+        results.add(expect)
+    assert results == {True,False}
+
+
+@pytest.mark.parametrize('rows,cols',SHAPES)
+def test_is_complete_matches_the_scalar_loop(rows,cols):
+    solved,start_state,value = rectangle(rows,cols,rows*cols)
+    assert smarter.is_complete(solved,start_state)
+    assert scalar_complete(solved,start_state)
+    for state in variants(solved,start_state,value,300,cols):
+        # the kernel also rejects a color with a loop apart from its path
+        label,color,border = scalar_regions(state)
+        expect = scalar_complete(state,start_state) and (len(color)-1 == len(np.unique(state)))
+        assert smarter.is_complete(state,start_state) == expect
+        assert (kernels.complete_grid(state,start_state) == 0) == (0 in state)
+
+
+@pytest.mark.parametrize('rows,cols',SHAPES)
+def test_region_graph_matches_a_scalar_flood_fill(rows,cols):
+    solved,start_state,value = rectangle(rows,cols,rows*cols)
+    for state in [solved,start_state]+list(variants(solved,start_state,value,100,rows+cols)):
+        label,color,border = kernels.region_graph(state)
+        expect = scalar_regions(state)
+        assert label == expect[0]
+        assert color == [int(x) for x in expect[1]]
+        assert border == expect[2]
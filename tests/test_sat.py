@@ -0,0 +1,59 @@
+import os
+
+import numpy as np
+import pytest
+
+import batch
+import engines
+import kernels
+import sat
+
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+# boards with one solution each
+PUZZLES = [['_DEF_','DC_E_','C_G__','BA___','_BAGF'],
+           ['FG__H_','____G_','AEFH__','__ED__','A_B_C_','B_C_D_']]
+
+
+def build(rows):
+    start_state,source,value = sat.build_Start_State(np.asarray([list(row) for row in rows]))
+    return start_state,sorted(source,key=lambda list:list[2]),value
+
+
+@pytest.mark.parametrize('rows',PUZZLES)
+def test_solve_sat_gives_a_valid_solution(rows):
+    start_state,source,value = build(rows)
+    solution,solver,status = sat.solve_sat(start_state,source,value)
+    assert solution is not None
+    assert kernels.check_grid(solution,start_state,strict=True)
+    # the branching heap holds every variable at most once
+    assert len(solver.order) <= solver.nvars
+
+
+def test_unsolvable_puzzle_has_no_solution():
+    # A has to cross B
+    start_state,source,value = build(['_A_','B_B','_A_'])
+    solution,solver,status = sat.solve_sat(start_state,source,value)
+    assert solution is None
+    assert status == 'unsat'
+
+
+def test_running_out_of_budget_is_not_unsat():
+    start_state,source,value = build(PUZZLES[1])
+    solution,solver,status = sat.solve_sat(start_state,source,value,budget=0)
+    assert (solution,status) == (None,'budget')
+    assert sat.count_solutions(start_state,source,value,2,0) is None
+    solution,solver,status = sat.solve_sat(start_state,source,value)
+    assert status == 'solved'
+
+
+def test_sat_engine_reports_a_timeout_out_of_budget(monkeypatch):
+    path = os.path.join(ROOT,'puzzles','graded','gen_07x07_0.txt')
+    monkeypatch.setattr(engines,'sat_budget',0)
+    with pytest.raises(engines.OutOfBudget):
+        engines.run_sat(*engines.load_puzzle(path))
+    assert batch.solve_file(path,'sat')['status'] == 'timeout'
+    monkeypatch.setattr(engines,'sat_budget',None)
+    assert batch.solve_file(path,'sat')['status'] == 'solved'
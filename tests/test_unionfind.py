@@ -0,0 +1,27 @@
+import numpy as np
+
+from unionfind import UnionFind
+
+
+def test_undo_restores_sets():
+    state = np.zeros((3,3),dtype=np.uint8)
+    state[0,0] = state[2,2] = 65
+    uf = UnionFind.from_state(state)
+    mark = uf.mark()
+    parent = list(uf.parent)
+    rank = list(uf.rank)
+    for cur in [(0,1),(0,2)]:
+        state[cur] = 65
+        uf.link(state,cur)
+    assert uf.connected(0,2) and not uf.connected(0,8)
+    inner = uf.mark()
+    state[1,2] = 65
+    uf.link(state,(1,2))
+    assert uf.connected(0,8)
+    uf.undo(inner)
+    state[1,2] = 0
+    assert uf.connected(0,2) and not uf.connected(0,8)
+    uf.undo(mark)
+    assert uf.parent == parent
+    assert uf.rank == rank
+    assert not uf.connected(0,1)
@@ -0,0 +1,89 @@
+import os
+
+import numpy as np
+import pytest
+
+import engines
+import kernels
+from zobrist import TranspositionTable,Zobrist
+
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+# Zobrist keys that hash every state to the same key
+def colliding_keys(shape):
+    zobrist = Zobrist(shape)
+    zobrist.table = [[0]*256 for _ in zobrist.table]
+    return zobrist
+
+
+def test_lru_evicts_the_least_recently_used_key():
+    table = TranspositionTable(3,'lru')
+    for key in (1,2,3):
+        table.add(key)
+    # a hit makes 1 the most recently used, so 2 goes first
+    assert table.seen(1)
+    table.add(4)
+    assert table.stats()['evictions'] == 1
+    assert [table.seen(key) for key in (1,2,3,4)] == [True,False,True,True]
+    table.add(5)
+    # the lookups above made 1 the oldest one
+    assert [table.seen(key) for key in (1,3,4,5)] == [False,True,True,True]
+    assert len(table) == 3
+    stats = table.stats()
+    assert (stats['evictions'],stats['hits'],stats['misses']) == (2,7,2)
+
+
+def test_depth_keeps_the_shallowest_key_of_a_slot():
+    # two slots, keys 0, 2, 4 and 6 all land in slot 0
+    table = TranspositionTable(4,'depth')
+    table.add(0,3)
+    table.add(2,5)
+    assert table.stats()['evictions'] == 0
+    assert [table.seen(key) for key in (0,2)] == [True,True]
+    # shallower 4 takes the depth slot and moves 0 to the other one
+    table.add(4,1)
+    assert table.stats()['evictions'] == 1
+    assert [table.seen(key) for key in (0,2,4)] == [True,False,True]
+    # deeper 6 only replaces the always-replace entry
+    table.add(6,9)
+    assert table.stats()['evictions'] == 2
+    assert [table.seen(key) for key in (0,4,6)] == [False,True,True]
+    # the other slot is untouched
+    table.add(1,7)
+    assert table.stats()['evictions'] == 2
+    assert len(table) == 3
+
+
+@pytest.mark.parametrize('policy',['lru','depth'])
+def test_verify_turns_a_key_collision_into_a_miss(policy):
+    state = np.zeros((2,3),dtype=np.uint8)
+    table = TranspositionTable(8,policy,verify=True)
+    first = table.snapshot(state,0,0,65)
+    second = table.snapshot(state,1,2,66)
+    table.add(7,0,first)
+    assert table.seen(7,first)
+    assert not table.seen(7,second)
+    stats = table.stats()
+    assert (stats['hits'],stats['misses'],stats['collisions']) == (1,1,1)
+
+    table = TranspositionTable(8,policy,verify=False)
+    assert table.snapshot(state,1,2,66) is None
+    table.add(7,0,None)
+    assert table.seen(7,None)
+    assert table.stats()['collisions'] == 0
+
+
+@pytest.mark.parametrize('run',[engines.run_smart,engines.run_smarter])
+def test_verify_keeps_a_search_correct_when_every_key_collides(run):
+    start_state,source,value = engines.load_puzzle(os.path.join(ROOT,'puzzles','graded','gen_07x07_0.txt'))
+    # trusting the key alone prunes states that were never searched
+    visit = TranspositionTable(zobrist=colliding_keys(start_state.shape),verify=False)
+    solution,nodes = run(start_state,source,value,visit)
+    assert solution is None
+    visit = TranspositionTable(zobrist=colliding_keys(start_state.shape),verify=True)
+    solution,nodes = run(start_state,source,value,visit)
+    assert solution is not None
+    assert kernels.complete_grid(solution,start_state) == 2
+    assert visit.stats()['collisions'] > 0
@@ -0,0 +1,296 @@
+import argparse
+import os
+import struct
+import time
+from copy import deepcopy
+
+import numpy as np
+
+import smarter
+from domain import Domains
+from unionfind import UnionFind
+
+
+# a session starts with MAGIC, HEADER (version,engine,rows,cols) and the
+# puzzle grid one byte per cell, then RECORD entries follow until the next
+# session or the end of the file
+MAGIC = b'FLTR'
+VERSION = 1
+HEADER = struct.Struct('<B8sHH')
+# kind, color or reason, depth, cell index, microseconds since the last record
+RECORD = struct.Struct('<BBHII')
+
+DECIDE = 1
+PRUNE = 2
+BACKTRACK = 3
+SOLVED = 4
+KIND = {DECIDE:'decide',PRUNE:'prune',BACKTRACK:'backtrack',SOLVED:'solved'}
+
+# prune reasons, the smarter.prune_counter rules plus the two the searches
+# see themselves, new reasons go last so older traces still read
+REASON = ['visited','domain','local','link','dead_end','stranded','bottleneck','unknown','nogood']
+
+# engines whose searches record into smarter.trace
+TRACEABLE = ['smarter','head','iterative']
+
+# bytes kept in memory before they go to the file
+BUFFER = 1 << 16
+
+
+'''
+@ class:    append-only binary recorder of a search. Every value tried is a
+            decide record, followed by a prune record when it is rejected
+            right away or a backtrack record when its subtree fails. The
+            searches call it through smarter.trace, which is None when
+            nothing records.
+@ param:    path: trace file path, a new session is appended to it
+            start_state: initial state
+            engine: engine name, replay follows what it does at the root
+            counter: prune_counter of the engine, to name the failing rule
+'''
+class Trace:
+    def __init__(self,path,start_state,engine,counter=None):
+        self.counter = smarter.prune_counter if counter is None else counter
+        self.seen = dict(self.counter)
+        self.buffer = bytearray(MAGIC)
+        self.buffer += HEADER.pack(VERSION,engine.encode()[:8],start_state.shape[0],start_state.shape[1])
+        self.buffer += np.where(start_state == 0,ord('_'),start_state).astype(np.uint8).tobytes()
+        self.file = open(path,'ab')
+        self.clock = time.perf_counter
+        self.last = self.clock()
+
+    def record(self,kind,value,depth,cell):
+        now = self.clock()
+        delta = min(int((now-self.last)*1e6),0xffffffff)
+        self.last = now
+        self.buffer += RECORD.pack(kind,value,min(depth,0xffff),cell,delta)
+        if len(self.buffer) >= BUFFER:
+            self.flush()
+
+    def decide(self,cell,color,depth):
+        self.record(DECIDE,int(color),depth,cell)
+
+    '''
+    @ function: record a rejected value
+    @ param:    cell: cell index
+                depth: search depth
+                reason: name in REASON, None for the prune_counter rule that
+                        went up since the last prune
+    @ return:   none
+    '''
+    def prune(self,cell,depth,reason=None):
+        if reason is None:
+            reason = 'unknown'
+            if any([count < self.seen.get(rule,0) for rule,count in self.counter.items()]):
+                # the engine reset its counters
+                self.seen = {}
+            for rule,count in self.counter.items():
+                if count > self.seen.get(rule,0):
+                    reason = rule
+                    break
+            self.seen = dict(self.counter)
+        self.record(PRUNE,REASON.index(reason),depth,cell)
+
+    def backtrack(self,cell,depth):
+        self.record(BACKTRACK,0,depth,cell)
+
+    def solved(self,depth):
+        self.record(SOLVED,0,depth,0)
+
+    def flush(self):
+        self.file.write(self.buffer)
+        self.file.flush()
+        self.buffer = bytearray()
+
+    def close(self):
+        self.flush()
+        self.file.close()
+
+
+'''
+@ function: read every session of a trace file
+@ param:    path: trace file path
+@ return:   Array of session dictionary with engine, puzzle rows and
+            records as Array of (kind,value,depth,cell,microseconds)
+'''
+def read_trace(path):
+    file = open(path,'rb')
+    data = file.read()
+    file.close()
+    output = []
+    pos = 0
+    while pos < len(data):
+        if data[pos:pos+len(MAGIC)] == MAGIC:
+            pos += len(MAGIC)
+            version,engine,rows,cols = HEADER.unpack_from(data,pos)
+            if version != VERSION:
+                raise ValueError("unsupported trace version %d" % version)
+            pos += HEADER.size
+            grid = data[pos:pos+rows*cols].decode()
+            pos += rows*cols
+            output.append({'engine':engine.rstrip(b'\0').decode(),
+                           'puzzle':[grid[i*cols:(i+1)*cols] for i in range(rows)],
+                           'records':[]})
+            continue
+        if (len(output) == 0) or (pos+RECORD.size > len(data)):
+            raise ValueError("corrupt trace at byte %d" % pos)
+        output[-1]['records'].append(RECORD.unpack_from(data,pos))
+        pos += RECORD.size
+    return output
+
+
+'''
+@ function: rebuild the state of a search after a path of decisions,
+            applying what the engine does at the root first
+@ param:    session: session dictionary from read_trace
+            path: Array of (cell,color) from the root
+@ return:   state: matrix of state, None when a decision is inconsistent
+'''
+def rebuild(session,path):
+    puzzle = np.asarray([list(row) for row in session['puzzle']])
+    start_state,source,value = smarter.build_Start_State(puzzle)
+    source = sorted(source,key=lambda list:list[2])
+    state = deepcopy(start_state)
+    if session['engine'] in ('smarter','head'):
+        state = smarter.forced_move(state,source)
+    if session['engine'] == 'head':
+        # path heads assign single cells without propagation
+        for cell,color in path:
+            state[divmod(cell,state.shape[1])] = color
+        return state
+
+    uf = UnionFind.from_state(state)
+    domains = Domains(state,start_state,source,value)
+    colored = [x for x in range(len(domains.dom)) if state[divmod(x,domains.cols)] != 0]
+    if domains.propagate(state,uf,colored) is None:
+        return None
+    for cell,color in path:
+        domains.assign(state,cell,color)
+        if domains.propagate(state,uf,[cell]) is None:
+            return None
+    return state
+
+
+'''
+@ function: summarize one session
+@ param:    session: session dictionary from read_trace
+            top: number of hot subtrees and thrashing cells to keep
+            depth: hot subtrees are rooted above this depth
+@ return:   dictionary of counts, prunes by reason, seconds per depth, hot
+            subtrees as (decisions below,path) and cells as (decisions and
+            backtracks,cell) with the busiest first
+'''
+def analyze(session,top=10,depth=6):
+    cols = len(session['puzzle'][0])
+    count = {name:0 for name in KIND.values()}
+    prunes = {}
+    seconds = {}
+    heat = {}
+    path = []
+    # open subtrees: [depth,decision count when opened,path]
+    open_tree = []
+    hot = []
+    decisions = 0
+    for kind,value,level,cell,delta in session['records']:
+        count[KIND[kind]] += 1
+        seconds[level] = seconds.get(level,0.0)+delta/1e6
+        if kind == DECIDE:
+            while open_tree and (open_tree[-1][0] >= level):
+                tree = open_tree.pop()
+                hot.append((decisions-tree[1],tree[2]))
+            del path[level:]
+            path.append((cell,value))
+            decisions += 1
+            heat[cell] = heat.get(cell,0)+1
+            if level < depth:
+                open_tree.append([level,decisions,list(path)])
+        elif kind == PRUNE:
+            prunes[REASON[value]] = prunes.get(REASON[value],0)+1
+        elif kind == BACKTRACK:
+            heat[cell] = heat.get(cell,0)+1
+    for tree in open_tree:
+        hot.append((decisions-tree[1],tree[2]))
+    hot.sort(key=lambda item:-item[0])
+    cells = sorted([(n,divmod(cell,cols)) for cell,n in heat.items()],key=lambda item:-item[0])
+    return {
+        'engine': session['engine'],
+        'count': count,
+        'prunes': prunes,
+        'time': sum(seconds.values()),
+        'seconds': [seconds.get(level,0.0) for level in range(max(seconds)+1)] if seconds else [],
+        'hot': hot[:top],
+        'cells': cells[:top],
+        'heat': heat,
+    }
+
+
+'''
+@ function: grid of how often each cell was decided or backtracked,
+            0-9 scaled to the busiest cell, '.' for never
+@ param:    heat: dictionary of cell index to count
+            rows,cols: board size
+@ return:   Array of row string
+'''
+def heat_rows(heat,rows,cols):
+    peak = max(heat.values()) if heat else 1
+    output = []
+    for row in range(rows):
+        line = ''
+        for col in range(cols):
+            n = heat.get(row*cols+col,0)
+            line += '.' if n == 0 else str(min(9,n*10//(peak+1)))
+        output.append(line)
+    return output
+
+
+def print_report(session,report):
+    rows,cols = len(session['puzzle']),len(session['puzzle'][0])
+    print("Engine %s, %dx%d, %.3fs" % (report['engine'],rows,cols,report['time']))
+    print("Records:",report['count'])
+    print("Prunes:",report['prunes'])
+    print("Seconds per depth:")
+    for level,second in enumerate(report['seconds']):
+        if second > 0:
+            print("  %4d %9.4f" % (level,second))
+    print("Hot subtrees (decisions below, path from the root):")
+    for n,path in report['hot']:
+        print("  %8d %s" % (n,' '.join(["%d,%d=%s" % (cell//cols,cell%cols,chr(color)) for cell,color in path])))
+    print("Thrashing cells (decisions and backtracks):")
+    for n,cell in report['cells']:
+        print("  %8d %d,%d" % (n,cell[0],cell[1]))
+    print('\n'.join(heat_rows(report['heat'],rows,cols)))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Analyze or replay a search trace.")
+    parser.add_argument('trace',help="trace file")
+    parser.add_argument('-s','--session',type=int,default=-1,help="session in the file (default: last)")
+    parser.add_argument('--top',type=int,default=10,help="hot subtrees and cells to list")
+    parser.add_argument('--depth',type=int,default=6,help="root hot subtrees above this depth")
+    parser.add_argument('-r','--record',type=int,default=None,help="print the state at this record instead")
+    args = parser.parse_args(argv)
+
+    if not os.path.exists(args.trace):
+        parser.error("no such trace: %s" % args.trace)
+    session = read_trace(args.trace)[args.session]
+    if args.record is None:
+        print_report(session,analyze(session,args.top,args.depth))
+        return
+
+    path = []
+    for kind,value,level,cell,delta in session['records'][:args.record+1]:
+        if kind == DECIDE:
+            del path[level:]
+            path.append((cell,value))
+        elif kind in (PRUNE,BACKTRACK):
+            # the value is undone
+            del path[level:]
+    state = rebuild(session,path)
+    if state is None:
+        print("Decisions up to record %d are inconsistent" % args.record)
+    else:
+        smarter.print_solution(state)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,97 @@
+from adjacency import adjacency
+
+
+'''
+@ class:    union-find over the cells of a state with undo.
+            Cells of the same color that touch are in one set, so two
+            sources are connected when they share a root.
+            Union by rank and no path compression keep every union a
+            single change on the trail, which backtracking pops off.
+@ param:    shape: shape of the state
+'''
+class UnionFind:
+    def __init__(self,shape):
+        self.shape = tuple(shape)
+        self.cols = shape[1]
+        self.near = adjacency(shape[0],shape[1]).near
+        self.parent = list(range(shape[0]*shape[1]))
+        self.rank = [0]*(shape[0]*shape[1])
+        # each entry is (child root,parent root,rank raised)
+        self.trail = []
+
+    '''
+    @ function: build the sets of a state from scratch
+    @ param:    state: current state
+    @ return:   UnionFind of the state
+    '''
+    @classmethod
+    def from_state(cls,state):
+        uf = cls(state.shape)
+        for row in range(uf.shape[0]):
+            for col in range(uf.shape[1]):
+                if state[row,col] == 0:
+                    continue
+                if (row+1 < uf.shape[0]) and (state[row+1,col] == state[row,col]):
+                    uf.union(row*uf.cols+col,(row+1)*uf.cols+col)
+                if (col+1 < uf.shape[1]) and (state[row,col+1] == state[row,col]):
+                    uf.union(row*uf.cols+col,row*uf.cols+col+1)
+        return uf
+
+    def find(self,x):
+        while self.parent[x] != x:
+            x = self.parent[x]
+        return x
+
+    '''
+    @ function: merge the sets of two cells
+    @ param:    a,b: cell index
+    @ return:   boolean value of the sets being different before
+    '''
+    def union(self,a,b):
+        a = self.find(a)
+        b = self.find(b)
+        if a == b:
+            return False
+        if self.rank[a] < self.rank[b]:
+            a,b = b,a
+        raised = self.rank[a] == self.rank[b]
+        self.parent[b] = a
+        if raised:
+            self.rank[a] += 1
+        self.trail.append((b,a,raised))
+        return True
+
+    '''
+    @ function: merge a newly colored cell with its same color neighbors
+    @ param:    state: current state, already holding the cell's color
+                cur: [row,col] of the cell
+    @ return:   none
+    '''
+    def link(self,state,cur):
+        index = cur[0]*self.cols+cur[1]
+        color = state[cur[0],cur[1]]
+        for y in self.near[index]:
+            if state[y//self.cols,y%self.cols] == color:
+                self.union(index,y)
+
+    def connected(self,a,b):
+        return self.find(a) == self.find(b)
+
+    '''
+    @ function: position on the trail to undo back to
+    @ return:   length of the trail
+    '''
+    def mark(self):
+        return len(self.trail)
+
+    '''
+    @ function: undo every union made after a mark
+    @ param:    mark: trail length returned by mark()
+    @ return:   none
+    '''
+    def undo(self,mark):
+        while len(self.trail) > mark:
+            b,a,raised = self.trail.pop()
+            self.parent[b] = b
+            if raised:
+                self.rank[a] -= 1
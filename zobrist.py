@@ -0,0 +1,198 @@
+import numpy as np
+from collections import OrderedDict
+
+
+# keep the state with every stored key and compare it on a hit. Two states
+# share a 62 bit key once in about 2**62 pairs, and without the check such a
+# collision prunes a state never searched, so an exhausted search could then
+# report no solution for a puzzle that has one. The check costs a copy of
+# the state per stored key.
+use_verify = False
+
+
+'''
+@ class:    Zobrist keys, one random 62 bit number for every (cell,color)
+@ param:    shape: shape of the state
+            seed: random seed of the keys
+'''
+class Zobrist:
+    def __init__(self,shape,seed=0):
+        rng = np.random.RandomState(seed)
+        table = rng.randint(1,1 << 62,size=(shape[0]*shape[1],256),dtype=np.int64)
+        # color 0 (unassigned) does not contribute to the hash
+        table[:,0] = 0
+        self.shape = shape
+        self.cols = shape[1]
+        self.table = table.tolist()
+
+    '''
+    @ function: hash a whole state from scratch
+    @ param:    state: current state
+    @ return:   hash value of the state
+    '''
+    def hash(self,state):
+        key = 0
+        for row in range(self.shape[0]):
+            for col in range(self.shape[1]):
+                key ^= self.table[row*self.cols+col][int(state[row,col])]
+        return key
+
+    '''
+    @ function: update a hash for one cell changing color
+    @ param:    key: hash value before the change
+                row,col: position of the cell
+                old: color before the change
+                new: color after the change
+    @ return:   hash value after the change
+    '''
+    def toggle(self,key,row,col,old,new):
+        keys = self.table[row*self.cols+col]
+        return key ^ keys[int(old)] ^ keys[int(new)]
+
+
+'''
+@ class:    fixed size table of visited state hashes
+@ param:    capacity: maximum number of stored states
+            policy: 'lru' evicts the least recently used state,
+                    'depth' keeps the shallowest state of each slot and
+                    falls back to an always-replace slot
+            seed: random seed of the Zobrist keys
+            zobrist: Zobrist keys built before, None to build them on the
+                     first hash
+            verify: boolean value of storing the state with its key and
+                    comparing it on a hit, None to follow use_verify
+'''
+class TranspositionTable:
+    def __init__(self,capacity=1<<20,policy='lru',seed=0,zobrist=None,verify=None):
+        if policy not in ('lru','depth'):
+            raise ValueError("unknown eviction policy: %s" % policy)
+        self.capacity = capacity
+        self.policy = policy
+        self.seed = seed
+        self.zobrist = zobrist
+        self.verify = use_verify if verify is None else verify
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.collisions = 0
+        if policy == 'lru':
+            # key: (depth,snapshot)
+            self.table = OrderedDict()
+        else:
+            # two entries per bucket: depth-preferred and always-replace
+            self.size = max(1,capacity//2)
+            self.deep = [None]*self.size
+            self.recent = [None]*self.size
+
+    '''
+    @ function: hash a whole state, building the keys for its shape if needed
+    @ param:    state: current state
+    @ return:   hash value of the state
+    '''
+    def hash(self,state):
+        if (self.zobrist is None) or (self.zobrist.shape != tuple(state.shape)):
+            self.zobrist = Zobrist(tuple(state.shape),self.seed)
+        return self.zobrist.hash(state)
+
+    '''
+    @ function: hash of a state after assigning one unassigned variable
+    @ param:    key: hash value of the current state
+                row,col: position of the variable
+                val: assigned color
+    @ return:   hash value of the new state
+    '''
+    def toggle(self,key,row,col,val):
+        return self.zobrist.toggle(key,row,col,0,val)
+
+    '''
+    @ function: copy of a state after assigning one unassigned variable,
+                only taken when the table verifies its hits
+    @ param:    state: current state
+                row,col: position of the variable
+                val: assigned color
+    @ return:   bytes of the new state, None when the table does not verify
+    '''
+    def snapshot(self,state,row,col,val):
+        if not self.verify:
+            return None
+        data = bytearray(state.tobytes())
+        data[row*state.shape[1]+col] = int(val)
+        return bytes(data)
+
+    '''
+    @ function: look a state up
+    @ param:    key: hash value of the state
+                snapshot: bytes of the state from snapshot(), None to trust
+                          the key alone
+    @ return:   boolean value of the state being stored
+    '''
+    def seen(self,key,snapshot=None):
+        stored = None
+        if self.policy == 'lru':
+            found = key in self.table
+            if found:
+                self.table.move_to_end(key)
+                stored = self.table[key][1]
+        else:
+            idx = key % self.size
+            found = False
+            for entry in (self.deep[idx],self.recent[idx]):
+                if (entry is not None) and (entry[0] == key):
+                    found = True
+                    stored = entry[2]
+                    break
+        if found and (snapshot is not None) and (stored != snapshot):
+            # same key, other state
+            self.collisions += 1
+            found = False
+        if found:
+            self.hits += 1
+        else:
+            self.misses += 1
+        return found
+
+    def __contains__(self,key):
+        return self.seen(key)
+
+    '''
+    @ function: store a visited state
+    @ param:    key: hash value of the state
+                depth: search depth of the state
+                snapshot: bytes of the state from snapshot()
+    @ return:   none
+    '''
+    def add(self,key,depth=0,snapshot=None):
+        if self.policy == 'lru':
+            self.table[key] = (depth,snapshot)
+            self.table.move_to_end(key)
+            if len(self.table) > self.capacity:
+                self.table.popitem(last=False)
+                self.evictions += 1
+            return
+
+        idx = key % self.size
+        entry = (key,depth,snapshot)
+        old = self.deep[idx]
+        # shallower states cover larger subtrees and are kept longer
+        if (old is None) or (depth <= old[1]):
+            self.deep[idx] = entry
+            entry = old
+            if entry is None:
+                return
+        if self.recent[idx] is not None:
+            self.evictions += 1
+        self.recent[idx] = entry
+
+    def __len__(self):
+        if self.policy == 'lru':
+            return len(self.table)
+        return sum(x is not None for x in self.deep)+sum(x is not None for x in self.recent)
+
+    '''
+    @ function: report table counters
+    @ param:    none
+    @ return:   dictionary of counters
+    '''
+    def stats(self):
+        return {'policy':self.policy,'capacity':self.capacity,'size':len(self),'verify':self.verify,
+                'hits':self.hits,'misses':self.misses,'evictions':self.evictions,'collisions':self.collisions}